@@ -1,137 +1,151 @@
+import os
+import sys
 import argparse
 from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import csv
 import json
+import logging
 import matplotlib.pyplot as plt
 from requests import Session
-import s2
-import time
-from requests.exceptions import HTTPError, RequestException
+from requests.adapters import HTTPAdapter
+
+# citation_source.py and s2_bulk.py are maintained once, in the worker service that also crawls with them
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "meritpath-worker-service", "app", "lib"))
+
+from citation_source import (
+    CitationSource, S2CitationSource, BulkCitationSource, CachedCitationSource, RateLimiter
+)
 
 s2_api_key: str | None = None
-MAX_RETRIES = 3
-RETRY_DELAY = 5  # seconds
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RPS = 5.0  # requests per second shared by all workers
+DEFAULT_CACHE_DIR = ".s2_cache"
+DEFAULT_CACHE_TTL_DAYS = 30
+
+# Set up in __main__; any CitationSource works (see meritpath-worker-service/app/lib/citation_source.py)
+source: CitationSource | None = None
+
 
+def get_author_record(author_id: str) -> dict | None:
+    """Fetch an author's name and papers with one API call."""
+    return source.get_author(author_id)
 
-def api_call_with_retry(func, *args, **kwargs):
-    """Wrapper function to retry API calls with exponential backoff."""
-    for attempt in range(MAX_RETRIES):
-        try:
-            return func(*args, **kwargs)
-        except (HTTPError, RequestException) as e:
-            if attempt == MAX_RETRIES - 1:
-                print(f"Error after {MAX_RETRIES} attempts: {e}")
-                return None
-            wait_time = RETRY_DELAY * (2 ** attempt)
-            print(f"Error: {e}. Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
+
+def get_paper_record(paper_id: str) -> dict | None:
+    """Fetch a paper's citations and authors with one API call."""
+    return source.get_paper(paper_id)
 
 
 def get_author_name(author_id: str) -> str:
     """Fetch the name of the author given the author ID."""
-    author_details = api_call_with_retry(s2.api.get_author, authorId=author_id, session=session)
-    return author_details.name.replace(" ", "_") if author_details else "Unknown_Author"
+    author_record = get_author_record(author_id)
+    return author_record["name"].replace(" ", "_") if author_record and author_record["name"] else "Unknown_Author"
 
 
 def get_author_papers(author_id: str) -> list[dict]:
     """Fetch papers for a given author ID from Semantic Scholar using PyS2."""
-    author_papers = api_call_with_retry(s2.api.get_author, authorId=author_id, session=session)
-    if author_papers:
-        return [{"title": paper.title, "paperId": paper.paperId} for paper in author_papers.papers]
-    return []
+    author_record = get_author_record(author_id)
+    return author_record["papers"] if author_record else []
 
 
 def get_citations(paper_id: str) -> list[dict]:
     """Fetch citations for a given paper ID from Semantic Scholar using PyS2."""
-    paper_details = api_call_with_retry(s2.api.get_paper, paperId=paper_id, session=session)
-    if paper_details:
-        return [
-            {"title": citation.title, "paperId": citation.paperId, "year": citation.year}
-            for citation in paper_details.citations
-        ]
-    return []
+    paper_record = get_paper_record(paper_id)
+    return paper_record["citations"] if paper_record else []
 
 
 def get_paper_authors(paper_id: str) -> list[dict]:
     """Fetch authors for a given paper ID from Semantic Scholar using PyS2."""
-    paper_details = api_call_with_retry(s2.api.get_paper, paperId=paper_id, session=session)
-    if paper_details:
-        return [
-            {"name": author.name, "authorId": author.authorId}
-            for author in paper_details.authors
-        ]
-    return []
-
+    paper_record = get_paper_record(paper_id)
+    return paper_record["authors"] if paper_record else []
 
-def is_coauthor(target_author_id: str, papers: list[dict]) -> bool:
-    for paper in papers:
-        paper_authors = get_paper_authors(paper["paperId"])
-        if any(author['authorId'] == target_author_id for author in paper_authors):
-            return True
-    return False
 
-
-def get_author_details(author_id: str, target_author_id) -> dict:
-    """Fetch author details including paper count and citation count."""
+def get_author_details(author_id: str) -> dict:
+    """Fetch author details including paper count."""
     papers = get_author_papers(author_id)
     return {"paper_count": len(papers)}
 
 
-def find_my_citers(author_id: str) -> tuple[list[tuple[str, str, int, dict, int]], list[int]]:
-    your_papers = get_author_papers(author_id)
+def fetch_all(fetch, keys: list, workers: int, label: str) -> dict:
+    """Run fetch(key) for every key on a thread pool and return {key: result}."""
+    results = {}
+    total = len(keys)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(fetch, key): key for key in keys}
+        for index, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                print(f"Error fetching {label} {key}: {e}")
+                results[key] = None
+            if index % 50 == 0 or index == total:
+                print(f"Fetched {index} of {total} {label}")
+    return results
+
+
+def find_my_citers(author_id: str, workers: int = DEFAULT_WORKERS) -> tuple[list[tuple[str, str, int, dict, int]], list[int]]:
+    your_papers = [paper for paper in get_author_papers(author_id) if paper.get("paperId")]
     citation_details = defaultdict(lambda: {"authorId": "", "papers": defaultdict(list)})
     citation_years = []
     coauthors = set()
-    total_papers = len(your_papers)
-    processed_papers = 0
 
+    # Your papers: citations and coauthors come from the same response
+    print(f"Fetching {len(your_papers)} papers")
+    paper_records = fetch_all(get_paper_record, [paper["paperId"] for paper in your_papers], workers, "papers")
+
+    citing_paper_ids = set()
     for paper in your_papers:
-        try:
-            citations = get_citations(paper["paperId"])
-            print(f"Processing paper {paper['title']}")
-            paper_authors = get_paper_authors(paper["paperId"])
-            coauthors.update(author["name"] for author in paper_authors if author["authorId"] != author_id)
-
-            for citation in citations:
-                print(f"Processing citation {citation['title']}")
-                if "paperId" in citation:
-                    authors = get_paper_authors(citation["paperId"])
-                    for author in authors:
-                        author_name = author.get("name")
-                        author_id = author.get("authorId")
-                        if author_name and author_id:
-                            citation_details[author_name]["authorId"] = author_id
-                            citation_details[author_name]["papers"][paper["title"]].append(citation["title"])
-                    if citation.get("year"):
-                        citation_years.append(citation["year"])
-
-            processed_papers += 1
-            print(f"Processed paper {processed_papers} of {total_papers}")
-        except Exception as e:
-            print(f"Error processing paper {paper['title']}: {e}")
+        paper_record = paper_records.get(paper["paperId"])
+        if not paper_record:
+            print(f"Error processing paper {paper['title']}: no response")
             continue
+        coauthors.update(
+            author["name"] for author in paper_record["authors"]
+            if author.get("authorId") and author["authorId"] != author_id
+        )
+        citing_paper_ids.update(citation["paperId"] for citation in paper_record["citations"] if citation.get("paperId"))
 
-    sorted_citation_data = []
-    total_authors = len(citation_details)
-
-    for index, (author, data) in enumerate(citation_details.items(), 1):
-        try:
-            print(f"Processing author {author} ({index}/{total_authors})")
-            citing_author_id = data["authorId"]
-            papers = data["papers"]
-            total_citations = sum(len(citing_papers) for citing_papers in papers.values())
-            author_details = get_author_details(citing_author_id, author_id)
-            sorted_citation_data.append((
-                author,
-                citing_author_id,
-                total_citations,
-                dict(papers),
-                author_details["paper_count"],
-            ))
-        except Exception as e:
-            print(f"Error processing author {author}: {e}")
+    # Citing papers: each is fetched once, even if it cites several of your papers
+    print(f"Fetching authors of {len(citing_paper_ids)} citing papers")
+    citing_authors = fetch_all(get_paper_authors, sorted(citing_paper_ids), workers, "citing papers")
+
+    for paper in your_papers:
+        paper_record = paper_records.get(paper["paperId"])
+        if not paper_record:
             continue
+        for citation in paper_record["citations"]:
+            if not citation.get("paperId"):
+                continue
+            for author in citing_authors.get(citation["paperId"]) or []:
+                author_name = author.get("name")
+                citing_author_id = author.get("authorId")
+                if author_name and citing_author_id:
+                    citation_details[author_name]["authorId"] = citing_author_id
+                    citation_details[author_name]["papers"][paper["title"]].append(citation["title"])
+            if citation.get("year"):
+                citation_years.append(citation["year"])
+
+    # Citers: one author lookup each for the paper count
+    print(f"Fetching details of {len(citation_details)} citing authors")
+    citer_ids = sorted({data["authorId"] for data in citation_details.values()})
+    author_details = fetch_all(get_author_details, citer_ids, workers, "citing authors")
 
+    sorted_citation_data = []
+    for author, data in citation_details.items():
+        papers = data["papers"]
+        total_citations = sum(len(citing_papers) for citing_papers in papers.values())
+        details = author_details.get(data["authorId"]) or {"paper_count": 0}
+        sorted_citation_data.append((
+            author,
+            data["authorId"],
+            total_citations,
+            dict(papers),
+            details["paper_count"],
+        ))
+
+    print(f"Found {len(sorted_citation_data)} citing authors ({len(coauthors)} coauthors)")
     sorted_citation_data.sort(key=lambda item: item[2], reverse=True)
     return sorted_citation_data, citation_years
 
@@ -189,7 +203,9 @@ if __name__ == "__main__":
         description="Find authors who have cited your work the most using PyS2"
     )
     parser.add_argument(
+        "--author-id",
         "--author_id",
+        dest="author_id",
         help=(
             "The author ID to search for. "
             "If not provided, the script will prompt for input."
@@ -197,17 +213,70 @@ if __name__ == "__main__":
         default=None,
     )
     parser.add_argument(
+        "--s2-api-key",
         "--s2_api_key",
+        dest="s2_api_key",
         type=str,
         default=None,
         help="An API key for semantic scholar if you have one.",
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of concurrent API requests (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--max-rps",
+        dest="max_rps",
+        type=float,
+        default=DEFAULT_MAX_RPS,
+        help=f"Maximum requests per second shared by all workers (default: {DEFAULT_MAX_RPS}).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=(
+            f"Directory for cached API responses (default: {DEFAULT_CACHE_DIR}). "
+            "Interrupted runs resume from it. Pass an empty string to disable caching."
+        ),
+    )
+    parser.add_argument(
+        "--cache-ttl-days",
+        dest="cache_ttl_days",
+        type=float,
+        default=DEFAULT_CACHE_TTL_DAYS,
+        help=f"Refetch cached responses older than this many days, 0 to never expire (default: {DEFAULT_CACHE_TTL_DAYS}).",
+    )
+
+    parser.add_argument(
+        "--bulk-index",
+        dest="bulk_index",
+        type=str,
+        default=None,
+        help=(
+            "Answer all lookups from a local index of Semantic Scholar Datasets dumps "
+            "(built with meritpath-worker-service/app/lib/s2_bulk.py) instead of the API."
+        ),
+    )
+
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     s2_api_key = args.s2_api_key
-    session = Session()
-    if s2_api_key:
-        session.headers.update({"x-api-key": s2_api_key})
+    if args.bulk_index:
+        source = CachedCitationSource(BulkCitationSource(args.bulk_index))
+    else:
+        session = Session()
+        # One pooled connection per worker
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(1, args.workers)))
+        source = CachedCitationSource(
+            S2CitationSource(session, api_key=s2_api_key, rate_limiter=RateLimiter(args.max_rps)),
+            cache_dir=args.cache_dir or None,
+            ttl_days=args.cache_ttl_days,
+        )
 
     if args.author_id is None:
         author_id = input("Enter the author ID: ")
@@ -216,7 +285,7 @@ if __name__ == "__main__":
 
     try:
         author_name = get_author_name(author_id)
-        sorted_citation_data, citation_years = find_my_citers(author_id)
+        sorted_citation_data, citation_years = find_my_citers(author_id, args.workers)
         csv_filename = export_citation_data(sorted_citation_data, author_name)
         plot_filename = plot_citation_trends(citation_years, author_name)
 
@@ -23,6 +23,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every request for the /metrics endpoint
+from app.lib.metrics import observe_requests
+from app.lib.tracing import setup_tracing, shutdown_tracing, trace_requests
+observe_requests(app)
+trace_requests(app)
+
 
 
 # Root route
@@ -37,6 +43,7 @@ from app.api.routes.jobs import router as jobs_router
 from app.api.routes.user_routes import router as user_router
 from app.api.routes.paper_routes import router as paper_router
 from app.api.routes.citation_routes import router as citation_router
+from app.api.routes.metrics import router as metrics_router
 
 # Include routers from different modules
 app.include_router(hello_router, prefix="/api/hello", tags=["hello"])
@@ -44,4 +51,19 @@ app.include_router(sqs_router, prefix="/api/sqs", tags=["sqs"])
 app.include_router(jobs_router, prefix="/api/jobs", tags=["jobs"])
 app.include_router(user_router, prefix="/api/users", tags=["users"])
 app.include_router(paper_router, prefix="/api/papers", tags=["papers"])
-app.include_router(citation_router, prefix="/api/citations", tags=["citations"])
\ No newline at end of file
+app.include_router(citation_router, prefix="/api/citations", tags=["citations"])
+app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
+
+from app.lib.supabase import close_supabase
+
+@app.on_event("startup")
+async def startup_event():
+    # Export traces if OTEL_EXPORTER_OTLP_ENDPOINT or TRACE_FILE is set
+    setup_tracing("meritpath-backend")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release pooled database connections
+    await close_supabase()
+    # Flush buffered spans
+    shutdown_tracing()
\ No newline at end of file
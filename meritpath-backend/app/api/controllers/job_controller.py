@@ -1,21 +1,23 @@
 import logging
-from app.lib.supabase import supabase
+from app.lib.supabase import get_supabase, execute
+from app.lib.result_store import decode_result_blob, read_result_file
 
 logger = logging.getLogger(__name__)
 
 class JobController:
-    async def get_job_result(self, job_id, user_id=None):
+    async def get_job_result(self, job_id, user_id=None, full=False):
         """
-        Get job result from Supabase
+        Get job result from Supabase. Large results are stored compacted, and
+        only their summary is returned unless full is set.
         """
         try:
-            query = supabase.table("job_results").select("*").eq("job_id", job_id)
+            query = get_supabase().table("job_results").select("*").eq("job_id", job_id).order("created_at", desc=True).limit(1)
             
             # If user_id is provided, filter by user_id as well
             if user_id:
                 query = query.eq("user_id", user_id)
                 
-            response = query.execute()
+            response = await execute(query)
             
             if hasattr(response, 'error') and response.error:
                 logger.error(f"Error retrieving job result: {response.error}")
@@ -24,10 +26,41 @@ class JobController:
             data = response.data
             
             if not data:
+                # Long-running jobs (e.g. migrate_user_citer_papers) report progress before they have a result
+                job_response = await execute(get_supabase().table("jobs").select("status, progress").eq("id", job_id))
+                job = job_response.data[0] if job_response.data else {}
+                if job.get("progress"):
+                    return {
+                        "status": "not_found",
+                        "message": "Job result not found",
+                        "job_status": job.get("status"),
+                        "progress": job["progress"],
+                    }
                 return {"status": "not_found", "message": "Job result not found"}
             
             # Return the most recent result if there are multiple entries
-            return {"status": "success", "result": data[0]}
+            row = data[0]
+            if row.get("storage", "inline") != "inline":
+                if full:
+                    row["result"] = await self._load_full_result(row)
+                if row.get("result") is None:
+                    row["result"] = row.get("summary")
+                    row["truncated"] = True
+            return {"status": "success", "result": row}
         except Exception as e:
             logger.error(f"Exception retrieving job result: {str(e)}")
-            return {"status": "error", "message": f"Error retrieving job result: {str(e)}"} 
\ No newline at end of file
+            return {"status": "error", "message": f"Error retrieving job result: {str(e)}"} 
+    
+    async def _load_full_result(self, row):
+        """
+        Fetch a compacted result from where the worker stored it, or None if it is unavailable
+        """
+        if row.get("storage") == "file":
+            return read_result_file(row.get("location"))
+        if row.get("storage") == "blob":
+            response = await execute(
+                get_supabase().table("job_result_blobs").select("encoding, payload").eq("job_result_id", row["id"])
+            )
+            if response.data:
+                return decode_result_blob(response.data[0]["encoding"], response.data[0]["payload"])
+        return None
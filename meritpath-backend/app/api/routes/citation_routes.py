@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
 from app.middleware.auth import get_current_user
-from app.lib.supabase import supabase
+from app.lib.supabase import get_supabase, execute
+from app.lib import projections
+from app.api.services.citation_graph_service import CitationGraphService
 import logging
 
 # Set up logging
@@ -8,6 +11,9 @@ logger = logging.getLogger(__name__)
 
 # Create router
 router = APIRouter()
+citation_graph_service = CitationGraphService()
+
+MAX_PAPER_IDS = 500
 
 @router.get("/{paper_id}/citers")
 async def get_citation_users(
@@ -16,36 +22,69 @@ async def get_citation_users(
 ):
     """
     Get all users who have cited a specific paper
+    
+    Each citer appears once, with the number of its papers citing this paper
     """
     try:
-        # Find all citations where this paper is cited
-        citation_results = supabase.table("citations").select("id").eq("citing_paper_id", paper_id).execute()
-        print(citation_results)
-        
-        if not citation_results.data:
-            return {"citers": []}
-        
-        # Extract the citation IDs
-        citation_ids = [item["id"] for item in citation_results.data]
-        
-        # Find all citers who have cited this paper using the citation_ids
-        # TODO: citers appear multiple times in the citer_citations table?
-        citer_citations = supabase.table("citer_citations").select("citer_id").in_("citation_id", citation_ids).execute()
+        citers = await citation_graph_service.get_paper_citers(paper_id)
+        return {"citers": citers}
         
-        if not citer_citations.data:
-            return {"citers": []}
-        
-        # Extract citer_ids
-        citer_ids = [item["citer_id"] for item in citer_citations.data]
+    except Exception as e:
+        logger.error(f"Error getting citation users: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve citation users: {str(e)}")
+
+@router.get("/{paper_id}/citers/second-degree")
+async def get_second_degree_citers(
+    paper_id: str,
+    max_depth: int = Query(2, ge=2, le=4, description="Longest citation chain to follow"),
+    current_user=Depends(get_current_user)
+):
+    """
+    Get citers who reach a paper through a chain of citations rather than citing it directly
+    """
+    try:
+        citers = await citation_graph_service.get_second_degree_citers(paper_id, max_depth)
+        return {"citers": citers}
         
-        # Lookup details for each citer in the citers table
-        citers = supabase.table("citers").select("*").in_("id", citer_ids).execute()
+    except Exception as e:
+        logger.error(f"Error getting second-degree citers: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve second-degree citers: {str(e)}")
+
+@router.get("/citing-papers")
+async def get_citing_papers(
+    paper_ids: List[str] = Query(..., description="Cited paper IDs"),
+    current_user=Depends(get_current_user)
+):
+    """
+    Get all papers citing any of the given papers, each listed once
+    """
+    if len(paper_ids) > MAX_PAPER_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAPER_IDS} paper IDs can be queried at once")
+    
+    try:
+        papers = await citation_graph_service.get_citing_papers(paper_ids)
+        return {"papers": papers}
         
-        return {"citers": citers.data}
+    except Exception as e:
+        logger.error(f"Error getting citing papers: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve citing papers: {str(e)}")
+
+@router.get("/shared-citers")
+async def get_shared_citers(
+    user_id: str = Query(..., description="First user ID"),
+    other_user_id: str = Query(..., description="Second user ID"),
+    current_user=Depends(get_current_user)
+):
+    """
+    Get citers who have cited both users
+    """
+    try:
+        citers = await citation_graph_service.get_shared_citers(user_id, other_user_id)
+        return {"citers": citers}
         
     except Exception as e:
-        logger.error(f"Error getting citation users: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve citation users: {str(e)}")
+        logger.error(f"Error getting shared citers: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve shared citers: {str(e)}")
 
 @router.get("/{paper_id}/details")
 async def get_citation_details(
@@ -57,7 +96,7 @@ async def get_citation_details(
     """
     try:
         # Get paper details
-        paper_response = supabase.table("papers").select("*").eq("id", paper_id).execute()
+        paper_response = await execute(get_supabase().table("papers").select(projections.PAPER_DETAIL).eq("id", paper_id))
         
         if not paper_response.data:
             raise HTTPException(status_code=404, detail="Paper not found")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Path, Depends
+from fastapi import APIRouter, Path, Query, Depends
 from app.api.controllers.job_controller import JobController
 from app.middleware.auth import get_current_user
 
@@ -11,12 +11,14 @@ job_controller = JobController()
 @router.get("/{job_id}", include_in_schema=True)
 async def get_job_result(
     job_id: str = Path(..., description="Job ID"),
+    full: bool = Query(False, description="Return the full result instead of the summary of a large one"),
     current_user=Depends(get_current_user)  # Add authentication dependency
 ):
     """
-    Get job result by job ID
+    Get job result by job ID. Large results come back as their summary
+    (with "truncated": true) unless full=true.
     """
     # You could add authorization logic here if needed
     # For example, check if the job belongs to the current user
     
-    return await job_controller.get_job_result(job_id) 
\ No newline at end of file
+    return await job_controller.get_job_result(job_id, full=full) 
\ No newline at end of file
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from app.lib import metrics
+
+router = APIRouter(
+    prefix="",
+    tags=["metrics"]
+)
+
+@router.get("", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return metrics.render()
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.middleware.auth import get_current_user
-from app.lib.supabase import supabase
+from app.lib.supabase import get_supabase, execute
+from app.lib import projections
 import logging
 
 # Set up logging
@@ -21,7 +22,7 @@ async def get_paper_citations(
     """
     try:
         # Check if the paper exists
-        paper_response = supabase.table("papers").select("*").eq("id", paper_id).execute()
+        paper_response = await execute(get_supabase().table("papers").select(projections.EXISTS).eq("id", paper_id).limit(1))
         
         if hasattr(paper_response, 'error') and paper_response.error:
             logger.error(f"Error retrieving paper: {paper_response.error}")
@@ -31,7 +32,7 @@ async def get_paper_citations(
             raise HTTPException(status_code=404, detail="Paper not found")
         
         # Query citations table for all citations where this paper is cited
-        citations_response = supabase.table("citations").select("citing_paper_id").eq("cited_paper_id", paper_id).execute()
+        citations_response = await execute(get_supabase().table("citations").select(projections.CITATION_CITING_IDS).eq("cited_paper_id", paper_id))
         
         if hasattr(citations_response, 'error') and citations_response.error:
             logger.error(f"Error retrieving citations: {citations_response.error}")
@@ -54,7 +55,7 @@ async def get_paper_citations(
             batch_ids = citing_paper_ids[i:i+BATCH_SIZE]
             
             # Get paper details from papers table for this batch
-            papers_response = supabase.table("papers").select("*").in_("id", batch_ids).execute()
+            papers_response = await execute(get_supabase().table("papers").select(projections.PAPER_LIST).in_("id", batch_ids))
             
             if hasattr(papers_response, 'error') and papers_response.error:
                 logger.error(f"Error retrieving citing paper details batch {i//BATCH_SIZE}: {papers_response.error}")
@@ -99,7 +100,7 @@ async def get_paper_details(
     """
     try:
         # Get paper details from papers table
-        paper_response = supabase.table("papers").select("*").eq("id", paper_id).execute()
+        paper_response = await execute(get_supabase().table("papers").select(projections.PAPER_DETAIL).eq("id", paper_id))
         
         if hasattr(paper_response, 'error') and paper_response.error:
             logger.error(f"Error retrieving paper details: {paper_response.error}")
@@ -113,7 +114,7 @@ async def get_paper_details(
         paper = paper_data[0]
         
         # Get citation count for this paper
-        citations_response = supabase.table("citations").select("id", count="exact").eq("cited_paper_id", paper_id).execute()
+        citations_response = await execute(get_supabase().table("citations").select(projections.EXISTS, count="exact", head=True).eq("cited_paper_id", paper_id))
         
         if hasattr(citations_response, 'error') and citations_response.error:
             logger.error(f"Error retrieving citation count: {citations_response.error}")
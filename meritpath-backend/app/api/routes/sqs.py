@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query, Body, Path, Depends
+from fastapi import APIRouter, Query, Body, Path, Depends, HTTPException
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from app.api.controllers.sqs_controller import SQSController
@@ -43,10 +43,37 @@ async def send_job(
         }
     }
     ```
+    
+    Or, for several users (e.g. a research group) crawled in one pass:
+    ```json
+    {
+        "job_type": "find_citers_batch",
+        "job_params": {
+            "user_ids": ["xxx", "yyy"]
+        }
+    }
+    ```
+    
+    Or, to convert the authenticated user's legacy user_citers.papers blobs
+    (user_id must be the authenticated user; the whole table is only migrated
+    by operators sending the job to the queue directly):
+    ```json
+    {
+        "job_type": "migrate_user_citer_papers",
+        "job_params": {
+            "user_id": "xxx",
+            "batch_size": 500
+        }
+    }
+    ```
     """
     if job_request.job_params is None:
         job_request.job_params = {}
     
+    # The migration rewrites user_citers rows, so users may only run it on their own
+    if job_request.job_type == "migrate_user_citer_papers" and job_request.job_params.get("user_id") != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to migrate another user's citers")
+    
     job_request.job_params["authenticated_user_id"] = current_user["id"]
     
     result = await sqs_controller.send_job(
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
 from app.middleware.auth import get_current_user
-from app.lib.supabase import supabase
+from app.lib.supabase import get_supabase, execute
+from app.lib import projections
+from app.api.services.export_service import CiterExportService, MEDIA_TYPES as EXPORT_MEDIA_TYPES
 from pydantic import BaseModel
 import logging
+import asyncio
 import argparse
 from collections import defaultdict, Counter
 import csv
@@ -46,14 +50,18 @@ class SemanticScholarIdUpdate(BaseModel):
 
 # Create router
 router = APIRouter(prefix="", tags=["users"])
+export_service = CiterExportService()
 
 @router.get("/{user_id}")
 async def get_user_by_id(
     user_id: str, 
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    include_papers: bool = Query(True, description="Include the user's papers JSON")
 ):
     """
     Get a user's information by ID (authenticated endpoint)
+    
+    Set include_papers=false to skip the papers JSON when only the profile is needed
     """
     try:
         # Optional: Add authorization check if needed
@@ -61,7 +69,8 @@ async def get_user_by_id(
         #     raise HTTPException(status_code=403, detail="Not authorized to access this user's information")
         
         # Query Supabase for the user
-        response = supabase.table("users").select("*").eq("id", user_id).execute()
+        columns = projections.USER_DETAIL if include_papers else projections.USER_SUMMARY
+        response = await execute(get_supabase().table("users").select(columns).eq("id", user_id))
         
         if hasattr(response, 'error') and response.error:
             logger.error(f"Error retrieving user: {response.error}")
@@ -103,7 +112,8 @@ async def update_semantic_scholar_id(
         
         # Update the user record
         session = Session()
-        author_details = get_author_details(data.semantic_scholar_id, session)
+        # Run the blocking Semantic Scholar call off the event loop
+        author_details = await asyncio.to_thread(get_author_details, data.semantic_scholar_id, session)
         
         # Convert S2AuthorPaper objects to dictionaries
         papers_json = []
@@ -115,13 +125,13 @@ async def update_semantic_scholar_id(
                 "year": paper.year
             })
         
-        response = supabase.table("users").update({
+        response = await execute(get_supabase().table("users").update({
             "semantic_scholar_id": data.semantic_scholar_id,
             "name": author_details.name,
             "influential_citation_count": author_details.influentialCitationCount,
             "author_paper_count": len(author_details.papers),
             "papers": papers_json,  # Use the converted list of dictionaries
-        }).eq("id", user_id).execute()
+        }).eq("id", user_id))
         
         if hasattr(response, 'error') and response.error:
             logger.error(f"Error updating semantic scholar ID: {response.error}")
@@ -153,7 +163,7 @@ async def get_user_papers(
     """
     try:
         # Query user_papers table for papers of this user
-        user_papers_response = supabase.table("user_papers").select("*").eq("user_id", user_id).execute()
+        user_papers_response = await execute(get_supabase().table("user_papers").select(projections.USER_PAPER_IDS).eq("user_id", user_id))
         
         if hasattr(user_papers_response, 'error') and user_papers_response.error:
             logger.error(f"Error retrieving user papers: {user_papers_response.error}")
@@ -176,7 +186,7 @@ async def get_user_papers(
             batch_ids = paper_ids[i:i+BATCH_SIZE]
             
             # Get paper details from papers table for this batch
-            papers_response = supabase.table("papers").select("*").in_("id", batch_ids).execute()
+            papers_response = await execute(get_supabase().table("papers").select(projections.PAPER_LIST).in_("id", batch_ids))
             
             if hasattr(papers_response, 'error') and papers_response.error:
                 logger.error(f"Error retrieving paper details batch {i//BATCH_SIZE}: {papers_response.error}")
@@ -195,7 +205,7 @@ async def get_user_papers(
             batch_ids = paper_ids[i:i+BATCH_SIZE]
             
             # Get citations for this batch of papers
-            citations_response = supabase.table("citations").select("cited_paper_id").in_("cited_paper_id", batch_ids).execute()
+            citations_response = await execute(get_supabase().table("citations").select(projections.CITATION_CITED_IDS).in_("cited_paper_id", batch_ids))
             
             if hasattr(citations_response, 'error') and citations_response.error:
                 logger.error(f"Error retrieving citations for batch {i//BATCH_SIZE}: {citations_response.error}")
@@ -250,8 +260,15 @@ async def check_job_done(
         # if current_user["id"] != user_id:
         #     raise HTTPException(status_code=403, detail="Not authorized to check this user's eligibility")
         
-        # Query Supabase for successful find_citers jobs for this user
-        response = supabase.table("jobs").select("*").eq("user_id", user_id).eq("job_type", "find_citers").eq("status", "success").execute()
+        # Probe for a single successful find_citers job for this user
+        response = await execute(
+            get_supabase().table("jobs")
+            .select(projections.EXISTS)
+            .eq("user_id", user_id)
+            .eq("job_type", "find_citers")
+            .eq("status", "success")
+            .limit(1)
+        )
         
         if hasattr(response, 'error') and response.error:
             logger.error(f"Error checking job eligibility: {response.error}")
@@ -279,12 +296,12 @@ async def get_user_citers(
     """
     Get all citers associated with a user (authenticated endpoint)
     
-    Returns a list of citers with their details including citer_id, papers,
+    Returns a list of citers with their details including citer_id,
     total_citations, citer_name, and paper_count
     """
     try:
         # Query user_citers table for this user
-        user_citers_response = supabase.table("user_citers").select("*").eq("user_id", user_id).execute()
+        user_citers_response = await execute(get_supabase().table("user_citers").select(projections.USER_CITER_LIST).eq("user_id", user_id))
         
         if hasattr(user_citers_response, 'error') and user_citers_response.error:
             logger.error(f"Error retrieving user citers: {user_citers_response.error}")
@@ -310,7 +327,7 @@ async def get_user_citers(
             batch_ids = citer_ids[i:i+BATCH_SIZE]
             
             # Get citer details from citers table for this batch
-            citers_response = supabase.table("citers").select("*").in_("id", batch_ids).execute()
+            citers_response = await execute(get_supabase().table("citers").select(projections.CITER_LIST).in_("id", batch_ids))
             
             if hasattr(citers_response, 'error') and citers_response.error:
                 logger.error(f"Error retrieving citer details batch {i//BATCH_SIZE}: {citers_response.error}")
@@ -337,7 +354,9 @@ async def get_user_citers(
                             "selected": user_citer.get("selected", False),
                             "cited_papers_count": int(user_citer.get("cited_papers_count", 0)),
                             "citing_papers_count": int(user_citer.get("citing_papers_count", 0)),
-                            "independent": user_citer.get("independent", True)
+                            "independent": user_citer.get("independent", True),
+                            "independence_level": user_citer.get("independence_level", "independent"),
+                            "score": float(user_citer.get("score") or 0)
                         }
                         formatted_citers.append(formatted_citer)
                     except (ValueError, TypeError) as e:
@@ -353,10 +372,147 @@ async def get_user_citers(
         logger.error(f"Exception retrieving user citers: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving user citers: {str(e)}")
 
+@router.get("/{user_id}/citation-trends")
+async def get_citation_trends(
+    user_id: str,
+    current_user=Depends(get_current_user),
+    paper_id: Optional[str] = Query(None, description="Only citations of this paper"),
+    top_citers: int = Query(3, ge=0, le=20, description="Citers citing most per year (whole-user series only)")
+):
+    """
+    Get citations per year with a running total, from the aggregates the find_citers job stores
+    
+    Without paper_id each year also lists the citers who cited the user most that year
+    """
+    try:
+        trends_response = await execute(get_supabase().rpc("user_citation_trends", {
+            "p_user_id": user_id,
+            "p_paper_id": paper_id,
+            "p_top_citers": top_citers
+        }))
+        
+        if hasattr(trends_response, 'error') and trends_response.error:
+            logger.error(f"Error retrieving citation trends: {trends_response.error}")
+            raise HTTPException(status_code=500, detail="Failed to retrieve citation trends")
+        
+        years = [
+            {
+                "year": int(row["year"]),
+                "citations": int(row["citations"]),
+                "cumulative": int(row["cumulative"]),
+                "top_citers": row.get("top_citers") or []
+            }
+            for row in trends_response.data or []
+        ]
+        
+        return {
+            "user_id": user_id,
+            "paper_id": paper_id,
+            "total_citations": years[-1]["cumulative"] if years else 0,
+            "years": years
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Exception retrieving citation trends: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving citation trends: {str(e)}")
+
+@router.get("/{user_id}/citers/top")
+async def get_top_citers(
+    user_id: str,
+    current_user=Depends(get_current_user),
+    k: int = Query(10, ge=1, le=100, description="Number of recommenders to return"),
+    independent_only: bool = Query(False, description="Skip citers who are coauthors")
+):
+    """
+    Get the user's k best recommender candidates by composite score
+    
+    Scores weigh citations, breadth, seniority, independence and recency, and are
+    stored by the find_citers job, so this reads the (user_id, score) index
+    """
+    try:
+        user_citers_query = get_supabase().table("user_citers")\
+            .select(projections.USER_CITER_LIST)\
+            .eq("user_id", user_id)
+        
+        if independent_only:
+            user_citers_query = user_citers_query.eq("independent", True)
+        
+        user_citers_response = await execute(user_citers_query.order("score", desc=True).limit(k))
+        
+        if hasattr(user_citers_response, 'error') and user_citers_response.error:
+            logger.error(f"Error retrieving top user citers: {user_citers_response.error}")
+            raise HTTPException(status_code=500, detail="Failed to retrieve top citers")
+        
+        user_citers_data = user_citers_response.data
+        
+        if not user_citers_data:
+            return []
+        
+        citers_response = await execute(get_supabase().table("citers")\
+            .select(projections.CITER_LIST)\
+            .in_("id", [item["citer_id"] for item in user_citers_data]))
+        
+        if hasattr(citers_response, 'error') and citers_response.error:
+            logger.error(f"Error retrieving citer details: {citers_response.error}")
+            raise HTTPException(status_code=500, detail="Failed to retrieve citer details")
+        
+        citers_dict = {citer["id"]: citer for citer in citers_response.data or []}
+        
+        top_citers = []
+        for user_citer in user_citers_data:
+            citer = citers_dict.get(user_citer["citer_id"])
+            if not citer:
+                continue
+            top_citers.append({
+                "citer_id": str(user_citer["citer_id"]),
+                "semantic_scholar_id": str(citer.get("semantic_scholar_id", "")),
+                "total_citations": int(user_citer.get("total_citations", 0)),
+                "citer_name": str(citer.get("citer_name", "")),
+                "paper_count": int(citer.get("paper_count", 0)),
+                "location": str(citer.get("location", "")),
+                "affiliations": str(citer.get("affiliations", "")),
+                "selected": user_citer.get("selected", False),
+                "cited_papers_count": int(user_citer.get("cited_papers_count", 0)),
+                "citing_papers_count": int(user_citer.get("citing_papers_count", 0)),
+                "independent": user_citer.get("independent", True),
+                "independence_level": user_citer.get("independence_level", "independent"),
+                "score": float(user_citer.get("score") or 0)
+            })
+        
+        return top_citers
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Exception retrieving top citers: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving top citers: {str(e)}")
+
+@router.get("/{user_id}/citers/export")
+async def export_user_citers(
+    user_id: str,
+    current_user=Depends(get_current_user),
+    format: str = Query("csv", regex="^(csv|ndjson|parquet)$", description="Export format")
+):
+    """
+    Export all citers of a user as a streamed CSV, NDJSON or Parquet file (authenticated endpoint)
+    
+    The CSV uses the same columns as the find_my_citers script
+    """
+    if current_user["id"] != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to export this user's citers")
+    
+    filename = f"{user_id}_detailed_citation_data.{format}"
+    return StreamingResponse(
+        export_service.stream(user_id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/{citer_id}/individual_citer")
 async def get_current_user_citer(
     citer_id: str,
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    include_papers: bool = Query(True, description="Include the cited/citing papers JSON")
 ):
     """
     Get information about a specific citer for the current authenticated user
@@ -367,11 +523,10 @@ async def get_current_user_citer(
         user_id = current_user["id"]
         
         # First check if this citer is associated with the current user
-        user_citer_response = supabase.table("user_citers")\
-            .select("*")\
+        user_citer_response = await execute(get_supabase().table("user_citers")\
+            .select(projections.USER_CITER_DETAIL)\
             .eq("user_id", user_id)\
-            .eq("citer_id", citer_id)\
-            .execute()
+            .eq("citer_id", citer_id))
         
         if hasattr(user_citer_response, 'error') and user_citer_response.error:
             logger.error(f"Error retrieving user citer relationship: {user_citer_response.error}")
@@ -385,11 +540,23 @@ async def get_current_user_citer(
         user_citer = user_citer_data[0]
         print(user_citer)
         
+        if include_papers:
+            # Nested {cited title: {paper_id, citations}} detail, built from user_citer_edges
+            papers_response = await execute(get_supabase().rpc(
+                "user_citer_papers",
+                {"p_user_id": user_id, "p_citer_ids": [citer_id]}
+            ))
+            
+            if hasattr(papers_response, 'error') and papers_response.error:
+                logger.error(f"Error retrieving citer papers: {papers_response.error}")
+                raise HTTPException(status_code=500, detail="Failed to retrieve citer papers")
+            
+            user_citer["papers"] = papers_response.data[0]["papers"] if papers_response.data else {}
+        
         # Get citer details from citers table
-        citer_response = supabase.table("citers")\
-            .select("*")\
-            .eq("id", citer_id)\
-            .execute()
+        citer_response = await execute(get_supabase().table("citers")\
+            .select(projections.CITER_DETAIL)\
+            .eq("id", citer_id))
         
         if hasattr(citer_response, 'error') and citer_response.error:
             logger.error(f"Error retrieving citer details: {citer_response.error}")
@@ -408,7 +575,7 @@ async def get_current_user_citer(
         result = {
             "citer_id": citer_id,
             "semantic_scholar_id": citer["semantic_scholar_id"],
-            "papers": user_citer["papers"],
+            "papers": user_citer.get("papers"),
             "total_citations": user_citer["total_citations"],
             "citer_name": citer["citer_name"],
             "location": citer["location"],
@@ -417,7 +584,8 @@ async def get_current_user_citer(
             "selected": user_citer["selected"],
             "cited_papers_count": user_citer["cited_papers_count"],
             "citing_papers_count": user_citer["citing_papers_count"],
-            "independent": user_citer["independent"]
+            "independent": user_citer["independent"],
+            "independence_level": user_citer.get("independence_level", "independent")
         }
         
         return result
@@ -439,10 +607,10 @@ async def get_user_citers_advanced(
     
     # Search parameters
     search: Optional[str] = Query(None, max_length=100, description="Search term"),
-    search_field: str = Query("citer_name", description="Field to search in"),
+    search_field: str = Query("citer_name", description="Field to search in, or 'all'"),
     
     # Sorting parameters
-    sort_by: str = Query("total_citations", description="Field to sort by"),
+    sort_by: Optional[str] = Query(None, description="Field to sort by (defaults to relevance when searching, else total_citations)"),
     sort_order: str = Query("desc", regex="^(asc|desc)$", description="Sort direction"),
     
     # Filtering parameters
@@ -456,20 +624,29 @@ async def get_user_citers_advanced(
     """
     Get all citers associated with a user with advanced filtering, sorting, and pagination
     
-    Supports comprehensive search, filtering, and sorting capabilities for citers
+    Supports comprehensive search, filtering, and sorting capabilities for citers.
+    Searches are ranked server-side across all of the user's citers with prefix
+    matching and typo tolerance (see the search_user_citers SQL function).
     """
     try:
         # Validate sort field
         VALID_SORT_FIELDS = [
             'citer_name', 'paper_count', 'total_citations', 
-            'cited_papers_count', 'citing_papers_count', 'independent'
+            'cited_papers_count', 'citing_papers_count', 'independent',
+            # Composite recommender score stored by the find_citers job
+            'score'
         ]
+        if search:
+            VALID_SORT_FIELDS.append('relevance')
+        
+        if sort_by is None:
+            sort_by = 'relevance' if search else 'total_citations'
         
         if sort_by not in VALID_SORT_FIELDS:
             raise HTTPException(status_code=400, detail=f"Invalid sort field. Must be one of: {VALID_SORT_FIELDS}")
         
         # Validate search field
-        VALID_SEARCH_FIELDS = ['citer_name', 'location', 'affiliations']
+        VALID_SEARCH_FIELDS = ['citer_name', 'location', 'affiliations', 'all']
         if search_field not in VALID_SEARCH_FIELDS:
             raise HTTPException(status_code=400, detail=f"Invalid search field. Must be one of: {VALID_SEARCH_FIELDS}")
         
@@ -481,135 +658,190 @@ async def get_user_citers_advanced(
             start = (page - 1) * limit
             current_page = page
         
-        # Step 1: Build query for user_citers table (filters that apply to user_citers)
-        user_citers_query = supabase.table("user_citers").select("*").eq("user_id", user_id)
-        
-        # Apply filters to user_citers table
-        if independent is not None:
-            user_citers_query = user_citers_query.eq("independent", independent)
-        
-        if min_citations is not None:
-            user_citers_query = user_citers_query.gte("total_citations", min_citations)
-        
-        if max_citations is not None:
-            user_citers_query = user_citers_query.lte("total_citations", max_citations)
-        
-        # Get all user_citers that match the user_citers filters
-        user_citers_response = user_citers_query.execute()
-        
-        if hasattr(user_citers_response, 'error') and user_citers_response.error:
-            logger.error(f"Error retrieving user citers: {user_citers_response.error}")
-            raise HTTPException(status_code=500, detail="Failed to retrieve user citers")
-        
-        user_citers_data = user_citers_response.data
+        end = start + limit
         
-        if not user_citers_data:
-            return {
-                "citers": [],
-                "pagination": {
-                    "currentPage": current_page,
-                    "totalPages": 0,
-                    "totalCount": 0,
-                    "pageSize": limit,
-                    "hasNext": False,
-                    "hasPrev": False
-                },
-                "sorting": {
-                    "sortBy": sort_by,
-                    "sortOrder": sort_order
-                }
+        if search:
+            # Rank the user's whole citer set in one call (full-text prefix match + trigram similarity)
+            search_params = {
+                "p_user_id": user_id,
+                "p_query": search,
+                "p_field": search_field,
+                "p_independent": independent,
+                "p_min_citations": min_citations,
+                "p_max_citations": max_citations,
+                "p_min_papers": min_papers,
+                "p_max_papers": max_papers,
+                "p_location": location,
+                "p_sort_by": sort_by,
+                "p_sort_order": sort_order,
+                "p_limit": limit,
+                "p_offset": start
             }
-        
-        # Get citer IDs from filtered user_citers
-        citer_ids = [item["citer_id"] for item in user_citers_data]
-        user_citers_dict = {item["citer_id"]: item for item in user_citers_data}
-        
-        logger.info(f"Processing {len(citer_ids)} citer IDs for user {user_id}")
-        
-        # Step 2: Process citers in batches to avoid URI length limits
-        BATCH_SIZE = 50  # Reduced batch size to avoid URI length issues
-        combined_citers = []
-        
-        for i in range(0, len(citer_ids), BATCH_SIZE):
-            batch_ids = citer_ids[i:i+BATCH_SIZE]
+            search_response = await execute(get_supabase().rpc("search_user_citers", search_params))
             
-            try:
-                # Build query for this batch of citers
-                citers_query = supabase.table("citers").select("*").in_("id", batch_ids)
-                
-                # Apply filters to citers table
-                if min_papers is not None:
-                    citers_query = citers_query.gte("paper_count", min_papers)
-                
-                if max_papers is not None:
-                    citers_query = citers_query.lte("paper_count", max_papers)
-                
-                # Apply search filters to citers table
-                if search and search_field in ['citer_name', 'location', 'affiliations']:
-                    citers_query = citers_query.ilike(search_field, f"%{search}%")
-                
-                if location and search_field != 'location':  # Avoid duplicate location filter
-                    citers_query = citers_query.ilike("location", f"%{location}%")
-                
-                # Apply sorting for citer table fields at database level
-                if sort_by in ['citer_name', 'paper_count']:
-                    ascending = sort_order == 'asc'
-                    citers_query = citers_query.order(sort_by, desc=not ascending)
-                
-                # Get filtered citers for this batch
-                citers_response = citers_query.execute()
-                
-                if hasattr(citers_response, 'error') and citers_response.error:
-                    logger.error(f"Error retrieving citer details batch {i//BATCH_SIZE}: {citers_response.error}")
-                    continue  # Skip this batch but continue with others
-                
-                citers_data = citers_response.data
+            search_data = search_response.data or []
+            if search_data:
+                total_count = int(search_data[0]["total_count"])
+            elif start > 0:
+                # Past the last match no rows carry total_count, so count from the first page
+                count_response = await execute(get_supabase().rpc(
+                    "search_user_citers", {**search_params, "p_limit": 1, "p_offset": 0}
+                ))
+                total_count = int(count_response.data[0]["total_count"]) if count_response.data else 0
+            else:
+                total_count = 0
+            paginated_citers = []
+            
+            for row in search_data:
+                try:
+                    paginated_citers.append({
+                        "citer_id": str(row["citer_id"]),
+                        "semantic_scholar_id": str(row.get("semantic_scholar_id", "")),
+                        "total_citations": int(row.get("total_citations", 0)),
+                        "citer_name": str(row.get("citer_name", "")),
+                        "paper_count": int(row.get("paper_count", 0)),
+                        "location": str(row.get("location", "")),
+                        "affiliations": str(row.get("affiliations", "")),
+                        "selected": row.get("selected", False),
+                        "cited_papers_count": int(row.get("cited_papers_count", 0)),
+                        "citing_papers_count": int(row.get("citing_papers_count", 0)),
+                        "independent": row.get("independent", True),
+                        "independence_level": row.get("independence_level", "independent"),
+                        "score": float(row.get("score") or 0),
+                        "relevance": float(row.get("relevance", 0))
+                    })
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Skipping citer {row.get('citer_id')} due to data conversion error: {str(e)}")
+                    continue
+        else:
+            # Step 1: Build query for user_citers table (filters that apply to user_citers)
+            user_citers_query = get_supabase().table("user_citers").select(projections.USER_CITER_LIST).eq("user_id", user_id)
+            
+            # Apply filters to user_citers table
+            if independent is not None:
+                user_citers_query = user_citers_query.eq("independent", independent)
+            
+            if min_citations is not None:
+                user_citers_query = user_citers_query.gte("total_citations", min_citations)
+            
+            if max_citations is not None:
+                user_citers_query = user_citers_query.lte("total_citations", max_citations)
+            
+            # Get all user_citers that match the user_citers filters
+            user_citers_response = await execute(user_citers_query)
+            
+            if hasattr(user_citers_response, 'error') and user_citers_response.error:
+                logger.error(f"Error retrieving user citers: {user_citers_response.error}")
+                raise HTTPException(status_code=500, detail="Failed to retrieve user citers")
+            
+            user_citers_data = user_citers_response.data
+            
+            if not user_citers_data:
+                return {
+                    "citers": [],
+                    "pagination": {
+                        "currentPage": current_page,
+                        "totalPages": 0,
+                        "totalCount": 0,
+                        "pageSize": limit,
+                        "hasNext": False,
+                        "hasPrev": False
+                    },
+                    "sorting": {
+                        "sortBy": sort_by,
+                        "sortOrder": sort_order
+                    }
+                }
+            
+            # Get citer IDs from filtered user_citers
+            citer_ids = [item["citer_id"] for item in user_citers_data]
+            user_citers_dict = {item["citer_id"]: item for item in user_citers_data}
+            
+            logger.info(f"Processing {len(citer_ids)} citer IDs for user {user_id}")
+            
+            # Step 2: Process citers in batches to avoid URI length limits
+            BATCH_SIZE = 50  # Reduced batch size to avoid URI length issues
+            combined_citers = []
+            
+            for i in range(0, len(citer_ids), BATCH_SIZE):
+                batch_ids = citer_ids[i:i+BATCH_SIZE]
                 
-                # Process this batch of citers
-                for citer in citers_data:
-                    citer_id = citer["id"]
-                    user_citer = user_citers_dict.get(citer_id)
+                try:
+                    # Build query for this batch of citers
+                    citers_query = get_supabase().table("citers").select(projections.CITER_LIST).in_("id", batch_ids)
                     
-                    if user_citer:
-                        try:
-                            formatted_citer = {
-                                "citer_id": str(citer_id),
-                                "semantic_scholar_id": str(citer.get("semantic_scholar_id", "")),
-                                "total_citations": int(user_citer.get("total_citations", 0)),
-                                "citer_name": str(citer.get("citer_name", "")),
-                                "paper_count": int(citer.get("paper_count", 0)),
-                                "location": str(citer.get("location", "")),
-                                "affiliations": str(citer.get("affiliations", "")),
-                                "selected": user_citer.get("selected", False),
-                                "cited_papers_count": int(user_citer.get("cited_papers_count", 0)),
-                                "citing_papers_count": int(user_citer.get("citing_papers_count", 0)),
-                                "independent": user_citer.get("independent", True)
-                            }
-                            combined_citers.append(formatted_citer)
-                        except (ValueError, TypeError) as e:
-                            logger.warning(f"Skipping citer {citer_id} due to data conversion error: {str(e)}")
-                            continue
-                            
-            except Exception as e:
-                logger.error(f"Error processing batch {i//BATCH_SIZE}: {str(e)}")
-                continue  # Skip this batch but continue with others
-        
-        # Step 3: Apply sorting for user_citers fields (in-memory sorting)
-        if sort_by in ['total_citations', 'cited_papers_count', 'citing_papers_count', 'independent']:
-            reverse = sort_order == 'desc'
-            if sort_by == 'total_citations':
-                combined_citers.sort(key=lambda x: x['total_citations'], reverse=reverse)
-            elif sort_by == 'cited_papers_count':
-                combined_citers.sort(key=lambda x: x['cited_papers_count'], reverse=reverse)
-            elif sort_by == 'citing_papers_count':
-                combined_citers.sort(key=lambda x: x['citing_papers_count'], reverse=reverse)
-            elif sort_by == 'independent':
-                combined_citers.sort(key=lambda x: x['independent'], reverse=reverse)
-        
-        # Step 4: Apply pagination to the final combined results
-        total_count = len(combined_citers)
-        end = start + limit
-        paginated_citers = combined_citers[start:end]
+                    # Apply filters to citers table
+                    if min_papers is not None:
+                        citers_query = citers_query.gte("paper_count", min_papers)
+                    
+                    if max_papers is not None:
+                        citers_query = citers_query.lte("paper_count", max_papers)
+                    
+                    if location:
+                        citers_query = citers_query.ilike("location", f"%{location}%")
+                    
+                    # Apply sorting for citer table fields at database level
+                    if sort_by in ['citer_name', 'paper_count']:
+                        ascending = sort_order == 'asc'
+                        citers_query = citers_query.order(sort_by, desc=not ascending)
+                    
+                    # Get filtered citers for this batch
+                    citers_response = await execute(citers_query)
+                    
+                    if hasattr(citers_response, 'error') and citers_response.error:
+                        logger.error(f"Error retrieving citer details batch {i//BATCH_SIZE}: {citers_response.error}")
+                        continue  # Skip this batch but continue with others
+                    
+                    citers_data = citers_response.data
+                    
+                    # Process this batch of citers
+                    for citer in citers_data:
+                        citer_id = citer["id"]
+                        user_citer = user_citers_dict.get(citer_id)
+                        
+                        if user_citer:
+                            try:
+                                formatted_citer = {
+                                    "citer_id": str(citer_id),
+                                    "semantic_scholar_id": str(citer.get("semantic_scholar_id", "")),
+                                    "total_citations": int(user_citer.get("total_citations", 0)),
+                                    "citer_name": str(citer.get("citer_name", "")),
+                                    "paper_count": int(citer.get("paper_count", 0)),
+                                    "location": str(citer.get("location", "")),
+                                    "affiliations": str(citer.get("affiliations", "")),
+                                    "selected": user_citer.get("selected", False),
+                                    "cited_papers_count": int(user_citer.get("cited_papers_count", 0)),
+                                    "citing_papers_count": int(user_citer.get("citing_papers_count", 0)),
+                                    "independent": user_citer.get("independent", True),
+                                    "independence_level": user_citer.get("independence_level", "independent"),
+                                    "score": float(user_citer.get("score") or 0)
+                                }
+                                combined_citers.append(formatted_citer)
+                            except (ValueError, TypeError) as e:
+                                logger.warning(f"Skipping citer {citer_id} due to data conversion error: {str(e)}")
+                                continue
+                                
+                except Exception as e:
+                    logger.error(f"Error processing batch {i//BATCH_SIZE}: {str(e)}")
+                    continue  # Skip this batch but continue with others
+            
+            # Step 3: Apply sorting for user_citers fields (in-memory sorting)
+            if sort_by in ['total_citations', 'cited_papers_count', 'citing_papers_count', 'independent', 'score']:
+                reverse = sort_order == 'desc'
+                if sort_by == 'total_citations':
+                    combined_citers.sort(key=lambda x: x['total_citations'], reverse=reverse)
+                elif sort_by == 'cited_papers_count':
+                    combined_citers.sort(key=lambda x: x['cited_papers_count'], reverse=reverse)
+                elif sort_by == 'citing_papers_count':
+                    combined_citers.sort(key=lambda x: x['citing_papers_count'], reverse=reverse)
+                elif sort_by == 'independent':
+                    combined_citers.sort(key=lambda x: x['independent'], reverse=reverse)
+                elif sort_by == 'score':
+                    combined_citers.sort(key=lambda x: x['score'], reverse=reverse)
+            
+            # Step 4: Apply pagination to the final combined results
+            total_count = len(combined_citers)
+            paginated_citers = combined_citers[start:end]
         
         # Calculate pagination info
         total_pages = (total_count + limit - 1) // limit if total_count > 0 else 0
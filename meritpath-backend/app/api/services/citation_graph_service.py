@@ -0,0 +1,46 @@
+import logging
+from app.lib.supabase import get_supabase, execute
+
+logger = logging.getLogger(__name__)
+
+class CitationGraphService:
+    """
+    Citation-graph lookups. Each method is one round trip to a SQL function
+    (see supabase/migrations/*_citation_graph.sql) that returns deduplicated rows.
+    """
+    async def get_paper_citers(self, paper_id):
+        """
+        Get the distinct citers of a paper
+        """
+        response = await execute(get_supabase().rpc("citers_of_paper", {"p_paper_id": paper_id}))
+        return response.data or []
+
+    async def get_citing_papers(self, paper_ids):
+        """
+        Get the distinct papers citing any of the given papers
+        """
+        if not paper_ids:
+            return []
+
+        response = await execute(get_supabase().rpc("papers_citing", {"p_paper_ids": list(paper_ids)}))
+        return response.data or []
+
+    async def get_second_degree_citers(self, paper_id, max_depth=2):
+        """
+        Get citers reached through chains of citations, excluding direct citers
+        """
+        response = await execute(get_supabase().rpc("second_degree_citers", {
+            "p_paper_id": paper_id,
+            "p_max_depth": max_depth
+        }))
+        return response.data or []
+
+    async def get_shared_citers(self, user_a_id, user_b_id):
+        """
+        Get the citers who cite both users
+        """
+        response = await execute(get_supabase().rpc("shared_citers", {
+            "p_user_a": user_a_id,
+            "p_user_b": user_b_id
+        }))
+        return response.data or []
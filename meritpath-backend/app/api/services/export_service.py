@@ -0,0 +1,207 @@
+import io
+import csv
+import json
+import logging
+from app.lib.supabase import get_supabase, execute
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 500
+
+# Same columns as eb1_scripts/find_my_citers/detailed_citations.py:export_citation_data
+CSV_COLUMNS = [
+    "Rank", "Citing Author", "Author ID", "Total Citations", "Author Paper Count",
+    "Cited Papers and Citing Papers"
+]
+
+EXPORT_COLUMNS = (
+    "id, citer_id, total_citations, cited_papers_count, citing_papers_count, selected, independent, independence_level, "
+    "citers(semantic_scholar_id, citer_name, paper_count, location, affiliations)"
+)
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _cited_to_citing_titles(papers):
+    """
+    Convert a user_citers.papers blob to the script's {cited title: [citing titles]} shape
+    """
+    if not isinstance(papers, dict):
+        return {}
+
+    converted = {}
+    for cited_title, paper_data in papers.items():
+        if isinstance(paper_data, list):
+            # Legacy format already maps titles to titles
+            converted[cited_title] = list(paper_data)
+        else:
+            converted[cited_title] = [citation.get("title") for citation in paper_data.get("citations", [])]
+    return converted
+
+
+class CiterExportService:
+    """
+    Streams a user's full citer dataset. Rows are read with keyset pagination
+    ordered by total_citations, so memory use does not grow with the number of citers.
+    """
+    async def _fetch_papers(self, user_id, citer_ids):
+        """
+        Build the nested papers detail of a chunk of citers from user_citer_edges in one call
+        """
+        if not citer_ids:
+            return {}
+        response = await execute(get_supabase().rpc(
+            "user_citer_papers",
+            {"p_user_id": user_id, "p_citer_ids": citer_ids}
+        ))
+        return {row["citer_id"]: row["papers"] for row in response.data or []}
+
+    async def iter_rows(self, user_id, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Yield flattened user_citers + citers rows, most cited first
+        """
+        last = None
+
+        while True:
+            query = get_supabase().table("user_citers")\
+                .select(EXPORT_COLUMNS)\
+                .eq("user_id", user_id)
+
+            if last is not None:
+                # Continue after the last (total_citations desc, id asc) key
+                query = query.or_(
+                    f"total_citations.lt.{last['total_citations']},"
+                    f"and(total_citations.eq.{last['total_citations']},id.gt.{last['id']})"
+                )
+
+            response = await execute(query.order("total_citations", desc=True).order("id").limit(chunk_size))
+            chunk = response.data or []
+            papers_by_citer = await self._fetch_papers(user_id, [row.get("citer_id") for row in chunk])
+
+            for row in chunk:
+                citer = row.get("citers") or {}
+                yield {
+                    "citer_id": row.get("citer_id"),
+                    "semantic_scholar_id": citer.get("semantic_scholar_id"),
+                    "citer_name": citer.get("citer_name"),
+                    "paper_count": citer.get("paper_count") or 0,
+                    "location": citer.get("location"),
+                    "affiliations": citer.get("affiliations"),
+                    "total_citations": row.get("total_citations") or 0,
+                    "cited_papers_count": row.get("cited_papers_count") or 0,
+                    "citing_papers_count": row.get("citing_papers_count") or 0,
+                    "selected": row.get("selected", False),
+                    "independent": row.get("independent", True),
+                    "independence_level": row.get("independence_level", "independent"),
+                    "papers": papers_by_citer.get(row.get("citer_id")) or {},
+                }
+
+            if len(chunk) < chunk_size:
+                break
+            last = {"total_citations": chunk[-1].get("total_citations") or 0, "id": chunk[-1]["id"]}
+
+    async def stream_csv(self, user_id):
+        """
+        Stream the export in the eb1 script's CSV layout
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+
+        rank = 0
+        async for row in self.iter_rows(user_id):
+            rank += 1
+            writer.writerow([
+                rank,
+                row["citer_name"],
+                row["semantic_scholar_id"],
+                row["total_citations"],
+                row["paper_count"],
+                json.dumps(_cited_to_citing_titles(row["papers"])),
+            ])
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    async def stream_ndjson(self, user_id):
+        """
+        Stream one JSON object per citer
+        """
+        async for row in self.iter_rows(user_id):
+            yield json.dumps(row) + "\n"
+
+    async def stream_parquet(self, user_id, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Stream a Parquet file, writing one row group per chunk
+        """
+        # Only the Parquet export needs pyarrow
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("rank", pa.int64()),
+            ("citer_id", pa.string()),
+            ("semantic_scholar_id", pa.string()),
+            ("citer_name", pa.string()),
+            ("paper_count", pa.int64()),
+            ("location", pa.string()),
+            ("affiliations", pa.string()),
+            ("total_citations", pa.int64()),
+            ("cited_papers_count", pa.int64()),
+            ("citing_papers_count", pa.int64()),
+            ("selected", pa.bool_()),
+            ("independent", pa.bool_()),
+            ("independence_level", pa.string()),
+            ("papers", pa.string()),
+        ])
+
+        sink = io.BytesIO()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        batch = []
+        rank = 0
+
+        def drain():
+            data = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return data
+
+        def write_batch():
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            batch.clear()
+
+        async for row in self.iter_rows(user_id, chunk_size):
+            rank += 1
+            batch.append({
+                **row,
+                "rank": rank,
+                "affiliations": None if row["affiliations"] is None else str(row["affiliations"]),
+                "papers": json.dumps(row["papers"]),
+            })
+            if len(batch) >= chunk_size:
+                write_batch()
+                yield drain()
+
+        if batch:
+            write_batch()
+        writer.close()
+        yield drain()
+
+    def stream(self, user_id, export_format):
+        """
+        Get the byte/text stream for an export format
+        """
+        if export_format == "csv":
+            return self.stream_csv(user_id)
+        if export_format == "ndjson":
+            return self.stream_ndjson(user_id)
+        if export_format == "parquet":
+            return self.stream_parquet(user_id)
+        raise ValueError(f"Unsupported export format: {export_format}")
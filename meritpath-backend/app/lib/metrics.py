@@ -0,0 +1,102 @@
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from fastapi import Response
+
+# Buckets for Supabase calls (seconds)
+CALL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_DURATION = Histogram(
+    "meritpath_http_request_duration_seconds",
+    "HTTP request duration by route template",
+    ["method", "route", "status"],
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "meritpath_external_call_duration_seconds",
+    "Duration of each attempt of an external call",
+    ["kind", "name"],
+    buckets=CALL_BUCKETS,
+)
+EXTERNAL_CALL_FAILURES = Counter(
+    "meritpath_external_call_failures_total",
+    "Failed attempts of external calls",
+    ["kind", "name"],
+)
+RETRIES = Counter("meritpath_retries_total", "Retries of failed external calls", ["kind"])
+RETRY_SLEEP = Counter("meritpath_retry_sleep_seconds_total", "Time spent backing off before retries", ["kind"])
+CACHE_HITS = Counter("meritpath_cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("meritpath_cache_misses_total", "Cache misses", ["cache"])
+CACHE_HIT_RATIO = Gauge("meritpath_cache_hit_ratio", "Cache hits over lookups since start", ["cache"])
+
+_cache_totals = {}  # cache -> [hits, misses]
+
+
+def query_operation(query):
+    """
+    Name a PostgREST request builder as "<table>.<operation>", e.g. "citers.select"
+    """
+    path = str(getattr(query, "path", "")).strip("/")
+    method = getattr(query, "http_method", "")
+    if path.startswith("rpc/"):
+        return f"rpc.{path[len('rpc/'):]}"
+    prefer = str(getattr(query, "headers", {}).get("prefer", ""))
+    operation = {
+        "GET": "select",
+        "HEAD": "count",
+        "POST": "upsert" if "merge-duplicates" in prefer else "insert",
+        "PATCH": "update",
+        "DELETE": "delete",
+    }.get(method, method.lower() or "unknown")
+    return f"{path or 'unknown'}.{operation}"
+
+
+def record_call(kind, name, seconds, error=False):
+    """
+    Observe one attempt of an external call
+    """
+    EXTERNAL_CALL_DURATION.labels(kind, name).observe(seconds)
+    if error:
+        EXTERNAL_CALL_FAILURES.labels(kind, name).inc()
+
+
+def record_retry(kind, sleep_seconds):
+    RETRIES.labels(kind).inc()
+    RETRY_SLEEP.labels(kind).inc(sleep_seconds)
+
+
+def record_cache(cache, hits=0, misses=0):
+    """
+    Add cache lookups and refresh the cache's hit ratio
+    """
+    CACHE_HITS.labels(cache).inc(hits)
+    CACHE_MISSES.labels(cache).inc(misses)
+    totals = _cache_totals.setdefault(cache, [0, 0])
+    totals[0] += hits
+    totals[1] += misses
+    lookups = totals[0] + totals[1]
+    CACHE_HIT_RATIO.labels(cache).set(totals[0] / lookups if lookups else 0)
+
+
+def observe_requests(app):
+    """
+    Time every request, labelled by route template so path parameters don't explode cardinality
+    """
+    @app.middleware("http")
+    async def time_request(request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            REQUEST_DURATION.labels(
+                request.method, getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - started)
+
+
+def render():
+    """
+    Render the registry in the Prometheus text format
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
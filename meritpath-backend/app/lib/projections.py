@@ -0,0 +1,32 @@
+"""
+Column projections for backend queries.
+
+Each endpoint selects only the columns it actually formats into its response.
+The JSONB `users.papers` column is only part of the detail projection, so list
+endpoints never pull it over the wire. A citer's cited/citing papers live in
+user_citer_edges and are built on demand by the user_citer_papers function.
+"""
+
+# users
+USER_SUMMARY = "id, semantic_scholar_id, name, influential_citation_count, author_paper_count"
+USER_DETAIL = "*"  # full profile, including the users.papers JSON
+
+# user_citers
+USER_CITER_LIST = "citer_id, total_citations, selected, cited_papers_count, citing_papers_count, independent, independence_level, score"
+USER_CITER_DETAIL = USER_CITER_LIST
+
+# citers
+CITER_LIST = "id, semantic_scholar_id, citer_name, paper_count, location, affiliations"
+CITER_DETAIL = CITER_LIST
+
+# papers
+PAPER_LIST = "id, semantic_scholar_id, title, year, created_at"
+PAPER_DETAIL = f"{PAPER_LIST}, updated_at"
+
+# link tables
+USER_PAPER_IDS = "paper_id"
+CITATION_CITING_IDS = "citing_paper_id"
+CITATION_CITED_IDS = "cited_paper_id"
+
+# existence probes only need a key
+EXISTS = "id"
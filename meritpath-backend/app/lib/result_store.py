@@ -0,0 +1,32 @@
+import os
+import gzip
+import json
+import base64
+
+# Where the worker spills large job results when it runs with RESULT_STORE_DIR (a shared volume)
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR")
+
+
+def decode_result_blob(encoding, payload):
+    """
+    Decode a job_result_blobs payload: gzip+base64 from the worker, or plain
+    JSON text for results moved there by the job_result_storage migration
+    """
+    if encoding == "gzip+base64":
+        return json.loads(gzip.decompress(base64.b64decode(payload)).decode("utf-8"))
+    return json.loads(payload)
+
+
+def read_result_file(location, store_dir=RESULT_STORE_DIR):
+    """
+    Read a result the worker wrote under RESULT_STORE_DIR, or None if it isn't reachable from here
+    """
+    if not store_dir or not location:
+        return None
+    # Locations are plain file names; never follow one out of the store
+    path = os.path.join(store_dir, os.path.basename(location))
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
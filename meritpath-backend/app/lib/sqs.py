@@ -3,6 +3,8 @@ import json
 import logging
 import boto3
 from dotenv import load_dotenv
+from opentelemetry.trace import SpanKind
+from app.lib import tracing
 
 # Load environment variables
 load_dotenv()
@@ -39,10 +41,13 @@ class SQSClient:
                 'MessageBody': message_body
             }
             
-            if message_attributes:
-                message_params['MessageAttributes'] = message_attributes
-                
-            response = self.sqs.send_message(**message_params)
+            with tracing.tracer.start_as_current_span("sqs send", kind=SpanKind.PRODUCER):
+                # Carry the trace context to the worker in the message attributes
+                message_attributes = tracing.inject_message_attributes(message_attributes)
+                if message_attributes:
+                    message_params['MessageAttributes'] = message_attributes
+                    
+                response = self.sqs.send_message(**message_params)
             message_id = response.get('MessageId')
             
             if message_id:
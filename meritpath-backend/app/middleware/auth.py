@@ -3,7 +3,11 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from jwt.exceptions import InvalidTokenError
 import os
+import time
+import hashlib
+from collections import OrderedDict
 from dotenv import load_dotenv
+from app.lib import metrics
 
 # Load environment variables
 load_dotenv()
@@ -13,31 +17,107 @@ JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
 if not JWT_SECRET:
     raise ValueError("Missing SUPABASE_JWT_SECRET environment variable")
 
+# Maximum number of verified tokens kept in memory (0 disables the cache)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 1024))
+
 # Security scheme for Swagger UI
 security = HTTPBearer()
 
+class VerifiedTokenCache:
+    """
+    LRU cache of verified token payloads keyed by the SHA-256 of the token.
+    An entry is only served until the token's own exp claim, so expiry is
+    enforced exactly as jwt.decode would. Tokens without exp are never cached.
+    """
+    def __init__(self, max_size=AUTH_TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token):
+        """
+        Get the cached payload for a token, or None if it is unknown or expired
+        """
+        key = self._key(token)
+        entry = self.entries.get(key)
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        payload, expires_at = entry
+        if time.time() >= expires_at:
+            del self.entries[key]
+            self.misses += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return payload
+    
+    def put(self, token, payload):
+        """
+        Cache a payload that has just been verified
+        """
+        expires_at = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        
+        key = self._key(token)
+        self.entries[key] = (payload, expires_at)
+        self.entries.move_to_end(key)
+        
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+    
+    def clear(self):
+        self.entries.clear()
+
+token_cache = VerifiedTokenCache()
+
+def decode_token(token):
+    """
+    Decode and verify a Supabase JWT (signature and time-based claims)
+    """
+    # Decode and verify the token with options to handle Supabase's JWT format
+    return jwt.decode(
+        token, 
+        JWT_SECRET, 
+        algorithms=["HS256"],
+        options={
+            "verify_aud": False,  # Skip audience verification
+            "verify_signature": True  # Still verify the signature
+        }
+    )
+
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Verify the JWT token from Supabase
+    
+    Tokens verified earlier are served from token_cache until they expire
     """
     token = credentials.credentials
-    try:
-        # Decode and verify the token with options to handle Supabase's JWT format
-        payload = jwt.decode(
-            token, 
-            JWT_SECRET, 
-            algorithms=["HS256"],
-            options={
-                "verify_aud": False,  # Skip audience verification
-                "verify_signature": True  # Still verify the signature
-            }
-        )
+    
+    payload = token_cache.get(token)
+    metrics.record_cache("auth_token", hits=int(payload is not None), misses=int(payload is None))
+    if payload is not None:
         return payload
+    
+    try:
+        payload = decode_token(token)
     except InvalidTokenError as e:
         raise HTTPException(
             status_code=401,
             detail=f"Invalid authentication token: {str(e)}"
         )
+    
+    token_cache.put(token, payload)
+    return payload
 
 async def get_current_user(payload=Depends(verify_token)):
     """
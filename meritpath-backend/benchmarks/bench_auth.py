@@ -0,0 +1,77 @@
+"""
+Benchmark per-request authentication overhead of verify_token.
+
+Compares a full HS256 decode on every request with the verified-token cache,
+for a dashboard-like mix where each user's token is reused by several calls.
+
+Usage (from meritpath-backend/):
+    python -m benchmarks.bench_auth --requests 20000 --users 50
+"""
+import os
+import time
+import asyncio
+import argparse
+
+# Local defaults so the app package can be imported without a .env file
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "local-benchmark-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "local-benchmark-secret-0123456789abcdef")
+
+import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+from app.middleware import auth
+
+
+def mint_tokens(count):
+    """Mint Supabase-style tokens signed with the local secret."""
+    now = int(time.time())
+    return [
+        jwt.encode(
+            {"sub": f"user-{i}", "email": f"user{i}@example.com", "aud": "authenticated", "iat": now, "exp": now + 3600},
+            auth.JWT_SECRET,
+            algorithm="HS256",
+        )
+        for i in range(count)
+    ]
+
+
+async def run(tokens, requests, cache_size):
+    auth.token_cache.max_size = cache_size
+    auth.token_cache.clear()
+    auth.token_cache.hits = auth.token_cache.misses = 0
+
+    credentials = [HTTPAuthorizationCredentials(scheme="Bearer", credentials=token) for token in tokens]
+    start = time.perf_counter()
+    for i in range(requests):
+        await auth.verify_token(credentials[i % len(credentials)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "cache_size": cache_size,
+        "requests": requests,
+        "total_seconds": round(elapsed, 4),
+        "us_per_request": round(elapsed / requests * 1e6, 2),
+        "cache_hits": auth.token_cache.hits,
+        "cache_misses": auth.token_cache.misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request JWT verification overhead")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=50, help="Distinct tokens in the request mix")
+    parser.add_argument("--cache-size", type=int, default=auth.AUTH_TOKEN_CACHE_SIZE)
+    args = parser.parse_args()
+
+    tokens = mint_tokens(args.users)
+    uncached = asyncio.run(run(tokens, args.requests, 0))
+    cached = asyncio.run(run(tokens, args.requests, args.cache_size))
+
+    for label, result in (("decode every request", uncached), ("verified-token cache", cached)):
+        print(f"{label:>22}: {result['us_per_request']:>8} us/request "
+              f"({result['requests']} requests, hits={result['cache_hits']}, misses={result['cache_misses']})")
+    print(f"{'speedup':>22}: {uncached['us_per_request'] / max(cached['us_per_request'], 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""
+Load test for the backend's hot read endpoints.
+
+Seeds the in-memory PostgREST stand-in (meritpath-worker-service/benchmarks/fake_postgrest.py) with
+N users x M citers x K citations, mints JWTs with the local secret and drives a
+concurrent request mix through the FastAPI app in-process. Reports p50/p95/p99
+latency, throughput and DB queries per request, overall and per endpoint, as JSON.
+
+Usage (from meritpath-backend/):
+    python -m benchmarks.load_test --users 20 --citers 500 --citations 2000 --requests 2000 --concurrency 16
+    python -m benchmarks.load_test --mix citers_advanced=3,citers_search=1 --db-latency-ms 2
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import contextvars
+from collections import defaultdict, Counter
+
+# Local defaults so the app package can be imported without a .env file
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "local-benchmark-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "local-benchmark-secret-0123456789abcdef")
+os.environ.setdefault("SQS_TASK_QUEUE_URL", "http://localhost/tasks")
+os.environ.setdefault("SQS_RESULTS_QUEUE_URL", "http://localhost/results")
+
+import jwt
+import httpx
+from postgrest import AsyncPostgrestClient
+from app import app
+from app.lib import supabase as supabase_lib
+from app.middleware import auth
+
+# The PostgREST stand-in is maintained once, with the worker's find_citers benchmark
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "meritpath-worker-service", "benchmarks"))
+from fake_postgrest import FakePostgrest
+
+FIRST_NAMES = ["Ana", "Bo", "Chen", "Dana", "Eli", "Fatima", "Goro", "Hana", "Ivan", "Jun", "Kofi", "Lena", "Mina", "Noah", "Omar", "Priya"]
+LAST_NAMES = ["Neubig", "Smith", "Wang", "Garcia", "Kim", "Okafor", "Rossi", "Tanaka", "Ivanova", "Haddad", "Novak", "Singh", "Muller", "Silva"]
+LOCATIONS = ["Pittsburgh, USA", "Beijing, China", "Paris, France", "Tokyo, Japan", "Toronto, Canada", "Berlin, Germany", None]
+AFFILIATIONS = ["Carnegie Mellon University", "Tsinghua University", "INRIA", "University of Tokyo", "University of Toronto", "Google", "Meta AI", None]
+
+# Endpoint name -> weight in the default mix
+DEFAULT_MIX = {
+    "citers_advanced": 4,
+    "citers_search": 2,
+    "papers": 2,
+    "citers": 1,
+    "paper_citations": 2,
+}
+
+# DB round trips made while serving the current request
+_db_queries = contextvars.ContextVar("db_queries", default=None)
+
+
+def seed(fake, users, citers_per_user, citations_per_user, papers_per_user, rng):
+    """
+    Fill the stand-in with users, their papers, a shared citer pool and citations.
+    Returns {user_id: {"papers": [...], "citer_names": [...]}} for building requests.
+    """
+    pool_size = max(citers_per_user, users * citers_per_user // 2)  # citers are shared between users
+    citers = []
+    for i in range(pool_size):
+        citers.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "semantic_scholar_id": str(100000 + i),
+            "citer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "paper_count": rng.randint(1, 300),
+            "location": rng.choice(LOCATIONS),
+            "affiliations": rng.choice(AFFILIATIONS),
+        })
+    fake.seed("citers", citers)
+
+    fixtures = {}
+    for u in range(users):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        fake.seed("users", [{"id": user_id, "email": f"user{u}@example.com", "semantic_scholar_id": str(u + 1)}])
+
+        user_papers = [
+            {"id": str(uuid.UUID(int=rng.getrandbits(128))), "semantic_scholar_id": f"u{u}p{p}",
+             "title": f"User {u} paper {p}", "year": rng.randint(2010, 2024)}
+            for p in range(papers_per_user)
+        ]
+        fake.seed("papers", user_papers)
+        fake.seed("user_papers", [{"user_id": user_id, "paper_id": paper["id"]} for paper in user_papers])
+
+        user_citers = rng.sample(citers, citers_per_user)
+        totals = Counter()
+        cited_by_citer = defaultdict(set)
+        citing_by_citer = defaultdict(set)
+        citing_papers, citations, citer_citations = [], [], []
+        for c in range(citations_per_user):
+            cited = rng.choice(user_papers)
+            citing = {"id": str(uuid.UUID(int=rng.getrandbits(128))), "semantic_scholar_id": f"u{u}c{c}",
+                      "title": f"Citing paper {u}-{c}", "year": rng.randint(2012, 2025)}
+            citation = {"id": str(uuid.UUID(int=rng.getrandbits(128))), "cited_paper_id": cited["id"], "citing_paper_id": citing["id"]}
+            citing_papers.append(citing)
+            citations.append(citation)
+            for citer in rng.sample(user_citers, min(len(user_citers), rng.randint(1, 3))):
+                citer_citations.append({"citer_id": citer["id"], "citation_id": citation["id"]})
+                totals[citer["id"]] += 1
+                cited_by_citer[citer["id"]].add(cited["id"])
+                citing_by_citer[citer["id"]].add(citing["id"])
+        fake.seed("papers", citing_papers)
+        fake.seed("citations", citations)
+        fake.seed("citer_citations", citer_citations)
+        independent = {citer["id"]: rng.random() > 0.2 for citer in user_citers}
+        fake.seed("user_citers", [
+            {
+                "user_id": user_id,
+                "citer_id": citer["id"],
+                "total_citations": totals[citer["id"]],
+                "cited_papers_count": len(cited_by_citer[citer["id"]]),
+                "citing_papers_count": len(citing_by_citer[citer["id"]]),
+                "selected": False,
+                "independent": independent[citer["id"]],
+                "independence_level": "independent" if independent[citer["id"]] else "coauthor",
+                "papers": {},
+            }
+            for citer in user_citers
+        ])
+        fixtures[user_id] = {
+            "papers": [paper["id"] for paper in user_papers],
+            "citer_names": [citer["citer_name"] for citer in user_citers],
+        }
+    return fixtures
+
+
+def search_user_citers(fake, p_user_id, p_query, p_field="all", p_independent=None, p_min_citations=None,
+                       p_max_citations=None, p_min_papers=None, p_max_papers=None, p_location=None,
+                       p_sort_by="relevance", p_sort_order="desc", p_limit=10, p_offset=0, **_):
+    """
+    Python stand-in for the search_user_citers SQL function: every query term must
+    prefix-match a word of the searched field
+    """
+    citers = fake._index("citers", "id")
+    terms = (p_query or "").lower().split()
+    rows = []
+    for user_citer in fake._index("user_citers", "user_id").get(p_user_id, []):
+        citer = citers[user_citer["citer_id"]][0]
+        fields = ["citer_name", "location", "affiliations"] if p_field == "all" else [p_field]
+        words = " ".join(str(citer.get(field) or "") for field in fields).lower().split()
+        if terms and not all(any(word.startswith(term) for word in words) for term in terms):
+            continue
+        if p_independent is not None and user_citer["independent"] != p_independent:
+            continue
+        if (p_min_citations is not None and user_citer["total_citations"] < p_min_citations) or \
+                (p_max_citations is not None and user_citer["total_citations"] > p_max_citations):
+            continue
+        if (p_min_papers is not None and citer["paper_count"] < p_min_papers) or \
+                (p_max_papers is not None and citer["paper_count"] > p_max_papers):
+            continue
+        if p_location and p_location.lower() not in str(citer.get("location") or "").lower():
+            continue
+        row = {key: citer.get(key) for key in ("semantic_scholar_id", "citer_name", "paper_count", "location", "affiliations")}
+        row.update({key: user_citer.get(key) for key in ("citer_id", "total_citations", "selected", "cited_papers_count", "citing_papers_count", "independent", "independence_level", "score")})
+        row["relevance"] = sum(1.0 for term in terms for word in words if word.startswith(term)) / max(len(words), 1)
+        rows.append(row)
+
+    rows.sort(key=lambda row: (row.get(p_sort_by) is None, row.get(p_sort_by) or 0), reverse=p_sort_order == "desc")
+    return [{**row, "total_count": len(rows)} for row in rows[p_offset:p_offset + p_limit]]
+
+
+def install_fake_postgrest(fake):
+    """
+    Point app.lib.supabase at the stand-in, counting round trips for the current request
+    """
+    async def handle(request):
+        counter = _db_queries.get()
+        if counter is not None:
+            counter[0] += 1
+        return await fake.handle(request)
+
+    def create_client():
+        return AsyncPostgrestClient(
+            f"{supabase_lib.SUPABASE_URL}/rest/v1",
+            headers={"apikey": supabase_lib.SUPABASE_KEY, "Authorization": f"Bearer {supabase_lib.SUPABASE_KEY}"},
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handle)),
+        )
+
+    supabase_lib._create_client = create_client
+
+
+def mint_token(user_id):
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": user_id, "email": f"{user_id}@example.com", "aud": "authenticated", "role": "authenticated",
+         "iat": now, "exp": now + 3600},
+        auth.JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+def build_plan(fixtures, mix, requests, rng):
+    """
+    Pre-generate (endpoint, path, user_id) so every run with the same seed sends the same requests
+    """
+    users = list(fixtures)
+    names, weights = zip(*mix.items())
+    plan = []
+    for _ in range(requests):
+        endpoint = rng.choices(names, weights)[0]
+        user_id = rng.choice(users)
+        if endpoint == "citers_advanced":
+            sort_by = rng.choice(["total_citations", "paper_count", "citer_name"])
+            path = f"/api/users/{user_id}/citers/advanced?page={rng.randint(1, 5)}&limit=20&sort_by={sort_by}"
+        elif endpoint == "citers_search":
+            name = rng.choice(fixtures[user_id]["citer_names"]).split()[rng.randint(0, 1)]
+            path = f"/api/users/{user_id}/citers/advanced?search={name[:rng.randint(min(3, len(name)), len(name))]}&search_field=all&limit=20"
+        elif endpoint == "papers":
+            path = f"/api/users/{user_id}/papers"
+        elif endpoint == "citers":
+            path = f"/api/users/{user_id}/citers"
+        elif endpoint == "paper_citations":
+            path = f"/api/papers/{rng.choice(fixtures[user_id]['papers'])}/citations"
+        else:
+            raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+        plan.append((endpoint, path, user_id))
+    return plan
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, duration):
+    latencies = sorted(sample["ms"] for sample in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample["status"] >= 400),
+        "throughput_rps": round(len(samples) / duration, 1) if duration else None,
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        "db_queries_per_request": round(sum(sample["db"] for sample in samples) / len(samples), 2) if samples else None,
+    }
+
+
+async def drive(plan, tokens, concurrency):
+    samples = []
+    queue = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest") as client:
+        async def worker():
+            while True:
+                try:
+                    endpoint, path, user_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                counter = [0]
+                _db_queries.set(counter)
+                start = time.perf_counter()
+                response = await client.get(path, headers={"Authorization": f"Bearer {tokens[user_id]}"})
+                samples.append({
+                    "endpoint": endpoint,
+                    "status": response.status_code,
+                    "ms": (time.perf_counter() - start) * 1000,
+                    "db": counter[0],
+                })
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - start
+
+    await supabase_lib.close_supabase()
+    return samples, duration
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown endpoints {sorted(unknown)}; choose from {sorted(DEFAULT_MIX)}")
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend's read endpoints against seeded data")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--citers", type=int, default=500, help="Citers per user")
+    parser.add_argument("--citations", type=int, default=2000, help="Citations per user")
+    parser.add_argument("--papers", type=int, default=30, help="Papers per user")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Weighted endpoints, e.g. citers_advanced=4,papers=1 (default: %(default)s)")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Simulated database round-trip latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(args.seed)
+
+    fake = FakePostgrest(latency=args.db_latency_ms / 1000)
+    fake.register_rpc("search_user_citers", search_user_citers)
+    install_fake_postgrest(fake)
+
+    seed_start = time.perf_counter()
+    fixtures = seed(fake, args.users, args.citers, args.citations, args.papers, rng)
+    seed_seconds = time.perf_counter() - seed_start
+    tokens = {user_id: mint_token(user_id) for user_id in fixtures}
+    plan = build_plan(fixtures, args.mix, args.requests, rng)
+
+    samples, duration = asyncio.run(drive(plan, tokens, args.concurrency))
+
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample["endpoint"]].append(sample)
+
+    report = {
+        "benchmark": "backend_load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "users": args.users,
+            "citers_per_user": args.citers,
+            "citations_per_user": args.citations,
+            "papers_per_user": args.papers,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "db_latency_ms": args.db_latency_ms,
+            "seed": args.seed,
+        },
+        "seed_seconds": round(seed_seconds, 2),
+        "rows": {table: len(rows) for table, rows in sorted(fake.tables.items())},
+        "overall": summarize(samples, duration),
+        "endpoints": {endpoint: summarize(items, duration) for endpoint, items in sorted(by_endpoint.items())},
+    }
+
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:>16}: p50 {stats['p50_ms']}ms p95 {stats['p95_ms']}ms p99 {stats['p99_ms']}ms, "
+              f"{stats['db_queries_per_request']} queries/request, {stats['errors']} errors", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every request for the /metrics endpoint
+from app.lib.metrics import observe_requests
+from app.lib.tracing import trace_requests
+observe_requests(app)
+trace_requests(app)
+
 # Root route
 @app.get("/")
 async def root():
@@ -33,21 +39,31 @@ async def root():
 from app.api.routes.hello import router as hello_router
 from app.api.routes.number_printer import router as number_printer_router
 from app.api.routes.find_citer import router as find_citer_router
+from app.api.routes.metrics import router as metrics_router
 
 # Include routers from different modules
 app.include_router(hello_router, prefix="/api/hello", tags=["hello"])
 app.include_router(number_printer_router, prefix="/api/number-printer", tags=["number_printer"])
 app.include_router(find_citer_router, prefix="/api/find_citer", tags=["find_citer"])
+app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
 
 # Background tasks
 from app.background_tasks import start_worker_service, stop_worker_service
+from app.lib.supabase import close_supabase
+from app.lib.tracing import setup_tracing, shutdown_tracing
 
 @app.on_event("startup")
 async def startup_event():
+    # Export traces if OTEL_EXPORTER_OTLP_ENDPOINT or TRACE_FILE is set
+    setup_tracing("meritpath-worker-service")
     # Start the worker service in the background
     asyncio.create_task(start_worker_service())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     # Stop the worker service
-    await stop_worker_service()
\ No newline at end of file
+    await stop_worker_service()
+    # Release pooled database connections
+    await close_supabase()
+    # Flush buffered spans
+    shutdown_tracing()
\ No newline at end of file
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from app.lib import metrics
+from app import background_tasks
+
+router = APIRouter(
+    prefix="",
+    tags=["metrics"]
+)
+
+@router.get("", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return metrics.render(background_tasks.worker_service)
@@ -0,0 +1,169 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from app.lib.supabase import get_supabase, execute
+from app.lib.sqs import SQSClient
+from app.lib.citation_source import create_citation_source
+from app.lib.refresh_window import RefreshWindow
+
+logger = logging.getLogger(__name__)
+
+# Scheduled refresh configuration. Refresh jobs are claimed in the jobs table
+# (claim_refresh_jobs), so the budget holds across every worker that enables it.
+CITATION_REFRESH_ENABLED = os.getenv("CITATION_REFRESH_ENABLED", "").lower() in ("1", "true", "yes")
+CITATION_REFRESH_INTERVAL_SECONDS = float(os.getenv("CITATION_REFRESH_INTERVAL_SECONDS", 900))
+# Off-peak window (UTC) refresh jobs are spread across
+CITATION_REFRESH_WINDOW = os.getenv("CITATION_REFRESH_WINDOW", "02:00-06:00")
+# Most refresh jobs enqueued per window
+CITATION_REFRESH_BUDGET = int(os.getenv("CITATION_REFRESH_BUDGET", 50))
+# A user is checked at most this often
+CITATION_REFRESH_MIN_AGE_HOURS = float(os.getenv("CITATION_REFRESH_MIN_AGE_HOURS", 24))
+# Users checked per tick, with one S2 author batch request per 1000
+CITATION_REFRESH_CHECK_BATCH = int(os.getenv("CITATION_REFRESH_CHECK_BATCH", 500))
+
+
+class CitationRefreshService:
+    """
+    Keeps citation data fresh without re-crawling everyone. Every tick inside
+    the off-peak window it checks the S2 author-level citation count of the
+    least recently checked users in one batched call, and enqueues find_citers
+    jobs only for users whose count differs from the one their last crawl
+    caught up with (recorded by the worker when a refresh job succeeds), never
+    more than the window's budget allows so far.
+    """
+    def __init__(self, window=CITATION_REFRESH_WINDOW, budget=CITATION_REFRESH_BUDGET,
+                 min_age_hours=CITATION_REFRESH_MIN_AGE_HOURS, check_batch=CITATION_REFRESH_CHECK_BATCH,
+                 sqs_client=None, citation_source_factory=create_citation_source):
+        self.window = RefreshWindow(window)
+        self.budget = budget
+        self.min_age = timedelta(hours=min_age_hours)
+        self.check_batch = check_batch
+        self.sqs_client = sqs_client or SQSClient()
+        self.citation_source_factory = citation_source_factory
+        self.running = False
+
+    async def run(self, interval=CITATION_REFRESH_INTERVAL_SECONDS):
+        """
+        Tick every interval seconds until stop() is called
+        """
+        self.running = True
+        logger.info(f"Citation refresh started: window {CITATION_REFRESH_WINDOW} UTC, budget {self.budget}")
+        while self.running:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Error in citation refresh tick: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def stop(self):
+        self.running = False
+
+    async def tick(self, now=None):
+        """
+        Check one batch of due users and enqueue refresh jobs for the changed ones
+        """
+        now = now or datetime.now(timezone.utc)
+        opened = self.window.opened_at(now)
+        if opened is None:
+            return {"status": "skipped", "reason": "outside window"}
+        allowed = self.window.allowance(now, self.budget)
+
+        users = await self._due_users(now)
+        if not users:
+            return {"status": "success", "checked": 0, "enqueued": 0}
+
+        # One batched S2 request per 1000 users; requests is blocking, so keep it off the loop
+        source = self.citation_source_factory()
+        counts = await asyncio.get_running_loop().run_in_executor(
+            None, source.get_author_citation_counts, [user["semantic_scholar_id"] for user in users]
+        )
+
+        checked = []
+        changed = []
+        for user in users:
+            count = counts.get(user["semantic_scholar_id"])
+            stored = user.get("s2_citation_count")
+            if count is not None and stored is not None and count != stored:
+                changed.append({"user_id": user["id"], "citations": count})
+            else:
+                # Unchanged, or the first check, which only records a baseline
+                checked.append({"user_id": user["id"], "citations": count})
+
+        # Users left unclaimed (already queued or over budget) stay unrecorded, so later ticks pick them up again
+        claimed = await self._claim_refresh_jobs(changed, opened, allowed) if changed else {}
+        enqueued = 0
+        for candidate in changed:
+            job_id = claimed.get(candidate["user_id"])
+            if job_id and await self._enqueue_refresh(job_id, candidate):
+                enqueued += 1
+                # The new count is recorded by the worker once the refresh succeeds; a null count only marks the check
+                checked.append({"user_id": candidate["user_id"], "citations": None})
+
+        await self._record_counts(checked, now)
+        logger.info(
+            f"Citation refresh checked {len(users)} users: {len(changed)} changed, "
+            f"{enqueued} jobs enqueued (budget {allowed}/{self.budget} so far this window)"
+        )
+        return {"status": "success", "checked": len(users), "changed": len(changed), "enqueued": enqueued}
+
+    async def _due_users(self, now):
+        """
+        The least recently checked users with an S2 ID that weren't checked within min_age
+        """
+        cutoff = (now - self.min_age).isoformat()
+        response = await execute(
+            get_supabase().table("users")
+            .select("id, semantic_scholar_id, s2_citation_count")
+            .not_.is_("semantic_scholar_id", "null")
+            .or_(f"citations_checked_at.is.null,citations_checked_at.lt.{cutoff}")
+            .order("citations_checked_at", nullsfirst=True)
+            .limit(self.check_batch)
+        )
+        if hasattr(response, 'error') and response.error:
+            logger.error(f"Error selecting users to refresh: {response.error}")
+            return []
+        return response.data or []
+
+    async def _claim_refresh_jobs(self, candidates, window_opened, allowed):
+        """
+        Create pending find_citers jobs for the candidates ({user_id, citations}),
+        in order, that have none queued or processing, up to what's left of the
+        window's budget. Returns {user_id: job_id}
+        """
+        response = await execute(get_supabase().rpc("claim_refresh_jobs", {
+            "p_candidates": candidates,
+            "p_window_start": window_opened.isoformat(),
+            "p_allowed": allowed
+        }))
+        if hasattr(response, 'error') and response.error:
+            logger.error(f"Error claiming refresh jobs: {response.error}")
+            return {}
+        return {row["user_id"]: row["job_id"] for row in response.data or []}
+
+    async def _enqueue_refresh(self, job_id, candidate):
+        """
+        Send the claimed job to the queue; the worker moves it from pending to processing.
+        If sending fails the job is deleted, so it neither blocks nor spends the budget
+        """
+        message_id = await self.sqs_client.send_message({
+            "job_id": job_id,
+            "job_type": "find_citers",
+            "job_params": {"user_id": candidate["user_id"], "trigger": "refresh", "citations": candidate["citations"]}
+        })
+        if message_id is not None:
+            return True
+        response = await execute(get_supabase().table("jobs").delete().eq("id", job_id).eq("status", "pending"))
+        if hasattr(response, 'error') and response.error:
+            logger.error(f"Error deleting unsent refresh job {job_id}: {response.error}")
+        return False
+
+    async def _record_counts(self, checked, now):
+        if not checked:
+            return
+        response = await execute(get_supabase().rpc("record_citation_counts", {
+            "p_counts": checked,
+            "p_checked_at": now.isoformat()
+        }))
+        if hasattr(response, 'error') and response.error:
+            logger.error(f"Error recording citation counts: {response.error}")
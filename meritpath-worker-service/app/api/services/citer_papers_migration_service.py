@@ -0,0 +1,62 @@
+import time
+import logging
+from app.lib.supabase import get_supabase, execute
+
+logger = logging.getLogger(__name__)
+
+# user_citers rows converted per migrate_legacy_user_citer_papers call
+MIGRATION_BATCH_SIZE = 500
+
+
+class CiterPapersMigrationService:
+    """
+    Converts the user_citers.papers blobs still in the legacy formats into
+    user_citer_edges, a batch per call to the migrate_legacy_user_citer_papers
+    function, which resolves every title in the batch with one join.
+    """
+    async def migrate(self, progress_callback=None, user_id=None, batch_size=MIGRATION_BATCH_SIZE):
+        """
+        Run batches until no legacy rows are left (optionally only user_id's).
+
+        Args:
+            progress_callback: Awaited with the running totals after every batch
+        """
+        started = time.perf_counter()
+        progress = {"batches": 0, "converted": 0, "edges": 0, "unresolved": 0, "remaining": None}
+        
+        try:
+            while True:
+                params = {"p_batch_size": batch_size}
+                if user_id:
+                    params["p_user_id"] = user_id
+                response = await execute(get_supabase().rpc("migrate_legacy_user_citer_papers", params))
+                
+                if hasattr(response, 'error') and response.error:
+                    logger.error(f"Error migrating user_citers papers: {response.error}")
+                    return {"status": "failed", "error": str(response.error), "progress": progress}
+                
+                batch = response.data[0] if response.data else {}
+                progress["batches"] += 1
+                for key in ("converted", "edges", "unresolved"):
+                    progress[key] += batch.get(key) or 0
+                progress["remaining"] = batch.get("remaining") or 0
+                
+                logger.info(
+                    f"Migrated batch {progress['batches']}: {batch.get('converted')} rows, "
+                    f"{batch.get('edges')} edges, {progress['remaining']} rows remaining"
+                )
+                if progress_callback is not None:
+                    await progress_callback(dict(progress))
+                
+                # Nothing converted means we're done, or the rest is locked by another migration job
+                if not batch.get("converted") or not progress["remaining"]:
+                    break
+            
+            return {
+                "status": "success",
+                **progress,
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        except Exception as e:
+            logger.error(f"Error migrating user_citers papers: {str(e)}")
+            return {"status": "failed", "error": str(e), "progress": progress}
@@ -1,64 +1,41 @@
 import logging
-from requests import Session
-import s2
-import time
-from requests.exceptions import HTTPError, RequestException
-from app.lib.supabase import supabase
+from app.lib.supabase import get_supabase, execute_sync
+from app.lib.coauthor_graph import CoauthorGraph, COAUTHOR
+from app.lib.citation_source import create_citation_source
+from app.lib.paper_id_map import PaperIdMap
+from app.lib.citer_score import score_weights
+from app.lib.instrumentation import JobProfile, current_profile, use_profile
+from app.lib import metrics, tracing
 from fastapi import APIRouter, HTTPException
+import time
 import asyncio
+import contextvars
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
-# Constants
-MAX_RETRIES = 3
-RETRY_DELAY = 5  # seconds
-
 # Create a router for API endpoints
 router = APIRouter()
 
 class FindCiterService:
-    def __init__(self):
-        self.supabase = supabase
-    
-    def api_call_with_retry(self, func, *args, **kwargs):
-        """Wrapper function to retry API calls with exponential backoff."""
-        for attempt in range(MAX_RETRIES):
-            try:
-                return func(*args, **kwargs)
-            except (HTTPError, RequestException) as e:
-                if attempt == MAX_RETRIES - 1:
-                    logger.error(f"Error after {MAX_RETRIES} attempts: {e}")
-                    return None
-                wait_time = RETRY_DELAY * (2 ** attempt)
-                logger.info(f"API Error: {e}. Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-    
-    def get_author_papers(self, author_id, session):
-        """Fetch papers for a given author ID from Semantic Scholar using PyS2."""
-        author_papers = self.api_call_with_retry(s2.api.get_author, authorId=author_id, session=session)
-        if author_papers:
-            return [{"title": paper.title, "paperId": paper.paperId, "year": paper.year} for paper in author_papers.papers]
-        return []
+    def __init__(self, citation_source_factory=create_citation_source):
+        """
+        Args:
+            citation_source_factory: Returns the CitationSource for one crawl (called per job,
+                with refresh=True for crawls that must not be answered from the disk cache)
+        """
+        self.citation_source_factory = citation_source_factory
+        # S2 paper ID <-> papers.id, shared by every job this worker runs
+        self.paper_ids = PaperIdMap()
     
-    def get_citations(self, paper_id, session):
-        """Fetch citations for a given paper ID from Semantic Scholar using PyS2."""
-        paper_details = self.api_call_with_retry(s2.api.get_paper, paperId=paper_id, session=session)
-        if paper_details:
-            return [
-                {"title": citation.title, "paperId": citation.paperId, "year": citation.year}
-                for citation in paper_details.citations
-            ]
-        return []
+    @property
+    def supabase(self):
+        """Shared async client; queries are executed on its event loop via _execute."""
+        return get_supabase()
     
-    def get_paper_authors(self, paper_id, session):
-        """Fetch authors for a given paper ID from Semantic Scholar using PyS2."""
-        paper_details = self.api_call_with_retry(s2.api.get_paper, paperId=paper_id, session=session)
-        if paper_details:
-            return [
-                {"name": author.name, "authorId": author.authorId}
-                for author in paper_details.authors
-            ]
-        return []
+    def _execute(self, query):
+        """Execute a query from the executor thread without blocking the event loop."""
+        return execute_sync(query)
     
     def _get_or_create_paper(self, paper_data):
         """
@@ -71,26 +48,52 @@ class FindCiterService:
         
         if not paper_id or not title:
             return None
-            
-        # Check if paper already exists
-        paper_response = self.supabase.table("papers").select("id").eq("semantic_scholar_id", paper_id).execute()
         
-        if paper_response.data and len(paper_response.data) > 0:
-            # Paper exists, return its ID
-            return paper_response.data[0].get("id")
-        else:
-            # Create new paper record
-            insert_response = self.supabase.table("papers").insert({
-                "semantic_scholar_id": paper_id,
-                "title": title,
-                "year": year
-            }).execute()
-            
-            if insert_response.data and len(insert_response.data) > 0:
-                return insert_response.data[0].get("id")
+        # Known papers resolve without a round trip
+        known_id = self.paper_ids.get(paper_id)
+        if known_id:
+            return known_id
+        
+        # Insert, or get the existing row; semantic_scholar_id is unique
+        upsert_response = self._execute(self.supabase.table("papers").upsert({
+            "semantic_scholar_id": paper_id,
+            "title": title,
+            "year": year
+        }, on_conflict="semantic_scholar_id"))
+        
+        if upsert_response.data and len(upsert_response.data) > 0:
+            stored_id = upsert_response.data[0].get("id")
+            self.paper_ids.add(paper_id, stored_id)
+            return stored_id
             
         return None
     
+    def _warm_paper_ids(self, user_id):
+        """
+        Load the S2 IDs of the user's papers and the papers citing them into the
+        paper ID map, so a re-crawl resolves them without per-paper queries.
+        Only papers the map doesn't know yet are fetched.
+        """
+        user_papers_response = self._execute(self.supabase.table("user_papers").select("paper_id").eq("user_id", user_id))
+        user_paper_ids = [row["paper_id"] for row in user_papers_response.data or []]
+        
+        # Batch the IDs to stay within URI length limits
+        BATCH_SIZE = 50
+        citing_paper_ids = set()
+        for i in range(0, len(user_paper_ids), BATCH_SIZE):
+            batch_ids = user_paper_ids[i:i+BATCH_SIZE]
+            response = self._execute(self.supabase.table("citations").select("citing_paper_id").in_("cited_paper_id", batch_ids))
+            citing_paper_ids.update(row["citing_paper_id"] for row in response.data or [])
+        
+        paper_ids = self.paper_ids.unknown(list(dict.fromkeys(user_paper_ids + list(citing_paper_ids))))
+        for i in range(0, len(paper_ids), BATCH_SIZE):
+            batch_ids = paper_ids[i:i+BATCH_SIZE]
+            response = self._execute(self.supabase.table("papers").select("id, semantic_scholar_id").in_("id", batch_ids))
+            for paper in response.data or []:
+                self.paper_ids.add(paper.get("semantic_scholar_id"), paper.get("id"))
+        
+        return len(paper_ids)
+    
     def _create_citation(self, cited_paper_id, citing_paper_id):
         """
         Create a citation relationship between two papers.
@@ -99,21 +102,14 @@ class FindCiterService:
         if not cited_paper_id or not citing_paper_id:
             return None
             
-        # Check if citation already exists
-        citation_response = self.supabase.table("citations").select("id").eq("cited_paper_id", cited_paper_id).eq("citing_paper_id", citing_paper_id).execute()
+        # Insert, or get the existing row; (cited_paper_id, citing_paper_id) is unique
+        upsert_response = self._execute(self.supabase.table("citations").upsert({
+            "cited_paper_id": cited_paper_id,
+            "citing_paper_id": citing_paper_id
+        }, on_conflict="cited_paper_id,citing_paper_id"))
         
-        if citation_response.data and len(citation_response.data) > 0:
-            # Citation exists, return its ID
-            return citation_response.data[0].get("id")
-        else:
-            # Create new citation
-            insert_response = self.supabase.table("citations").insert({
-                "cited_paper_id": cited_paper_id,
-                "citing_paper_id": citing_paper_id
-            }).execute()
-            
-            if insert_response.data and len(insert_response.data) > 0:
-                return insert_response.data[0].get("id")
+        if upsert_response.data and len(upsert_response.data) > 0:
+            return upsert_response.data[0].get("id")
                 
         return None
     
@@ -129,17 +125,17 @@ class FindCiterService:
             return None
             
         # Check if citer already exists
-        citer_response = self.supabase.table("citers").select("id").eq("semantic_scholar_id", semantic_scholar_id).execute()
+        citer_response = self._execute(self.supabase.table("citers").select("id").eq("semantic_scholar_id", semantic_scholar_id))
         
         if citer_response.data and len(citer_response.data) > 0:
             # Citer exists, update and return ID
             citer_id = citer_response.data[0].get("id")
             
             # Update with only the columns that exist in the actual schema
-            self.supabase.table("citers").update({
+            self._execute(self.supabase.table("citers").update({
                 "citer_name": name,
                 "paper_count": paper_count
-            }).eq("id", citer_id).execute()
+            }).eq("id", citer_id))
             
             return citer_id
         else:
@@ -150,7 +146,7 @@ class FindCiterService:
                 "paper_count": paper_count
             }
             
-            insert_response = self.supabase.table("citers").insert(insert_data).execute()
+            insert_response = self._execute(self.supabase.table("citers").insert(insert_data))
             
             if insert_response.data and len(insert_response.data) > 0:
                 return insert_response.data[0].get("id")
@@ -162,15 +158,11 @@ class FindCiterService:
         if not user_id or not paper_id:
             return False
             
-        # Check if link already exists
-        link_response = self.supabase.table("user_papers").select("id").eq("user_id", user_id).eq("paper_id", paper_id).execute()
-        
-        if not link_response.data or len(link_response.data) == 0:
-            # Create new link
-            self.supabase.table("user_papers").insert({
-                "user_id": user_id,
-                "paper_id": paper_id
-            }).execute()
+        # Create the link unless it exists; (user_id, paper_id) is unique
+        self._execute(self.supabase.table("user_papers").upsert({
+            "user_id": user_id,
+            "paper_id": paper_id
+        }, on_conflict="user_id,paper_id", ignore_duplicates=True))
             
         return True
     
@@ -179,238 +171,281 @@ class FindCiterService:
         if not citer_id or not citation_id:
             return False
             
-        # Check if link already exists
-        link_response = self.supabase.table("citer_citations").select("id").eq("citer_id", citer_id).eq("citation_id", citation_id).execute()
-        
-        if not link_response.data or len(link_response.data) == 0:
-            # Create new link
-            self.supabase.table("citer_citations").insert({
-                "citer_id": citer_id,
-                "citation_id": citation_id
-            }).execute()
+        # Create the link unless it exists; (citer_id, citation_id) is unique
+        self._execute(self.supabase.table("citer_citations").upsert({
+            "citer_id": citer_id,
+            "citation_id": citation_id
+        }, on_conflict="citer_id,citation_id", ignore_duplicates=True))
             
         return True
     
-    def _update_user_citer_papers(self, user_id, citer_id, cited_paper_title, cited_paper_id, citing_paper_title, citing_paper_id):
+    def _write_user_citer_edges(self, edges, known_user_citers):
         """
-        Update the user_citers table with a new citation using the new format.
-        Does not store citation data in memory.
+        Record that citers cited users' papers as append-only user_citer_edges rows,
+        in bulk. Titles are resolved by join when the detail is read.
+        
+        Args:
+            edges: List of {user_id, citer_id, cited_paper_id, citing_paper_id}
+            known_user_citers: Dict of user ID -> set of citer IDs whose user_citers row
+                this job has already ensured, so each pair is checked once per job
         """
+        if not edges:
+            return True
         try:
-            # Check if relationship exists
-            user_citer_response = self.supabase.table("user_citers").select("id, papers, total_citations").eq("user_id", user_id).eq("citer_id", citer_id).execute()
-            
-            if user_citer_response.data and len(user_citer_response.data) > 0:
-                # Update existing relationship
-                user_citer_id = user_citer_response.data[0].get("id")
-                existing_papers = user_citer_response.data[0].get("papers", {})
-                total_citations = user_citer_response.data[0].get("total_citations", 0)
-                
-                # Convert to dict if it's not already
-                if not isinstance(existing_papers, dict):
-                    existing_papers = {}
-                
-                # Check if this is old format and convert if needed
-                if existing_papers and any(isinstance(v, list) for v in existing_papers.values()):
-                    # Convert old format to new format
-                    new_papers = {}
-                    for old_cited_title, old_citing_titles in existing_papers.items():
-                        # Try to find paper_id for cited paper
-                        cited_paper_resp = self.supabase.table("papers").select("id").eq("title", old_cited_title).execute()
-                        old_cited_paper_id = cited_paper_resp.data[0].get("id") if cited_paper_resp.data else None
-                        
-                        new_papers[old_cited_title] = {
-                            "paper_id": old_cited_paper_id,
-                            "citations": []
-                        }
-                        
-                        for old_citing_title in old_citing_titles:
-                            # Try to find paper_id for citing paper
-                            citing_paper_resp = self.supabase.table("papers").select("id").eq("title", old_citing_title).execute()
-                            old_citing_paper_id = citing_paper_resp.data[0].get("id") if citing_paper_resp.data else None
-                            
-                            new_papers[old_cited_title]["citations"].append({
-                                "citing_paper_id": old_citing_paper_id,
-                                "title": old_citing_title
-                            })
-                    
-                    existing_papers = new_papers
-                
-                # Update papers dict with new citation
-                if cited_paper_title not in existing_papers:
-                    existing_papers[cited_paper_title] = {
-                        "paper_id": cited_paper_id,
-                        "citations": []
-                    }
-                
-                # Check if this citation already exists
-                citation_added = True
-                for citation in existing_papers[cited_paper_title]["citations"]:
-                    if citation.get("citing_paper_id") == citing_paper_id:
-                        citation_added = False
-                        break
-                
-                # Add citing paper if not already present
-                if citation_added:
-                    existing_papers[cited_paper_title]["citations"].append({
-                        "citing_paper_id": citing_paper_id,
-                        "title": citing_paper_title
-                    })
-                    total_citations += 1
-                
-                # Only update if a new citation was added
-                if citation_added:
-                    # Calculate cited_papers_count and citing_papers_count
-                    cited_papers_count = len(existing_papers.keys())
-                    
-                    # Count unique citing papers
-                    unique_citing_papers = set()
-                    for paper_data in existing_papers.values():
-                        for citation in paper_data.get("citations", []):
-                            unique_citing_papers.add(citation.get("citing_paper_id"))
-                    
-                    citing_papers_count = len(unique_citing_papers)
-                    
-                    self.supabase.table("user_citers").update({
-                        "papers": existing_papers,
-                        "total_citations": total_citations,
-                        "cited_papers_count": cited_papers_count,
-                        "citing_papers_count": citing_papers_count,
-                        "updated_at": "now()"
-                    }).eq("id", user_citer_id).execute()
-            else:
-                # Create new relationship with new format
-                papers = {
-                    cited_paper_title: {
-                        "paper_id": cited_paper_id,
-                        "citations": [
+            # Create the missing user_citers rows; counts are filled in by update_citation_counts
+            new_citers = {}
+            for edge in edges:
+                if edge["citer_id"] not in known_user_citers.setdefault(edge["user_id"], set()):
+                    new_citers.setdefault(edge["user_id"], set()).add(edge["citer_id"])
+            
+            # Batch the IDs to stay within URI length limits
+            BATCH_SIZE = 50
+            for user_id, citer_ids in new_citers.items():
+                citer_ids = list(citer_ids)
+                for i in range(0, len(citer_ids), BATCH_SIZE):
+                    batch_ids = citer_ids[i:i+BATCH_SIZE]
+                    existing_response = self._execute(self.supabase.table("user_citers").select("citer_id").eq("user_id", user_id).in_("citer_id", batch_ids))
+                    existing = {row["citer_id"] for row in existing_response.data or []}
+                    missing = [citer_id for citer_id in batch_ids if citer_id not in existing]
+                    if missing:
+                        self._execute(self.supabase.table("user_citers").insert([
                             {
-                                "citing_paper_id": citing_paper_id,
-                                "title": citing_paper_title
+                                "user_id": user_id,
+                                "citer_id": citer_id,
+                                "total_citations": 0,
+                                "cited_papers_count": 0,
+                                "citing_papers_count": 0,
                             }
-                        ]
-                    }
-                }
-                
-                self.supabase.table("user_citers").insert({
-                    "user_id": user_id,
-                    "citer_id": citer_id,
-                    "papers": papers,
-                    "total_citations": 1,
-                    "cited_papers_count": 1,
-                    "citing_papers_count": 1,
-                }).execute()
+                            for citer_id in missing
+                        ]))
+                known_user_citers[user_id].update(citer_ids)
+            
+            self._execute(self.supabase.table("user_citer_edges").upsert(
+                edges,
+                on_conflict="user_id,citer_id,cited_paper_id,citing_paper_id",
+                ignore_duplicates=True
+            ))
             
             return True
         except Exception as e:
-            logger.error(f"Error updating user_citer relationship: {e}")
+            logger.error(f"Error writing user_citer edges: {e}")
             return False
     
     def update_citation_counts(self, user_id):
         """
-        Update the cited_papers_count and citing_papers_count columns for all user_citers entries.
-        Updated to handle the new papers format.
+        Recompute total_citations, cited_papers_count and citing_papers_count for all
+        of a user's citers from user_citer_edges in one statement.
         """
         try:
-            # Get all user_citers entries for this user
-            user_citers_response = self.supabase.table("user_citers").select("id, papers").eq("user_id", user_id).execute()
-            
-            if not user_citers_response.data:
-                return True
-                
-            # Update each entry individually
-            for entry in user_citers_response.data:
-                citer_id = entry.get("id")
-                papers = entry.get("papers", {})
-                
-                if not papers:
-                    continue
-                
-                # Check if this is old format
-                if any(isinstance(v, list) for v in papers.values()):
-                    # Count cited papers (keys in the papers object)
-                    cited_papers_count = len(papers.keys())
-                    
-                    # Count unique citing papers (values in the papers object)
-                    unique_citing_papers = set()
-                    for citing_papers_list in papers.values():
-                        for paper in citing_papers_list:
-                            unique_citing_papers.add(paper)
-                    
-                    citing_papers_count = len(unique_citing_papers)
-                else:
-                    # Count cited papers (keys in the papers object)
-                    cited_papers_count = len(papers.keys())
-                    
-                    # Count unique citing papers from the new format
-                    unique_citing_papers = set()
-                    for paper_data in papers.values():
-                        for citation in paper_data.get("citations", []):
-                            if citation.get("citing_paper_id"):
-                                unique_citing_papers.add(citation.get("citing_paper_id"))
-                    
-                    citing_papers_count = len(unique_citing_papers)
-                
-                # Update the record
-                self.supabase.table("user_citers").update({
-                    "cited_papers_count": cited_papers_count,
-                    "citing_papers_count": citing_papers_count
-                }).eq("id", citer_id).execute()
-            
+            response = self._execute(self.supabase.rpc("refresh_user_citer_counts", {"p_user_id": user_id}))
+            logger.info(f"Refreshed citation counts of {response.data} citers for user {user_id}")
             return True
         except Exception as e:
             logger.error(f"Error updating citation counts: {e}")
             return False
     
-    def process_user_papers(self, semantic_scholar_id, user_id):
+    def _save_citation_years(self, user_id, paper_years, citer_years):
+        """
+        Replace the user's citations-per-year aggregates with the crawl's counts.
+        
+        Args:
+            paper_years: Counter of (papers.id, year) -> citations
+            citer_years: Counter of (citers.id, year) -> citations
+        """
+        try:
+            response = self._execute(self.supabase.rpc("replace_citation_years", {
+                "p_user_id": user_id,
+                "p_paper_years": [
+                    {"paper_id": paper_id, "year": year, "citations": count}
+                    for (paper_id, year), count in paper_years.items()
+                ],
+                "p_citer_years": [
+                    {"citer_id": citer_id, "year": year, "citations": count}
+                    for (citer_id, year), count in citer_years.items()
+                ]
+            }))
+            logger.info(f"Saved citation counts for {response.data} years for user {user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving citation years: {e}")
+            return False
+    
+    def _score_user_citers(self, user_id, weights=None):
+        """
+        Store the composite recommender score of every citer of the user in one statement.
+        Run after the counts, yearly aggregates and independence levels are saved.
+        """
+        try:
+            response = self._execute(self.supabase.rpc("score_user_citers", {
+                "p_user_id": user_id,
+                "p_weights": score_weights(weights)
+            }))
+            logger.info(f"Scored {response.data} citers for user {user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error scoring user citers: {e}")
+            return False
+    
+    def _load_affiliations(self, source, graph, semantic_scholar_id, citer_ids_by_author):
+        """
+        Add affiliations to the coauthor graph: the user's, their coauthors' and
+        the job's citers' from the citation source, plus the citers' stored ones.
+        """
+        # Authors loaded for an earlier member of the job are skipped
+        author_ids = [
+            author_id for author_id in {semantic_scholar_id} | graph.coauthors(semantic_scholar_id) | set(citer_ids_by_author)
+            if author_id not in graph.affiliations
+        ]
+        for author_id, affiliations in source.get_author_affiliations(author_ids).items():
+            graph.add_affiliations(author_id, affiliations)
+        
+        citer_ids = list(citer_ids_by_author.values())
+        
+        # Batch the IDs to stay within URI length limits
+        BATCH_SIZE = 50
+        for i in range(0, len(citer_ids), BATCH_SIZE):
+            batch_ids = citer_ids[i:i+BATCH_SIZE]
+            response = self._execute(self.supabase.table("citers").select("semantic_scholar_id, affiliations").in_("id", batch_ids))
+            for citer in response.data or []:
+                graph.add_affiliations(citer.get("semantic_scholar_id"), citer.get("affiliations"))
+    
+    def _apply_independence_levels(self, user_id, levels):
+        """
+        Store graded independence on user_citers with one bulk update per level and batch.
+        Only coauthors are flagged as not independent.
+        
+        Args:
+            user_id: The database user ID
+            levels: Dict of citers.id -> independence level
+        """
+        citer_ids_by_level = {}
+        for citer_id, level in levels.items():
+            citer_ids_by_level.setdefault(level, []).append(citer_id)
+        
+        # Batch the IDs to stay within URI length limits
+        BATCH_SIZE = 50
+        for level, citer_ids in citer_ids_by_level.items():
+            for i in range(0, len(citer_ids), BATCH_SIZE):
+                batch_ids = citer_ids[i:i+BATCH_SIZE]
+                self._execute(self.supabase.table("user_citers").update({
+                    "independence_level": level,
+                    "independent": level != COAUTHOR
+                }).eq("user_id", user_id).in_("citer_id", batch_ids))
+        
+        return {level: len(citer_ids) for level, citer_ids in citer_ids_by_level.items()}
+    
+    def process_user_papers(self, semantic_scholar_id, user_id, refresh=False):
         """
         Memory-efficient version that directly updates the database without storing large data structures.
         
         Args:
             semantic_scholar_id: The Semantic Scholar ID of the author
             user_id: The database user ID
+            refresh: Fetch everything upstream instead of from the disk cache
             
         Returns:
             Success flag
         """
-        session = Session()
+        return self.process_members_papers([(semantic_scholar_id, user_id)], refresh)
+    
+    def process_members_papers(self, members, refresh=False):
+        """
+        Crawl the union of several users' papers once and fan the citers out to each
+        user who wrote the cited paper. Papers, citations, citers and S2 responses are
+        shared across members, and each member's user_citers rows are written in bulk.
         
-        # Get all the user's papers
-        your_papers = self.get_author_papers(semantic_scholar_id, session)
-        total_papers = len(your_papers)
-        processed_papers = 0
+        Args:
+            members: List of (semantic_scholar_id, user_id) pairs
+            refresh: Fetch everything upstream instead of from the disk cache
+            
+        Returns:
+            Success flag
+        """
+        source = self.citation_source_factory(refresh=refresh)
+        profile = current_profile() or JobProfile()
+        source.bind_profile(profile)
+        
+        # Per-member state, keyed by user ID
+        states = {}
+        # Union of the members' papers: S2 paper ID -> paper, and the user IDs who wrote it
+        union_papers = {}
+        owners = {}
+        for semantic_scholar_id, user_id in members:
+            member_papers = source.get_author_papers(semantic_scholar_id)
+            states[user_id] = {
+                "semantic_scholar_id": semantic_scholar_id,
+                "total_papers": len(member_papers),
+                "citer_ids_by_author": {},  # S2 author ID -> citers.id, this member's citers only
+                # Citations per year, by the citing paper's year
+                "paper_years": Counter(),  # (papers.id, year) -> citations
+                "citer_years": Counter(),  # (citers.id, year) -> citations
+            }
+            for paper in member_papers:
+                union_papers.setdefault(paper.get("paperId"), paper)
+                owners.setdefault(paper.get("paperId"), []).append(user_id)
+            logger.info(f"Processing {len(member_papers)} papers for author {semantic_scholar_id}")
+        
+        # Collected during the crawl for the independence check
+        coauthor_graph = CoauthorGraph()  # built from every author list the crawl fetches
+        citer_ids_by_author = {}  # S2 author ID -> citers.id, for every member
+        known_user_citers = {}  # user ID -> citers.id whose user_citers row exists
+        
+        # Resolve the papers a previous crawl stored from memory
+        try:
+            with profile.phase("warm_paper_ids"):
+                warmed = sum(self._warm_paper_ids(user_id) for user_id in states)
+            logger.info(f"Loaded {warmed} stored paper IDs for {len(states)} users")
+        except Exception as e:
+            logger.error(f"Error loading stored paper IDs: {e}")
         
-        logger.info(f"Processing {total_papers} papers for author {semantic_scholar_id}")
+        total_papers = len(union_papers)
+        processed_papers = 0
         
         # Process each paper
-        for paper in your_papers:
+        crawl_started = time.perf_counter()
+        for s2_paper_id, paper in union_papers.items():
             try:
+                paper_owners = owners[s2_paper_id]
+                
                 # Store the paper in the database
                 paper_id = self._get_or_create_paper(paper)
                 paper_title = paper.get("title", "Unknown")
                 
                 if paper_id:
-                    # Link the paper to the user
-                    self._link_user_paper(user_id, paper_id)
+                    # Link the paper to the users who wrote it
+                    for user_id in paper_owners:
+                        self._link_user_paper(user_id, paper_id)
                     
-                    # Fetch citations for this paper
-                    citations = self.get_citations(paper.get("paperId"), session)
+                    # Fetch citations and authors for this paper in one call
+                    paper_details = source.get_paper_details(s2_paper_id)
+                    citations = paper_details["citations"]
+                    for user_id in paper_owners:
+                        coauthor_graph.add_paper(
+                            [author.get("authorId") for author in paper_details["authors"]],
+                            anchor=states[user_id]["semantic_scholar_id"]
+                        )
                     logger.info(f"Processing paper: {paper_title} - Found {len(citations)} citations")
                     
+                    # user_citer edges of this paper, written in one call
+                    edges = []
+                    
                     # Process each citation
                     for citation in citations:
                         if "paperId" in citation:
-                            citation_title = citation.get("title", "Unknown")
-                            
                             # Store the citing paper
                             citing_paper_id = self._get_or_create_paper(citation)
                             
                             if citing_paper_id and paper_id:
                                 # Create citation relationship
                                 citation_id = self._create_citation(paper_id, citing_paper_id)
+                                citation_year = citation.get("year")
+                                if citation_year:
+                                    for user_id in paper_owners:
+                                        states[user_id]["paper_years"][(paper_id, citation_year)] += 1
                                 
                                 # Get authors of the citing paper
-                                authors = self.get_paper_authors(citation.get("paperId"), session)
+                                authors = source.get_paper_authors(citation.get("paperId"))
+                                coauthor_graph.add_paper([author.get("authorId") for author in authors])
                                 
                                 # Process each author as a potential citer
                                 for author in authors:
@@ -418,34 +453,44 @@ class FindCiterService:
                                     author_id = author.get("authorId")
                                     
                                     if author_name and author_id:
-                                        # Skip if this is the user themselves
-                                        if author_id == semantic_scholar_id:
+                                        # Skip the users themselves
+                                        recipients = [
+                                            user_id for user_id in paper_owners
+                                            if states[user_id]["semantic_scholar_id"] != author_id
+                                        ]
+                                        if not recipients:
                                             continue
                                             
                                         try:
-                                            # Get an estimate of the author's paper count
-                                            paper_count_estimate = len(self.get_author_papers(author_id, session))
-                                            
-                                            # Store or update citer
-                                            citer_id = self._get_or_create_citer(author, paper_count_estimate)
+                                            # Store or update the citer once per job
+                                            citer_id = citer_ids_by_author.get(author_id)
+                                            if citer_id is None:
+                                                # Get an estimate of the author's paper count
+                                                paper_count_estimate = len(source.get_author_papers(author_id))
+                                                citer_id = self._get_or_create_citer(author, paper_count_estimate)
+                                                if citer_id:
+                                                    citer_ids_by_author[author_id] = citer_id
                                             
                                             if citer_id and citation_id:
                                                 # Link citer to citation
                                                 self._link_citer_citation(citer_id, citation_id)
                                                 
-                                                # Update user_citer relationship directly in the database
-                                                # Updated to include paper IDs
-                                                self._update_user_citer_papers(
-                                                    user_id,
-                                                    citer_id,
-                                                    paper_title,
-                                                    paper_id,
-                                                    citation_title,
-                                                    citing_paper_id
-                                                )
+                                                for user_id in recipients:
+                                                    states[user_id]["citer_ids_by_author"][author_id] = citer_id
+                                                    edges.append({
+                                                        "user_id": user_id,
+                                                        "citer_id": citer_id,
+                                                        "cited_paper_id": paper_id,
+                                                        "citing_paper_id": citing_paper_id
+                                                    })
+                                                    if citation_year:
+                                                        states[user_id]["citer_years"][(citer_id, citation_year)] += 1
                                         except Exception as e:
                                             logger.error(f"Error processing citer {author_name}: {e}")
                                             continue
+                    
+                    # Append the user_citer edges directly in the database
+                    self._write_user_citer_edges(edges, known_user_citers)
                 
                 processed_papers += 1
                 logger.info(f"Processed paper {processed_papers} of {total_papers}")
@@ -453,73 +498,137 @@ class FindCiterService:
                 logger.error(f"Error processing paper {paper.get('title', 'unknown')}: {e}")
                 continue
         
+        profile.record_phase("crawl", time.perf_counter() - crawl_started)
+        
+        source_stats = source.stats()
+        logger.info(f"Citation source stats for users {list(states)}: {source_stats}")
+        if "cache" in source_stats:
+            profile.annotate("s2_cache", source_stats["cache"])
+            metrics.record_cache("s2", source_stats["cache"]["hits"], source_stats["cache"]["misses"])
+        profile.annotate("paper_id_map", self.paper_ids.stats())
+        
+        for user_id, state in states.items():
+            self._finish_member(user_id, state, coauthor_graph, profile, source)
+
+        return True
+    
+    def _finish_member(self, user_id, state, coauthor_graph, profile, source):
+        """
+        Per-user steps after the crawl: paper count, citation counts, yearly
+        aggregates, independence levels and scores
+        """
+        semantic_scholar_id = state["semantic_scholar_id"]
+        
         # Update the user's paper count
         try:
-            self.supabase.table("users").update({
-                "author_paper_count": total_papers
-            }).eq("id", user_id).execute()
+            self._execute(self.supabase.table("users").update({
+                "author_paper_count": state["total_papers"]
+            }).eq("id", user_id))
         except Exception as e:
             logger.error(f"Error updating user paper count: {e}")
         
         # Update the citation counts in user_citers table
-        self.update_citation_counts(user_id)
-
-        # update whether the citer is independent or not
-        for paper in your_papers:
-            print(f"paper: {paper}")
-            semantic_scholar_id = paper.get("paperId")
-            print(f"semantic_scholar_id: {semantic_scholar_id}")
-            # paper_id = self._get_or_create_paper(paper)
-            authors = self.get_paper_authors(semantic_scholar_id, session)
-            print(f"authors: {authors}")
-
-            for author in authors:
-                author_semantic_scholar_id = author.get("authorId")
-                citer_response = self.supabase.table("citers").select("id").eq("semantic_scholar_id", author_semantic_scholar_id).execute()
-        
-                print(citer_response)
-                print("XXXXXXX")
-                if citer_response.data and len(citer_response.data) > 0:
-                    citer_id = citer_response.data[0].get("id")
-                    print(citer_id, user_id)
-                    self.supabase.table("user_citers").update({
-                        "independent": False
-                    }).eq("citer_id", citer_id).eq("user_id", user_id).execute()
+        with profile.phase("citation_counts"):
+            self.update_citation_counts(user_id)
+        
+        with profile.phase("citation_years"):
+            self._save_citation_years(user_id, state["paper_years"], state["citer_years"])
 
-        return True
+        # Grade each citer's independence from the user with the in-memory coauthor graph
+        try:
+            with profile.phase("independence"):
+                self._load_affiliations(source, coauthor_graph, semantic_scholar_id, state["citer_ids_by_author"])
+                levels = {
+                    citer_id: coauthor_graph.independence_level(semantic_scholar_id, author_id)
+                    for author_id, citer_id in state["citer_ids_by_author"].items()
+                }
+                level_counts = self._apply_independence_levels(user_id, levels)
+            logger.info(f"Independence levels for user {user_id}: {level_counts}")
+        except Exception as e:
+            logger.error(f"Error updating citer independence: {e}")
+        
+        with profile.phase("scoring"):
+            self._score_user_citers(user_id)
     
-    async def process_citation_job(self, user_id):
+    async def process_citation_job(self, user_id, profile=None, sampler=None, refresh=False):
         """
         Process a citation job for a user.
         Memory-efficient version that updates the database directly.
         
         Args:
             user_id: The user ID in the database
+            profile: JobProfile to record into (defaults to the current job's, or a new one)
+            sampler: Optional SamplingProfiler, run against the executor thread for the job
+            refresh: Fetch everything upstream instead of from the disk cache (scheduled refreshes)
             
         Returns:
-            A dictionary with the job result
+            A dictionary with the job result, including a compact "profile" breakdown
+        """
+        return await self._run_sync_job(self._process_citation_job_sync, user_id, profile, sampler, refresh=refresh)
+    
+    async def process_citation_batch_job(self, user_ids, profile=None, sampler=None):
+        """
+        Process a find_citers_batch job: one crawl over the union of the users' papers
+        
+        Args:
+            user_ids: The user IDs in the database
+            profile: JobProfile to record into (defaults to the current job's, or a new one)
+            sampler: Optional SamplingProfiler, run against the executor thread for the job
+            
+        Returns:
+            A dictionary with the job result, including one entry per user
+        """
+        return await self._run_sync_job(self._process_citation_batch_job_sync, user_ids, profile, sampler)
+    
+    async def _run_sync_job(self, job, job_input, profile=None, sampler=None, **job_kwargs):
+        """
+        Run job(job_input, **job_kwargs) in the default executor with the profile bound, and add its summary to the result
         """
+        profile = profile or current_profile() or JobProfile()
         try:
-            # Run the synchronous processing in a thread pool executor to avoid blocking
+            # Make sure the shared client is bound to this loop before handing off to the thread
+            get_supabase()
+            
+            # Run the synchronous processing in a thread pool executor to avoid blocking;
+            # the copied context carries the profile into the thread
+            with use_profile(profile):
+                context = contextvars.copy_context()
+            submitted = time.perf_counter()
+            
+            def run_job():
+                # Time spent waiting for a free executor thread
+                queued = time.perf_counter() - submitted
+                profile.record_phase("executor_wait", queued)
+                tracing.record_span("executor_wait", queued, kind=tracing.SpanKind.INTERNAL)
+                if sampler is None:
+                    return job(job_input, **job_kwargs)
+                sampler.start()
+                try:
+                    return job(job_input, **job_kwargs)
+                finally:
+                    sampler.stop()
+            
             loop = asyncio.get_running_loop()
             result = await loop.run_in_executor(
                 None,  # Use the default executor
-                self._process_citation_job_sync,  # Pass the method
-                user_id  # Pass the argument
+                context.run,
+                run_job
             )
-            return result
         except Exception as e:
-            logger.error(f"Error in async wrapper for process_citation_job: {e}")
-            return {
+            logger.error(f"Error in async wrapper for {job.__name__}: {e}")
+            result = {
                 "status": "failed",
                 "error": str(e)
             }
+        
+        result["profile"] = profile.summary()
+        return result
 
-    def _process_citation_job_sync(self, user_id):
+    def _process_citation_job_sync(self, user_id, refresh=False):
         """Internal synchronous implementation of the citation job processing"""
         try:
             # Get the semantic_scholar_id from the database
-            response = self.supabase.table("users").select("semantic_scholar_id").eq("id", user_id).execute()
+            response = self._execute(self.supabase.table("users").select("semantic_scholar_id").eq("id", user_id))
             
             if not response.data or len(response.data) == 0:
                 return {
@@ -536,10 +645,10 @@ class FindCiterService:
                 }
             
             # Process papers and update database directly
-            processing_success = self.process_user_papers(semantic_scholar_id, user_id)
+            processing_success = self.process_user_papers(semantic_scholar_id, user_id, refresh)
             
             # Get citation count for reporting
-            citation_count_response = self.supabase.table("user_citers").select("total_citations").eq("user_id", user_id).execute()
+            citation_count_response = self._execute(self.supabase.table("user_citers").select("total_citations").eq("user_id", user_id))
                 
             citation_count = 0
             if citation_count_response.data:
@@ -560,4 +669,62 @@ class FindCiterService:
                 "status": "failed",
                 "error": str(e)
             }
-
+    
+    def _process_citation_batch_job_sync(self, user_ids):
+        """Internal synchronous implementation of the batch citation job processing"""
+        try:
+            user_ids = list(dict.fromkeys(user_ids))
+            
+            # Get the members' semantic_scholar_ids from the database
+            response = self._execute(self.supabase.table("users").select("id, semantic_scholar_id").in_("id", user_ids))
+            s2_ids = {row["id"]: row.get("semantic_scholar_id") for row in response.data or []}
+            
+            members = [(s2_ids[user_id], user_id) for user_id in user_ids if s2_ids.get(user_id)]
+            skipped = [
+                {
+                    "user_id": user_id,
+                    "error": "User not found" if user_id not in s2_ids else "User does not have a Semantic Scholar ID"
+                }
+                for user_id in user_ids if not s2_ids.get(user_id)
+            ]
+            
+            if not members:
+                return {
+                    "status": "failed",
+                    "error": "None of the users have a Semantic Scholar ID",
+                    "skipped": skipped
+                }
+            
+            # Process papers and update database directly
+            processing_success = self.process_members_papers(members)
+            
+            # Get citation counts for reporting
+            citation_counts = Counter()
+            BATCH_SIZE = 50
+            member_ids = [user_id for _, user_id in members]
+            for i in range(0, len(member_ids), BATCH_SIZE):
+                batch_ids = member_ids[i:i+BATCH_SIZE]
+                citation_count_response = self._execute(self.supabase.table("user_citers").select("user_id, total_citations").in_("user_id", batch_ids))
+                for row in citation_count_response.data or []:
+                    citation_counts[row["user_id"]] += row.get("total_citations", 0)
+            
+            return {
+                "status": "success",
+                "users": [
+                    {
+                        "user_id": user_id,
+                        "semantic_scholar_id": semantic_scholar_id,
+                        "citation_count": citation_counts[user_id]
+                    }
+                    for semantic_scholar_id, user_id in members
+                ],
+                "skipped": skipped,
+                "database_updated": processing_success
+            }
+        except Exception as e:
+            logger.error(f"Error processing batch citation job: {e}")
+            
+            return {
+                "status": "failed",
+                "error": str(e)
+            }
@@ -1,6 +1,8 @@
 import logging
 import uuid
-from app.lib.supabase import supabase
+import asyncio
+from app.lib.supabase import get_supabase, execute
+from app.lib.result_store import plan_result_storage, write_result_file, ENCODING
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +22,7 @@ class SupabaseService:
                 "params": params or {}
             }
             
-            response = supabase.table("jobs").insert(data).execute()
+            response = await execute(get_supabase().table("jobs").insert(data))
             
             if hasattr(response, 'error') and response.error:
                 logger.error(f"Error creating job in Supabase: {response.error}")
@@ -40,7 +42,7 @@ class SupabaseService:
             # Ensure job_id is lowercase for consistency
             job_id = str(job_id).lower()
             
-            response = supabase.table("jobs").select("*").eq("id", job_id).execute()
+            response = await execute(get_supabase().table("jobs").select("*").eq("id", job_id))
             
             if hasattr(response, 'error') and response.error:
                 logger.error(f"Error getting job from Supabase: {response.error}")
@@ -66,16 +68,16 @@ class SupabaseService:
             # Check current status if we're trying to update to 'processing'
             if status == 'processing':
                 # Only update to processing if currently in pending or failed state
-                response = supabase.table("jobs").update({
+                response = await execute(get_supabase().table("jobs").update({
                     "status": status,
                     "updated_at": "now()"
-                }).eq("id", job_id).in_("status", ["pending", "failed"]).execute()
+                }).eq("id", job_id).in_("status", ["pending", "failed"]))
             else:
                 # For other statuses, just update
-                response = supabase.table("jobs").update({
+                response = await execute(get_supabase().table("jobs").update({
                     "status": status,
                     "updated_at": "now()"
-                }).eq("id", job_id).execute()
+                }).eq("id", job_id))
             
             if hasattr(response, 'error') and response.error:
                 logger.error(f"Error updating job status in Supabase: {response.error}")
@@ -113,10 +115,9 @@ class SupabaseService:
                 "updated_at": "now()"
             }
             
-            response = supabase.table("jobs").update(data) \
+            response = await execute(get_supabase().table("jobs").update(data) \
                 .eq("id", job_id) \
-                .eq("status", expected_current_status) \
-                .execute()
+                .eq("status", expected_current_status))
             
             # Check if any rows were updated
             success = response.data and len(response.data) > 0
@@ -135,9 +136,50 @@ class SupabaseService:
             logger.error(f"Exception updating job status in Supabase: {str(e)}")
             return False
     
-    async def save_job_result(self, job_id, result):
+    async def record_citation_count(self, user_id, citations):
+        """
+        Store the S2 citation count a refresh crawl caught up with on the user,
+        so the scheduled refresh only crawls them again when it changes
+        """
+        try:
+            response = await execute(get_supabase().rpc("record_citation_counts", {
+                "p_counts": [{"user_id": user_id, "citations": citations}]
+            }))
+            
+            if hasattr(response, 'error') and response.error:
+                logger.error(f"Error recording citation count in Supabase: {response.error}")
+                return False
+            
+            return True
+        except Exception as e:
+            logger.error(f"Exception recording citation count in Supabase: {str(e)}")
+            return False
+    
+    async def update_job_progress(self, job_id, progress):
+        """
+        Save the progress of a job that is still processing
+        """
+        try:
+            # Ensure job_id is lowercase for consistency
+            job_id = str(job_id).lower()
+            
+            response = await execute(get_supabase().table("jobs").update({
+                "progress": progress,
+                "updated_at": "now()"
+            }).eq("id", job_id))
+            
+            if hasattr(response, 'error') and response.error:
+                logger.error(f"Error updating job progress in Supabase: {response.error}")
+                return False
+            
+            return True
+        except Exception as e:
+            logger.error(f"Exception updating job progress in Supabase: {str(e)}")
+            return False
+    
+    async def save_job_profile(self, job_id, folded_stacks, summary):
         """
-        Save job result to job_results table
+        Save a job's sampling profile (folded stacks) to the job_profiles table
         """
         try:
             # Ensure job_id is lowercase for consistency
@@ -145,17 +187,65 @@ class SupabaseService:
             
             data = {
                 "job_id": job_id,
-                "result": result
+                "format": "folded",
+                "samples": summary.get("samples", 0),
+                "interval_ms": summary.get("interval_ms"),
+                "profile": folded_stacks
             }
             
-            response = supabase.table("job_results").insert(data).execute()
+            response = await execute(get_supabase().table("job_profiles").insert(data))
             
             if hasattr(response, 'error') and response.error:
-                logger.error(f"Error saving job result to Supabase: {response.error}")
+                logger.error(f"Error saving job profile to Supabase: {response.error}")
                 return False
                 
-            logger.info(f"Job result saved to Supabase for job_id: {job_id}")
+            logger.info(f"Job profile saved to Supabase for job_id: {job_id} ({summary.get('samples', 0)} samples)")
+            return True
+        except Exception as e:
+            logger.error(f"Exception saving job profile to Supabase: {str(e)}")
+            return False
+    
+    async def save_job_result(self, job_id, result):
+        """
+        Save job result to job_results table. Large results are compressed into
+        job_result_blobs (or RESULT_STORE_DIR) and only their summary is kept inline.
+        """
+        try:
+            # Ensure job_id is lowercase for consistency
+            job_id = str(job_id).lower()
+            
+            # Files are named by the job_results row, so a job's later results don't overwrite earlier ones
+            result_id = str(uuid.uuid4())
+            # Serializing, compressing and writing a result of up to RESULT_MAX_BYTES blocks, so keep it off the loop
+            loop = asyncio.get_running_loop()
+            storage = await loop.run_in_executor(None, plan_result_storage, result)
+            payload = storage.pop("payload", None)
+            if storage["storage"] == "file":
+                storage["location"] = await loop.run_in_executor(None, write_result_file, result_id, payload)
+            
+            if storage["storage"] == "blob":
+                # The row and its blob go in one transaction, so the row never points at a missing blob
+                response = await execute(get_supabase().rpc("save_job_result_blob", {
+                    "p_job_id": job_id,
+                    "p_summary": storage["summary"],
+                    "p_size_bytes": storage["size_bytes"],
+                    "p_encoding": ENCODING,
+                    "p_payload": payload
+                }))
+            else:
+                data = {
+                    "id": result_id,
+                    "job_id": job_id,
+                    **storage
+                }
+                response = await execute(get_supabase().table("job_results").insert(data))
+            
+            if hasattr(response, 'error') and response.error:
+                logger.error(f"Error saving job result to Supabase: {response.error}")
+                return False
+            
+            logger.info(f"Job result saved to Supabase for job_id: {job_id} ({storage['storage']}, {storage['size_bytes']} bytes)")
             return True
         except Exception as e:
             logger.error(f"Exception saving job result to Supabase: {str(e)}")
-            return False
\ No newline at end of file
+            return False
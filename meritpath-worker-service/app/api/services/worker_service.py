@@ -1,10 +1,16 @@
 import json
+import time
 import logging
 import asyncio
 from app.lib.sqs import SQSClient
 from app.api.services.number_printer_service import NumberPrinterService
 from app.api.services.supabase_service import SupabaseService
 from app.api.services.find_citer_service import FindCiterService
+from app.api.services.citer_papers_migration_service import CiterPapersMigrationService, MIGRATION_BATCH_SIZE
+from app.lib.instrumentation import JobProfile, bind_profile
+from app.lib import metrics, tracing
+from app.lib.job_profiler import SamplingProfiler, profiling_enabled
+from opentelemetry.trace import SpanKind
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +20,7 @@ class WorkerService:
         self.number_printer_service = NumberPrinterService()
         self.supabase_service = SupabaseService()
         self.find_citer_service = FindCiterService()
+        self.citer_papers_migration_service = CiterPapersMigrationService()
         self.running = False
         self.max_concurrent_jobs = max_concurrent_jobs
         self.active_tasks = set()
@@ -95,11 +102,31 @@ class WorkerService:
             task.add_done_callback(lambda t: self.active_tasks.discard(t) if t in self.active_tasks else None)
     
     async def process_message(self, message):
+        """
+        Process a single message in a span that continues the sender's trace
+        """
+        with tracing.tracer.start_as_current_span(
+            "process_message",
+            context=tracing.extract_message_context(message),
+            kind=SpanKind.CONSUMER,
+        ) as span:
+            # SentTimestamp is epoch milliseconds; the difference is time spent queued in SQS
+            sent_timestamp = (message.get('Attributes') or {}).get('SentTimestamp')
+            if sent_timestamp:
+                span.set_attribute("messaging.sqs.queue_wait_ms", max(0, int(time.time() * 1000) - int(sent_timestamp)))
+            await self._process_message(message, span)
+    
+    async def _process_message(self, message, span):
         """
         Process a single message completely independently
         """
         receipt_handle = message.get('ReceiptHandle')
         job_id = None
+        job_type = None
+        started = time.perf_counter()
+        
+        # Each message runs in its own task, so this profile only sees this job's calls
+        profile = bind_profile(JobProfile())
         
         try:
             # Get message body
@@ -128,6 +155,8 @@ class WorkerService:
             job_type = body.get('job_type')
             job_params = body.get('job_params', {})
             user_id = job_params.get('user_id')
+            span.set_attribute("meritpath.job_id", job_id)
+            span.set_attribute("meritpath.job_type", str(job_type))
             
             # Check if job already exists in database
             existing_job = await self.supabase_service.get_job(job_id)
@@ -184,15 +213,63 @@ class WorkerService:
                     }
                 else:
                     # Process the citation job - this will be non-blocking since each job runs in its own task
-                    result = await self.find_citer_service.process_citation_job(user_id)
+                    sampler = SamplingProfiler() if profiling_enabled(job_params) else None
+                    # Scheduled refreshes (CitationRefreshService) must see new citations, so they skip the disk cache
+                    refresh = job_params.get('trigger') == 'refresh'
+                    result = await self.find_citer_service.process_citation_job(user_id, profile, sampler, refresh=refresh)
+                    
+                    # Only now is the count that triggered the refresh caught up with; until then the
+                    # refresh service keeps seeing it as changed and retries the user
+                    if refresh and result.get('status') == 'success' and job_params.get('citations') is not None:
+                        await self.supabase_service.record_citation_count(user_id, job_params['citations'])
+                    
+                    if sampler is not None:
+                        # Keep the full stacks out of the result; it only gets the overview
+                        result["sampling_profile"] = sampler.summary()
+                        await self.supabase_service.save_job_profile(job_id, sampler.folded(), sampler.summary())
+            elif job_type == 'find_citers_batch':
+                # Several users (e.g. a research group) crawled in one pass
+                user_ids = job_params.get('user_ids') or []
+                if not user_ids:
+                    result = {
+                        "status": "failed",
+                        "error": "Missing required parameter: user_ids"
+                    }
+                else:
+                    sampler = SamplingProfiler() if profiling_enabled(job_params) else None
+                    result = await self.find_citer_service.process_citation_batch_job(user_ids, profile, sampler)
+                    
+                    if sampler is not None:
+                        result["sampling_profile"] = sampler.summary()
+                        await self.supabase_service.save_job_profile(job_id, sampler.folded(), sampler.summary())
+            elif job_type == 'migrate_user_citer_papers':
+                # One-off conversion of legacy user_citers.papers blobs; user_id optionally limits it to one user.
+                # Jobs sent through the API carry authenticated_user_id and may only migrate that user;
+                # the whole table is migrated by jobs operators send to the queue directly
+                authenticated_user_id = job_params.get('authenticated_user_id')
+                if authenticated_user_id and user_id != authenticated_user_id:
+                    result = {
+                        "status": "failed",
+                        "error": "user_id must be the authenticated user"
+                    }
+                else:
+                    async def report_progress(progress):
+                        await self.supabase_service.update_job_progress(job_id, progress)
+                    
+                    result = await self.citer_papers_migration_service.migrate(
+                        report_progress,
+                        user_id=user_id,
+                        batch_size=int(job_params.get('batch_size') or MIGRATION_BATCH_SIZE)
+                    )
             else:
                 logger.warning(f"Unknown job type: {job_type}")
                 result = {"status": "failed", "error": f"Unknown job type: {job_type}"}
             
-            logger.info(f"Job {job_id} completed with result: {result}")
-            
             # Update job status and save result
             status = result.get('status', 'unknown')
+            # Results can be large; the stored summary is what to look at
+            logger.info(f"Job {job_id} completed with status {status}")
+            metrics.record_job(job_type, status, time.perf_counter() - started)
             await self.supabase_service.update_job_status(job_id, status, result)
             
             # Delete the message after successful processing
@@ -202,6 +279,7 @@ class WorkerService:
             logger.error(f"Error processing message for job {job_id}: {str(e)}")
             # Update job status to 'failed' if we have a job_id
             if job_id:
+                metrics.record_job(job_type, 'failed', time.perf_counter() - started)
                 await self.supabase_service.update_job_status(job_id, 'failed', {"error": str(e)})
             # Delete the message to avoid reprocessing
             await self.sqs_client.delete_message(receipt_handle)
\ No newline at end of file
@@ -2,11 +2,14 @@
 import asyncio
 import logging
 from app.api.services.worker_service import WorkerService
+from app.api.services.citation_refresh_service import CitationRefreshService, CITATION_REFRESH_ENABLED
 
 logger = logging.getLogger(__name__)
 
 worker_service = None
 worker_task = None
+refresh_service = None
+refresh_task = None
 
 async def start_worker_service():
     """
@@ -22,6 +25,8 @@ async def start_worker_service():
         # Create a new background task that doesn't block startup
         worker_task = asyncio.create_task(run_worker())
         logger.info("Worker service task created")
+    
+    await start_refresh_service()
 
 async def run_worker():
     """
@@ -35,12 +40,34 @@ async def run_worker():
     except Exception as e:
         logger.error(f"Error in worker service: {str(e)}")
 
+async def start_refresh_service():
+    """
+    Start the scheduled citation refresh if CITATION_REFRESH_ENABLED is set
+    """
+    global refresh_service, refresh_task
+    
+    if not CITATION_REFRESH_ENABLED:
+        return
+    
+    if refresh_service is None:
+        refresh_service = CitationRefreshService()
+    
+    if refresh_task is None or refresh_task.done():
+        refresh_task = asyncio.create_task(refresh_service.run())
+        logger.info("Citation refresh task created")
+
 async def stop_worker_service():
     """
     Stop the worker service
     """
     global worker_service, worker_task
     
+    if refresh_service:
+        refresh_service.stop()
+    if refresh_task and not refresh_task.done():
+        # It only ever waits between ticks, so there is nothing to finish
+        refresh_task.cancel()
+    
     if worker_service:
         logger.info("Worker service stopping...")
         await worker_service.stop()
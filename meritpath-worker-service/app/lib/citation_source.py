@@ -0,0 +1,496 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from collections import Counter, OrderedDict
+from requests import Session
+from requests.exceptions import HTTPError, RequestException
+import s2
+try:
+    from app.lib.s2_bulk import BulkDataset
+except ImportError:
+    # Imported as a top-level module by eb1_scripts/find_my_citers/detailed_citations.py
+    from s2_bulk import BulkDataset
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 3
+RETRY_DELAY = 5  # seconds
+DEFAULT_CACHE_SIZE = 100000  # in-memory entries per CachedCitationSource
+AUTHOR_BATCH_SIZE = 1000  # most ids the S2 author batch endpoint accepts per request
+S2_AUTHOR_BATCH_URL = "https://api.semanticscholar.org/graph/v1/author/batch"
+
+# Environment configuration for create_citation_source
+S2_API_KEY = os.getenv("S2_API_KEY")
+S2_BULK_INDEX = os.getenv("S2_BULK_INDEX")
+S2_MAX_RPS = float(os.getenv("S2_MAX_RPS", "0"))  # 0 disables rate limiting
+S2_CACHE_DIR = os.getenv("S2_CACHE_DIR")
+# Disk cache entries older than this are fetched again (unset or 0 keeps them forever)
+S2_CACHE_TTL_DAYS = float(os.getenv("S2_CACHE_TTL_DAYS", "0"))
+
+
+class RateLimiter:
+    """
+    Space out requests from all threads to at most max_rps per second
+    """
+    def __init__(self, max_rps):
+        self.interval = 1.0 / max_rps if max_rps and max_rps > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CitationSource:
+    """
+    Where a crawl gets Semantic Scholar-shaped data from.
+
+    Subclasses implement _fetch_author and _fetch_paper; every other lookup is
+    derived from those two. Records look like:
+        author: {"name": str, "papers": [{"title", "paperId", "year"}]}
+        paper:  {"citations": [{"title", "paperId", "year"}], "authors": [{"name", "authorId"}]}
+    Author affiliations and citation counts come from batched lookups.
+    Missing or failed lookups return None. Upstream calls and errors are counted
+    by endpoint in self.calls / self.errors, and timed into self.profile (a
+    JobProfile) when one is bound.
+    """
+    max_retries = MAX_RETRIES
+    retry_delay = RETRY_DELAY
+
+    def __init__(self):
+        self.calls = Counter()
+        self.errors = Counter()
+        self._stats_lock = threading.Lock()
+        self.profile = None
+
+    def bind_profile(self, profile):
+        """
+        Record upstream calls, retries and backoff sleeps into profile
+        """
+        self.profile = profile
+
+    def _fetch_author(self, author_id):
+        raise NotImplementedError
+
+    def _fetch_paper(self, paper_id):
+        raise NotImplementedError
+
+    def _fetch_author_citation_counts(self, author_ids):
+        raise NotImplementedError
+
+    def _fetch_author_affiliations(self, author_ids):
+        raise NotImplementedError
+
+    def _call(self, endpoint, func, *args):
+        """
+        Call func with exponential backoff on HTTP/request errors
+        """
+        for attempt in range(self.max_retries):
+            with self._stats_lock:
+                self.calls[endpoint] += 1
+            started = time.perf_counter()
+            try:
+                result = func(*args)
+                if self.profile is not None:
+                    self.profile.record_call("s2", endpoint, time.perf_counter() - started)
+                return result
+            except (HTTPError, RequestException) as e:
+                with self._stats_lock:
+                    self.errors[endpoint] += 1
+                if self.profile is not None:
+                    self.profile.record_call("s2", endpoint, time.perf_counter() - started, error=True)
+                if attempt == self.max_retries - 1:
+                    logger.error(f"Error after {self.max_retries} attempts: {e}")
+                    return None
+                wait_time = self.retry_delay * (2 ** attempt)
+                logger.info(f"API Error: {e}. Retrying in {wait_time} seconds...")
+                if self.profile is not None:
+                    self.profile.record_retry("s2", wait_time)
+                time.sleep(wait_time)
+
+    def get_author(self, author_id):
+        return self._call("author", self._fetch_author, author_id)
+
+    def get_paper(self, paper_id):
+        return self._call("paper", self._fetch_paper, paper_id)
+
+    def get_authors(self, author_ids):
+        """
+        Batch variant of get_author, returns {author_id: record}
+        """
+        return {author_id: self.get_author(author_id) for author_id in author_ids}
+
+    def get_papers(self, paper_ids):
+        """
+        Batch variant of get_paper, returns {paper_id: record}
+        """
+        return {paper_id: self.get_paper(paper_id) for paper_id in paper_ids}
+
+    def get_author_citation_counts(self, author_ids):
+        """
+        Author-level citation counts, returns {author_id: count}; None for
+        authors S2 doesn't know or chunks whose request failed
+        """
+        counts = {}
+        author_ids = list(author_ids)
+        for i in range(0, len(author_ids), AUTHOR_BATCH_SIZE):
+            batch_ids = author_ids[i:i + AUTHOR_BATCH_SIZE]
+            batch_counts = self._call("author_batch", self._fetch_author_citation_counts, batch_ids) or {}
+            for author_id in batch_ids:
+                counts[author_id] = batch_counts.get(author_id)
+        return counts
+
+    def get_author_affiliations(self, author_ids):
+        """
+        Author affiliations, returns {author_id: [affiliation]}; authors S2
+        doesn't know and chunks whose request failed are left out
+        """
+        affiliations = {}
+        author_ids = list(author_ids)
+        for i in range(0, len(author_ids), AUTHOR_BATCH_SIZE):
+            batch_ids = author_ids[i:i + AUTHOR_BATCH_SIZE]
+            affiliations.update(self._call("author_batch", self._fetch_author_affiliations, batch_ids) or {})
+        return affiliations
+
+    def get_author_papers(self, author_id):
+        author = self.get_author(author_id)
+        return author["papers"] if author else []
+
+    def get_paper_details(self, paper_id):
+        return self.get_paper(paper_id) or {"citations": [], "authors": []}
+
+    def get_citations(self, paper_id):
+        return self.get_paper_details(paper_id)["citations"]
+
+    def get_paper_authors(self, paper_id):
+        return self.get_paper_details(paper_id)["authors"]
+
+    def stats(self):
+        with self._stats_lock:
+            return {"calls": dict(self.calls), "errors": dict(self.errors)}
+
+
+class S2CitationSource(CitationSource):
+    """
+    Live Semantic Scholar API through PyS2
+    """
+    def __init__(self, session=None, api_key=S2_API_KEY, rate_limiter=None):
+        super().__init__()
+        self.session = session or Session()
+        if api_key:
+            self.session.headers.update({"x-api-key": api_key})
+        self.rate_limiter = rate_limiter
+
+    def _wait(self):
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+
+    def _fetch_author(self, author_id):
+        self._wait()
+        author = s2.api.get_author(authorId=author_id, session=self.session)
+        if not author:
+            return None
+        return {
+            "name": author.name,
+            "papers": [{"title": paper.title, "paperId": paper.paperId, "year": paper.year} for paper in author.papers]
+        }
+
+    def _fetch_paper(self, paper_id):
+        self._wait()
+        paper = s2.api.get_paper(paperId=paper_id, session=self.session)
+        if not paper:
+            return None
+        return {
+            "citations": [
+                {"title": citation.title, "paperId": citation.paperId, "year": citation.year}
+                for citation in paper.citations
+            ],
+            "authors": [{"name": author.name, "authorId": author.authorId} for author in paper.authors]
+        }
+
+    def _fetch_author_batch(self, author_ids, field):
+        # PyS2 has no batch endpoint (and its author endpoint has no affiliations), so this goes through the session directly
+        self._wait()
+        response = self.session.post(S2_AUTHOR_BATCH_URL, params={"fields": field}, json={"ids": author_ids})
+        response.raise_for_status()
+        # Unknown ids come back as null entries, in request order
+        return {
+            author_id: author.get(field)
+            for author_id, author in zip(author_ids, response.json())
+            if author
+        }
+
+    def _fetch_author_citation_counts(self, author_ids):
+        return self._fetch_author_batch(author_ids, "citationCount")
+
+    def _fetch_author_affiliations(self, author_ids):
+        return self._fetch_author_batch(author_ids, "affiliations")
+
+
+class BulkCitationSource(CitationSource):
+    """
+    Local index of Semantic Scholar Datasets dumps (see s2_bulk.py).
+
+    An index built without paper-ids files reports papers as CorpusID:<id>,
+    which never match the IDs stored by API crawls; with require_paper_ids
+    such an index is refused, otherwise only warned about.
+    """
+    def __init__(self, index_path, require_paper_ids=False):
+        super().__init__()
+        self.dataset = BulkDataset(index_path)
+        if not self.dataset.has_paper_ids():
+            message = f"S2 bulk index {index_path} was built without paper-ids files, so papers are identified as CorpusID:<id>"
+            if require_paper_ids:
+                raise ValueError(f"{message}; rebuild it with --paper-ids")
+            logger.warning(message)
+
+    def _fetch_author(self, author_id):
+        author = self.dataset.get_author(author_id)
+        if not author:
+            return None
+        return {"name": author["name"], "papers": self.dataset.get_author_papers(author_id)}
+
+    def _fetch_paper(self, paper_id):
+        return self.dataset.get_paper_details(paper_id)
+
+    def _fetch_author_citation_counts(self, author_ids):
+        return {author_id: self.dataset.get_author_citation_count(author_id) for author_id in author_ids}
+
+    def _fetch_author_affiliations(self, author_ids):
+        authors = {author_id: self.dataset.get_author(author_id) for author_id in author_ids}
+        return {author_id: author["affiliations"] for author_id, author in authors.items() if author}
+
+
+class CachedCitationSource(CitationSource):
+    """
+    LRU memory cache, optionally backed by an on-disk JSON cache, in front of
+    another source. Failed lookups (None) are not cached. With refresh, the
+    disk cache is written but never read, so a crawl sees current data and
+    leaves it for later ones.
+    """
+    def __init__(self, source, max_entries=DEFAULT_CACHE_SIZE, cache_dir=None, ttl_days=None, refresh=False):
+        super().__init__()
+        self.source = source
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.ttl = ttl_days * 24 * 3600 if ttl_days and ttl_days > 0 else None
+        self.refresh = refresh
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, kind, key):
+        safe_key = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(key))
+        return os.path.join(self.cache_dir, kind, f"{safe_key}.json")
+
+    def _read_disk(self, kind, key):
+        path = self._path(kind, key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, kind, key, value):
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so an interrupted run never leaves a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(value, file)
+        os.replace(tmp_path, path)
+
+    def _cached(self, kind, key, fetch):
+        with self._lock:
+            value = self._entries.get((kind, key))
+            if value is not None:
+                self._entries.move_to_end((kind, key))
+                self.hits += 1
+                return value
+
+        value = self._read_disk(kind, key) if self.cache_dir and not self.refresh else None
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            value = fetch(key)
+            if value is not None and self.cache_dir:
+                self._write_disk(kind, key, value)
+        else:
+            with self._lock:
+                self.hits += 1
+
+        if value is not None:
+            with self._lock:
+                self._entries[(kind, key)] = value
+                self._entries.move_to_end((kind, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def bind_profile(self, profile):
+        super().bind_profile(profile)
+        self.source.bind_profile(profile)
+
+    def get_author(self, author_id):
+        return self._cached("authors", author_id, self.source.get_author)
+
+    def get_paper(self, paper_id):
+        return self._cached("papers", paper_id, self.source.get_paper)
+
+    def get_author_citation_counts(self, author_ids):
+        # Only asked for to detect changes, so never answered from the cache
+        return self.source.get_author_citation_counts(author_ids)
+
+    def get_author_affiliations(self, author_ids):
+        # Already batched and asked for once per job
+        return self.source.get_author_affiliations(author_ids)
+
+    def stats(self):
+        stats = self.source.stats()
+        with self._lock:
+            stats["cache"] = {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+        return stats
+
+
+class SyntheticCitationSource(CitationSource):
+    """
+    Deterministic fake citation graph for benchmarks and load tests.
+
+    Author A0 owns `papers` papers that receive `citations` citations in total
+    from generated citing papers. Citing papers are written by 1..authors_per_paper
+    authors drawn from a pool of `num_authors`, and every author also has
+    0..background_papers uncited papers. Author Ai is affiliated with
+    "Institution <i % institutions>". The same seed always yields the same graph.
+
+    latency (seconds) is slept on every call and error_rate is the probability a
+    call raises an HTTPError, so retries and slow upstreams can be simulated.
+    """
+    retry_delay = 0
+
+    def __init__(self, papers=5, citations=100, num_authors=1000, authors_per_paper=3,
+                 papers_cited_per_citation=3, background_papers=20, institutions=10,
+                 latency=0.0, error_rate=0.0, seed=0):
+        super().__init__()
+        self.latency = latency
+        self.error_rate = error_rate
+        self._error_rng = random.Random(f"{seed}:errors")
+        self._error_lock = threading.Lock()
+        self.user_author_id = "A0"
+        self.institutions = institutions
+        self._authors = {}
+        self._papers = {}
+        self._build(papers, citations, num_authors, authors_per_paper, papers_cited_per_citation, background_papers, seed)
+
+    def _add_paper(self, paper_id, title, year, author_ids):
+        self._papers[paper_id] = {
+            "title": title,
+            "year": year,
+            "citations": [],
+            "authors": [{"name": self._authors[author_id]["name"], "authorId": author_id} for author_id in author_ids]
+        }
+        for author_id in author_ids:
+            self._authors[author_id]["papers"].append({"title": title, "paperId": paper_id, "year": year})
+
+    def _build(self, papers, citations, num_authors, authors_per_paper, papers_cited_per_citation, background_papers, seed):
+        rng = random.Random(seed)
+        pool = [f"A{i}" for i in range(1, num_authors + 1)]
+        for author_id in [self.user_author_id] + pool:
+            self._authors[author_id] = {"name": f"Author {author_id}", "papers": []}
+
+        user_paper_ids = []
+        for i in range(papers):
+            coauthors = rng.sample(pool, min(len(pool), rng.randint(0, authors_per_paper - 1)))
+            paper_id = f"U{i}"
+            self._add_paper(paper_id, f"User paper {i}", 2010 + rng.randint(0, 10), [self.user_author_id] + coauthors)
+            user_paper_ids.append(paper_id)
+
+        remaining = citations if user_paper_ids else 0
+        index = 0
+        while remaining > 0:
+            cited_ids = rng.sample(user_paper_ids, min(remaining, rng.randint(1, min(papers_cited_per_citation, papers))))
+            author_ids = rng.sample(pool, min(len(pool), rng.randint(1, authors_per_paper)))
+            paper_id = f"C{index}"
+            year = 2015 + rng.randint(0, 10)
+            self._add_paper(paper_id, f"Citing paper {index}", year, author_ids)
+            for cited_id in cited_ids:
+                self._papers[cited_id]["citations"].append({"title": f"Citing paper {index}", "paperId": paper_id, "year": year})
+            remaining -= len(cited_ids)
+            index += 1
+
+        for author_id in pool:
+            for i in range(rng.randint(0, background_papers)):
+                self._authors[author_id]["papers"].append({"title": f"{author_id} paper {i}", "paperId": f"B{author_id}-{i}", "year": 2000 + i % 25})
+
+    def _simulate_upstream(self, endpoint, key):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate:
+            with self._error_lock:
+                failed = self._error_rng.random() < self.error_rate
+            if failed:
+                raise HTTPError(f"Synthetic error for {endpoint} {key}")
+
+    def _fetch_author(self, author_id):
+        self._simulate_upstream("author", author_id)
+        author = self._authors.get(author_id)
+        return {"name": author["name"], "papers": list(author["papers"])} if author else None
+
+    def _fetch_paper(self, paper_id):
+        self._simulate_upstream("paper", paper_id)
+        paper = self._papers.get(paper_id)
+        return {"citations": list(paper["citations"]), "authors": list(paper["authors"])} if paper else None
+
+    def _fetch_author_citation_counts(self, author_ids):
+        self._simulate_upstream("author_batch", len(author_ids))
+        return {
+            author_id: sum(len(self._papers[paper["paperId"]]["citations"])
+                           for paper in self._authors[author_id]["papers"] if paper["paperId"] in self._papers)
+            for author_id in author_ids
+            if author_id in self._authors
+        }
+
+    def _fetch_author_affiliations(self, author_ids):
+        self._simulate_upstream("author_batch", len(author_ids))
+        return {
+            author_id: [f"Institution {int(author_id[1:]) % self.institutions}"]
+            for author_id in author_ids
+            if author_id in self._authors
+        }
+
+    def graph_size(self):
+        return {
+            "authors": len(self._authors),
+            "papers": len(self._papers),
+            "citations": sum(len(paper["citations"]) for paper in self._papers.values())
+        }
+
+
+# Shared by every crawl in the process so concurrent jobs stay under S2_MAX_RPS together
+_shared_rate_limiter = RateLimiter(S2_MAX_RPS)
+
+
+def create_citation_source(refresh=False):
+    """
+    Build the source for one crawl from the environment: the bulk index if
+    S2_BULK_INDEX is set, otherwise the live API, behind a per-crawl cache
+    (backed by S2_CACHE_DIR when set, which refresh crawls don't read from)
+    """
+    if S2_BULK_INDEX:
+        # Papers are stored by S2 paper ID, so they must match those of API crawls
+        source = BulkCitationSource(S2_BULK_INDEX, require_paper_ids=True)
+    else:
+        source = S2CitationSource(rate_limiter=_shared_rate_limiter)
+    return CachedCitationSource(source, cache_dir=S2_CACHE_DIR, ttl_days=S2_CACHE_TTL_DAYS, refresh=refresh)
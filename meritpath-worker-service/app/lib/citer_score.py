@@ -0,0 +1,47 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Weights of the composite recommender score (see the score_user_citers SQL function)
+DEFAULT_WEIGHTS = {
+    "citations": 0.35,  # log-scaled citations of the user's work
+    "breadth": 0.2,  # distinct papers of the user cited
+    "seniority": 0.15,  # log-scaled paper count of the citer
+    "independence": 0.2,  # independence level, coauthor 0 .. independent 1
+    "recency": 0.1,  # latest year the citer cited the user
+}
+
+
+def score_weights(overrides=None):
+    """
+    The score weights: defaults, then RECOMMENDER_SCORE_WEIGHTS (JSON), then overrides.
+    Unknown features and negative or non-numeric weights are ignored.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    sources = []
+    if os.getenv("RECOMMENDER_SCORE_WEIGHTS"):
+        try:
+            sources.append(json.loads(os.getenv("RECOMMENDER_SCORE_WEIGHTS")))
+        except ValueError as e:
+            logger.error(f"Ignoring invalid RECOMMENDER_SCORE_WEIGHTS: {str(e)}")
+    if overrides:
+        sources.append(overrides)
+
+    for source in sources:
+        if not isinstance(source, dict):
+            logger.error(f"Ignoring score weights that are not an object: {source!r}")
+            continue
+        for feature, weight in source.items():
+            if feature not in DEFAULT_WEIGHTS:
+                logger.warning(f"Ignoring weight for unknown score feature {feature}")
+                continue
+            try:
+                weight = float(weight)
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring non-numeric weight for {feature}: {weight}")
+                continue
+            if weight >= 0:
+                weights[feature] = weight
+    return weights
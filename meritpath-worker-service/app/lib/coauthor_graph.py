@@ -0,0 +1,126 @@
+import re
+import ast
+from collections import defaultdict
+
+# Independence levels stored in user_citers.independence_level, closest relationship first
+COAUTHOR = "coauthor"  # coauthored one of the user's papers
+COLLABORATOR = "collaborator"  # coauthored with one of the user's coauthors (2 hops)
+SHARED_AFFILIATION = "shared_affiliation"  # shares an affiliation with the user or a coauthor
+INDEPENDENT = "independent"
+
+# Papers with more authors than this only link their anchor author (large consortium papers)
+MAX_CLIQUE_AUTHORS = 50
+
+
+def normalize_affiliations(affiliations):
+    """
+    Split an affiliations value (list or delimited string) into normalized names
+    """
+    if not affiliations:
+        return set()
+    if isinstance(affiliations, str):
+        try:
+            # Stored as the string form of a list, e.g. "['CMU', 'Google']"
+            parsed = ast.literal_eval(affiliations)
+            affiliations = parsed if isinstance(parsed, (list, tuple, set)) else [affiliations]
+        except (ValueError, SyntaxError):
+            affiliations = re.split(r"[;|\n]", affiliations)
+
+    names = set()
+    for affiliation in affiliations:
+        name = re.sub(r"\s+", " ", str(affiliation).strip(" '\"")).lower()
+        if name:
+            names.add(name)
+    return names
+
+
+class CoauthorGraph:
+    """
+    In-memory coauthor graph built from the author lists a job has already fetched.
+
+    Adjacency and affiliation sets are keyed by Semantic Scholar author ID, so
+    direct-coauthor checks are O(1) and 2-hop/affiliation checks are O(degree).
+    """
+    def __init__(self):
+        self.adjacency = defaultdict(set)
+        self.affiliations = defaultdict(set)
+        self._circle_affiliations = {}
+
+    def add_paper(self, author_ids, anchor=None):
+        """
+        Link the authors of one paper. Returns False if the paper was too large to link.
+
+        Args:
+            author_ids: Semantic Scholar author IDs of the paper
+            anchor: Author whose edges are always recorded, even on large papers
+        """
+        author_ids = {author_id for author_id in author_ids if author_id}
+
+        if len(author_ids) <= MAX_CLIQUE_AUTHORS:
+            for author_id in author_ids:
+                self.adjacency[author_id].update(author_ids - {author_id})
+        elif anchor in author_ids:
+            self.adjacency[anchor].update(author_ids - {anchor})
+            for author_id in author_ids - {anchor}:
+                self.adjacency[author_id].add(anchor)
+        else:
+            return False
+
+        self._circle_affiliations.clear()
+        return True
+
+    def add_affiliations(self, author_id, affiliations):
+        """
+        Record affiliations for an author
+        """
+        names = normalize_affiliations(affiliations)
+        if names:
+            self.affiliations[author_id].update(names)
+            self._circle_affiliations.clear()
+
+    def coauthors(self, author_id):
+        return self.adjacency.get(author_id, set())
+
+    def is_coauthor(self, author_id, other_id):
+        return other_id in self.coauthors(author_id)
+
+    def is_two_hop(self, author_id, other_id):
+        """
+        Check whether two authors share a coauthor without having coauthored themselves
+        """
+        if author_id == other_id or self.is_coauthor(author_id, other_id):
+            return False
+        a, b = self.coauthors(author_id), self.coauthors(other_id)
+        if len(a) > len(b):
+            a, b = b, a
+        return not a.isdisjoint(b)
+
+    def circle_affiliations(self, author_id):
+        """
+        Affiliations of an author and their direct coauthors (cached until the graph changes)
+        """
+        if author_id not in self._circle_affiliations:
+            names = set(self.affiliations.get(author_id, ()))
+            for coauthor_id in self.coauthors(author_id):
+                names.update(self.affiliations.get(coauthor_id, ()))
+            self._circle_affiliations[author_id] = names
+        return self._circle_affiliations[author_id]
+
+    def shares_affiliation(self, author_id, other_id):
+        """
+        Check whether other_id shares an affiliation with author_id or one of their coauthors
+        """
+        names = self.affiliations.get(other_id)
+        return bool(names) and not names.isdisjoint(self.circle_affiliations(author_id))
+
+    def independence_level(self, user_author_id, citer_author_id):
+        """
+        Grade how independent a citer is from the user
+        """
+        if self.is_coauthor(user_author_id, citer_author_id):
+            return COAUTHOR
+        if self.is_two_hop(user_author_id, citer_author_id):
+            return COLLABORATOR
+        if self.shares_affiliation(user_author_id, citer_author_id):
+            return SHARED_AFFILIATION
+        return INDEPENDENT
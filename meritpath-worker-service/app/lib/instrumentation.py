@@ -0,0 +1,155 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.lib import metrics, tracing
+
+# The profile of the job running in the current task or executor thread
+_current_profile = ContextVar("job_profile", default=None)
+
+
+def current_profile():
+    """
+    Get the JobProfile bound to the current context, or None outside a job
+    """
+    return _current_profile.get()
+
+
+def bind_profile(profile):
+    """
+    Bind a JobProfile to the rest of the current context, e.g. a task per job
+    """
+    _current_profile.set(profile)
+    return profile
+
+
+@contextmanager
+def use_profile(profile):
+    """
+    Bind a JobProfile to the current context for the duration of the block
+    """
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def record_call(kind, name, seconds, error=False):
+    """
+    Report one attempt of an external call to the process metrics and, as a
+    span, to the current trace
+    """
+    metrics.record_call(kind, name, seconds, error)
+    tracing.record_span(f"{kind} {name}", seconds, {"meritpath.call.kind": kind, "meritpath.call.name": name}, error)
+
+
+def record_retry(kind, sleep_seconds):
+    metrics.record_retry(kind, sleep_seconds)
+
+
+def query_operation(query):
+    """
+    Name a PostgREST request builder as "<table>.<operation>", e.g. "citers.select"
+    """
+    path = str(getattr(query, "path", "")).strip("/")
+    method = getattr(query, "http_method", "")
+    if path.startswith("rpc/"):
+        return f"rpc.{path[len('rpc/'):]}"
+    prefer = str(getattr(query, "headers", {}).get("prefer", ""))
+    operation = {
+        "GET": "select",
+        "HEAD": "count",
+        "POST": "upsert" if "merge-duplicates" in prefer else "insert",
+        "PATCH": "update",
+        "DELETE": "delete",
+    }.get(method, method.lower() or "unknown")
+    return f"{path or 'unknown'}.{operation}"
+
+
+class JobProfile:
+    """
+    Per-job counters of external calls, retries and phase timings.
+
+    Calls are grouped by kind ("s2", "db") and name (S2 endpoint, or table and
+    operation). Every attempt counts as a call, so calls - errors is the number
+    that succeeded. Calls and retries are also reported with record_call and
+    record_retry. Safe to update from several threads.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._calls = {}  # (kind, name) -> [calls, errors, seconds]
+        self._retries = {}  # kind -> [retries, sleep seconds]
+        self._phases = {}
+        self._annotations = {}
+
+    def record_call(self, kind, name, seconds, error=False):
+        record_call(kind, name, seconds, error)
+        with self._lock:
+            entry = self._calls.setdefault((kind, name), [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += 1 if error else 0
+            entry[2] += seconds
+
+    def record_retry(self, kind, sleep_seconds):
+        record_retry(kind, sleep_seconds)
+        with self._lock:
+            entry = self._retries.setdefault(kind, [0, 0.0])
+            entry[0] += 1
+            entry[1] += sleep_seconds
+
+    def record_phase(self, name, seconds):
+        """
+        Add time spent in a stage of the job; repeated phases accumulate
+        """
+        with self._lock:
+            self._phases[name] = self._phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a block of the job with record_phase, inside a span of the same name
+        """
+        started = time.perf_counter()
+        try:
+            with tracing.tracer.start_as_current_span(name):
+                yield
+        finally:
+            self.record_phase(name, time.perf_counter() - started)
+
+    def annotate(self, key, value):
+        """
+        Attach extra data (e.g. cache stats) to the summary
+        """
+        with self._lock:
+            self._annotations[key] = value
+
+    def summary(self):
+        """
+        Compact, JSON-serializable breakdown of the job so far
+        """
+        with self._lock:
+            kinds = {}
+            for (kind, name), (calls, errors, seconds) in sorted(self._calls.items()):
+                totals = kinds.setdefault(kind, {"calls": 0, "errors": 0, "seconds": 0.0, "by_name": {}})
+                totals["calls"] += calls
+                totals["errors"] += errors
+                totals["seconds"] += seconds
+                totals["by_name"][name] = {"calls": calls, "errors": errors, "seconds": round(seconds, 3)}
+            for kind, (retries, sleep_seconds) in self._retries.items():
+                totals = kinds.setdefault(kind, {"calls": 0, "errors": 0, "seconds": 0.0, "by_name": {}})
+                totals["retries"] = retries
+                totals["retry_sleep_seconds"] = round(sleep_seconds, 3)
+            for totals in kinds.values():
+                totals["seconds"] = round(totals["seconds"], 3)
+                totals.setdefault("retries", 0)
+                totals.setdefault("retry_sleep_seconds", 0.0)
+
+            summary = {
+                "wall_seconds": round(time.perf_counter() - self.started, 3),
+                "phases": {name: round(seconds, 3) for name, seconds in self._phases.items()},
+                **kinds,
+            }
+            summary.update(self._annotations)
+        return summary
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import sysconfig
+import threading
+from collections import Counter
+
+# Profile every job when set (e.g. JOB_PROFILING=1); a job can also opt in with {"profile": true}
+JOB_PROFILING = os.getenv("JOB_PROFILING", "").lower() in ("1", "true", "yes")
+JOB_PROFILE_INTERVAL_MS = float(os.getenv("JOB_PROFILE_INTERVAL_MS", 5))
+# Stacks deeper than this are truncated at the root end
+MAX_STACK_DEPTH = 200
+# Standard library frames (thread bootstrap, waits) are left out of the inclusive summary
+STDLIB_PATH = sysconfig.get_paths()["stdlib"]
+
+
+def profiling_enabled(job_params):
+    """
+    Check whether a job asked for profiling, or profiling is on for every job
+    """
+    requested = (job_params or {}).get("profile")
+    if isinstance(requested, str):
+        requested = requested.lower() in ("1", "true", "yes")
+    return bool(requested) or JOB_PROFILING
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    # Folded stacks use ";" between frames
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack from a background thread.
+
+    Cheap enough for production-shaped jobs: the profiled thread is never
+    instrumented, it is only looked at every interval. The result is in the
+    folded-stack format read by flamegraph.pl, speedscope and inferno.
+    """
+    def __init__(self, interval_ms=JOB_PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self._stdlib_frames = set()
+        self.samples = 0
+        self.duration = 0.0
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def start(self, thread_id=None):
+        """
+        Start sampling thread_id (defaults to the calling thread)
+        """
+        self._thread_id = thread_id or threading.get_ident()
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        if self._sampler is None:
+            return
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+        self.duration += time.perf_counter() - self._started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                label = _frame_label(frame)
+                if frame.f_code.co_filename.startswith(STDLIB_PATH) and "site-packages" not in frame.f_code.co_filename:
+                    self._stdlib_frames.add(label)
+                stack.append(label)
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        """
+        The samples as folded stacks, one "root;...;leaf count" line per distinct stack
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def summary(self, top=10):
+        """
+        Compact overview for the job result: the functions most often on top of
+        the stack (self) and the application functions most often on it at all (total)
+        """
+        leaves = Counter()
+        totals = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            leaves[frames[-1]] += count
+            for frame in set(frames) - self._stdlib_frames:
+                totals[frame] += count
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "duration_seconds": round(self.duration, 3),
+            "top_self": [
+                {"frame": frame, "samples": count, "share": round(count / self.samples, 3)}
+                for frame, count in leaves.most_common(top)
+            ] if self.samples else [],
+            "top_total": [
+                {"frame": frame, "samples": count, "share": round(count / self.samples, 3)}
+                for frame, count in totals.most_common(top)
+            ] if self.samples else [],
+        }
@@ -0,0 +1,111 @@
+import time
+import asyncio
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from fastapi import Response
+
+# Buckets for Supabase and Semantic Scholar calls (seconds)
+CALL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Buckets for whole jobs, which run from seconds to hours (seconds)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400)
+
+REQUEST_DURATION = Histogram(
+    "meritpath_http_request_duration_seconds",
+    "HTTP request duration by route template",
+    ["method", "route", "status"],
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "meritpath_external_call_duration_seconds",
+    "Duration of each attempt of an external call",
+    ["kind", "name"],
+    buckets=CALL_BUCKETS,
+)
+EXTERNAL_CALL_FAILURES = Counter(
+    "meritpath_external_call_failures_total",
+    "Failed attempts of external calls",
+    ["kind", "name"],
+)
+RETRIES = Counter("meritpath_retries_total", "Retries of failed external calls", ["kind"])
+RETRY_SLEEP = Counter("meritpath_retry_sleep_seconds_total", "Time spent backing off before retries", ["kind"])
+CACHE_HITS = Counter("meritpath_cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("meritpath_cache_misses_total", "Cache misses", ["cache"])
+CACHE_HIT_RATIO = Gauge("meritpath_cache_hit_ratio", "Cache hits over lookups since start", ["cache"])
+
+JOB_DURATION = Histogram(
+    "meritpath_job_duration_seconds",
+    "Job processing time by job type and final status",
+    ["job_type", "status"],
+    buckets=JOB_BUCKETS,
+)
+JOB_FAILURES = Counter("meritpath_job_failures_total", "Jobs that finished failed or raised", ["job_type"])
+ACTIVE_JOBS = Gauge("meritpath_active_jobs", "Jobs currently being processed by this worker")
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "meritpath_executor_queue_depth",
+    "Work items waiting for a thread in the default executor",
+)
+
+_cache_totals = {}  # cache -> [hits, misses]
+
+
+def record_call(kind, name, seconds, error=False):
+    """
+    Observe one attempt of an external call. Same signature as JobProfile.record_call,
+    so either can be handed to code that records calls.
+    """
+    EXTERNAL_CALL_DURATION.labels(kind, name).observe(seconds)
+    if error:
+        EXTERNAL_CALL_FAILURES.labels(kind, name).inc()
+
+
+def record_retry(kind, sleep_seconds):
+    RETRIES.labels(kind).inc()
+    RETRY_SLEEP.labels(kind).inc(sleep_seconds)
+
+
+def record_cache(cache, hits=0, misses=0):
+    """
+    Add cache lookups and refresh the cache's hit ratio
+    """
+    CACHE_HITS.labels(cache).inc(hits)
+    CACHE_MISSES.labels(cache).inc(misses)
+    totals = _cache_totals.setdefault(cache, [0, 0])
+    totals[0] += hits
+    totals[1] += misses
+    lookups = totals[0] + totals[1]
+    CACHE_HIT_RATIO.labels(cache).set(totals[0] / lookups if lookups else 0)
+
+
+def record_job(job_type, status, seconds):
+    JOB_DURATION.labels(job_type or "unknown", status or "unknown").observe(seconds)
+    if status not in ("success", "completed"):
+        JOB_FAILURES.labels(job_type or "unknown").inc()
+
+
+def observe_requests(app):
+    """
+    Time every request, labelled by route template so path parameters don't explode cardinality
+    """
+    @app.middleware("http")
+    async def time_request(request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            REQUEST_DURATION.labels(
+                request.method, getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - started)
+
+
+def render(worker=None):
+    """
+    Refresh the point-in-time gauges and render the registry in the Prometheus text format
+    """
+    if worker is not None:
+        ACTIVE_JOBS.set(len(worker.active_tasks))
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    work_queue = getattr(executor, "_work_queue", None)
+    EXECUTOR_QUEUE_DEPTH.set(work_queue.qsize() if work_queue is not None else 0)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
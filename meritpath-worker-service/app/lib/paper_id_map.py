@@ -0,0 +1,66 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Upper bound on remembered papers per process; the least recently used are dropped first
+PAPER_ID_MAP_SIZE = int(os.getenv("PAPER_ID_MAP_SIZE", 500000))
+
+
+class PaperIdMap:
+    """
+    Bidirectional Semantic Scholar paper ID <-> papers.id map.
+
+    Safe to share between jobs and threads: papers.semantic_scholar_id is
+    unique, so a mapping never changes once a paper is stored.
+    """
+    def __init__(self, max_size=PAPER_ID_MAP_SIZE):
+        self.max_size = max_size
+        self._ids = OrderedDict()  # S2 paper ID -> papers.id
+        self._s2_ids = {}  # papers.id -> S2 paper ID
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, s2_id):
+        """
+        Get the papers.id of an S2 paper ID, or None if it isn't known
+        """
+        with self._lock:
+            paper_id = self._ids.get(s2_id)
+            if paper_id is None:
+                self.misses += 1
+                return None
+            self._ids.move_to_end(s2_id)
+            self.hits += 1
+            return paper_id
+
+    def s2_id(self, paper_id):
+        """
+        Get the S2 paper ID of a papers.id, or None if it isn't known
+        """
+        with self._lock:
+            return self._s2_ids.get(paper_id)
+
+    def add(self, s2_id, paper_id):
+        if not s2_id or not paper_id:
+            return
+        with self._lock:
+            self._ids[s2_id] = paper_id
+            self._ids.move_to_end(s2_id)
+            self._s2_ids[paper_id] = s2_id
+            while len(self._ids) > self.max_size:
+                _, evicted = self._ids.popitem(last=False)
+                self._s2_ids.pop(evicted, None)
+
+    def unknown(self, paper_ids):
+        """
+        The papers.ids in paper_ids that aren't mapped yet, for warming only what's missing
+        """
+        with self._lock:
+            return [paper_id for paper_id in paper_ids if paper_id not in self._s2_ids]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
@@ -0,0 +1,40 @@
+import math
+from datetime import timedelta
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minutes(text):
+    hours, minutes = text.strip().split(":")
+    return (int(hours) * 60 + int(minutes)) % MINUTES_PER_DAY
+
+
+class RefreshWindow:
+    """
+    A daily off-peak window in UTC written "HH:MM-HH:MM". It may wrap past
+    midnight ("22:00-04:00"), and equal ends ("00:00-00:00") mean all day.
+    """
+    def __init__(self, spec):
+        start, end = spec.split("-")
+        self.start = _minutes(start)
+        self.length = (_minutes(end) - self.start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+
+    def opened_at(self, now):
+        """
+        When the window containing now opened, or None outside the window
+        """
+        elapsed = (now.hour * 60 + now.minute - self.start) % MINUTES_PER_DAY
+        if elapsed >= self.length:
+            return None
+        return (now - timedelta(minutes=elapsed)).replace(second=0, microsecond=0)
+
+    def allowance(self, now, budget):
+        """
+        How many of budget jobs may have been started by now, spreading the
+        budget evenly over the window; 0 outside the window
+        """
+        opened = self.opened_at(now)
+        if opened is None:
+            return 0
+        elapsed = (now - opened).total_seconds() / (self.length * 60)
+        return min(budget, math.ceil(budget * elapsed))
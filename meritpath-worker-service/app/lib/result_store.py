@@ -0,0 +1,87 @@
+import os
+import gzip
+import json
+import base64
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Results up to this size (serialized JSON) stay inline in job_results.result
+RESULT_INLINE_MAX_BYTES = int(os.getenv("RESULT_INLINE_MAX_BYTES", 8192))
+# Larger results than this are not kept at all, only their summary
+RESULT_MAX_BYTES = int(os.getenv("RESULT_MAX_BYTES", 10 * 1024 * 1024))
+# Spill large results to gzipped files here (shared with the backend) instead of the job_result_blobs table
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR")
+# Items of a long list kept in a summary
+SUMMARY_LIST_ITEMS = 10
+# Nesting kept in a summary; deeper lists and objects are replaced by their size
+SUMMARY_DEPTH = 3
+
+ENCODING = "gzip+base64"
+
+
+def summarize_result(value, max_items=SUMMARY_LIST_ITEMS, depth=SUMMARY_DEPTH):
+    """
+    Small stand-in for a result: long lists become {"count", "head"} and
+    anything nested deeper than depth becomes {"count"}
+    """
+    if isinstance(value, dict):
+        if depth <= 0:
+            return {"count": len(value)}
+        return {key: summarize_result(item, max_items, depth - 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if depth <= 0:
+            return {"count": len(value)}
+        if len(value) > max_items:
+            return {"count": len(value), "head": [summarize_result(item, max_items, depth - 1) for item in value[:max_items]]}
+        return [summarize_result(item, max_items, depth - 1) for item in value]
+    if isinstance(value, str) and len(value) > 200:
+        return value[:200] + "..."
+    return value
+
+
+def compress_result(result):
+    """
+    Encode a result as gzipped JSON in base64, so it fits a text column
+    """
+    return base64.b64encode(gzip.compress(json.dumps(result, default=str).encode("utf-8"))).decode("ascii")
+
+
+def decompress_result(payload):
+    return json.loads(gzip.decompress(base64.b64decode(payload)).decode("utf-8"))
+
+
+def plan_result_storage(result, inline_max_bytes=RESULT_INLINE_MAX_BYTES, max_bytes=RESULT_MAX_BYTES, store_dir=RESULT_STORE_DIR):
+    """
+    Decide where a job result goes. Returns the job_results columns plus, for
+    spilled results, "payload" (the compressed result) to write elsewhere:
+        inline   small results, kept in job_results.result
+        blob     compressed into job_result_blobs
+        file     compressed into store_dir
+        summary  over max_bytes; only the summary is kept
+    """
+    size_bytes = len(json.dumps(result, default=str).encode("utf-8"))
+    if size_bytes <= inline_max_bytes:
+        # The full result is right there, so no summary
+        return {"summary": None, "size_bytes": size_bytes, "storage": "inline", "result": result}
+    row = {"summary": summarize_result(result), "size_bytes": size_bytes}
+    if size_bytes > max_bytes:
+        logger.warning(f"Dropping job result of {size_bytes} bytes (over RESULT_MAX_BYTES), keeping its summary")
+        return {**row, "storage": "summary", "result": None}
+    return {**row, "storage": "file" if store_dir else "blob", "result": None, "payload": compress_result(result)}
+
+
+def write_result_file(result_id, payload, store_dir=RESULT_STORE_DIR):
+    """
+    Write a compressed result under store_dir, named by its job_results row ID,
+    returning its location relative to store_dir
+    """
+    location = f"{result_id}.json.gz"
+    path = os.path.join(store_dir, location)
+    os.makedirs(store_dir, exist_ok=True)
+    # Write then rename so a reader never sees a partial file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(base64.b64decode(payload))
+    os.replace(tmp_path, path)
+    return location
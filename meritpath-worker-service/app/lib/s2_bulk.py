@@ -0,0 +1,335 @@
+import os
+import gzip
+import json
+import sqlite3
+import logging
+import argparse
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Rows buffered per executemany while building the index
+INSERT_BATCH_SIZE = 10000
+
+SCHEMA = """
+create table if not exists papers (
+    corpus_id integer primary key,
+    paper_id text,
+    title text,
+    year integer
+);
+create table if not exists paper_authors (
+    corpus_id integer not null,
+    position integer not null,
+    author_id integer not null,
+    name text,
+    primary key (corpus_id, position)
+) without rowid;
+create table if not exists authors (
+    author_id integer primary key,
+    name text,
+    paper_count integer,
+    affiliations text
+);
+create table if not exists citations (
+    cited integer not null,
+    citing integer not null,
+    primary key (cited, citing)
+) without rowid;
+create table if not exists meta (
+    key text primary key,
+    value
+);
+"""
+
+# Created after loading; building them once is much faster than maintaining them per insert
+INDEXES = """
+create index if not exists paper_authors_author_id_idx on paper_authors (author_id);
+create index if not exists papers_paper_id_idx on papers (paper_id);
+"""
+
+
+def _iter_records(paths):
+    """
+    Stream JSON records from JSONL files (gzipped or plain), skipping bad lines
+    """
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as file:
+            for line_number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping malformed line {line_number} in {path}")
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _insert_batched(conn, sql, rows):
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            conn.executemany(sql, batch)
+            count += len(batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def build_index(index_path, papers=(), citations=(), authors=(), paper_ids=()):
+    """
+    Build (or extend) a SQLite index from Semantic Scholar Datasets dumps.
+
+    Args:
+        index_path: SQLite file to write
+        papers: "papers" dataset files (corpusid, title, year, authors)
+        citations: "citations" dataset files (citingcorpusid, citedcorpusid)
+        authors: "authors" dataset files (authorid, name, papercount, affiliations)
+        paper_ids: "paper-ids" dataset files (sha, corpusid, primary), used to report
+            API-style paper IDs; without them papers are identified as CorpusID:<id>,
+            which never match the IDs of API crawls, so the worker refuses such an index
+
+    Returns:
+        Dict of row counts loaded per dataset
+    """
+    conn = sqlite3.connect(index_path)
+    conn.execute("pragma journal_mode = off")
+    conn.execute("pragma synchronous = off")
+    conn.executescript(SCHEMA)
+    counts = {}
+
+    def load_papers():
+        # The papers dump is the largest, so it is read once for both papers and paper_authors
+        paper_batch = []
+        author_batch = []
+        loaded = {"papers": 0, "paper_authors": 0}
+
+        def flush():
+            conn.executemany(
+                "insert into papers values (?, ?, ?, ?) "
+                "on conflict (corpus_id) do update set title = excluded.title, year = excluded.year",
+                paper_batch
+            )
+            conn.executemany("insert or replace into paper_authors values (?, ?, ?, ?)", author_batch)
+            loaded["papers"] += len(paper_batch)
+            loaded["paper_authors"] += len(author_batch)
+            paper_batch.clear()
+            author_batch.clear()
+
+        for record in _iter_records(papers):
+            corpus_id = _int_or_none(record.get("corpusid"))
+            if corpus_id is None:
+                continue
+            paper_batch.append((corpus_id, f"CorpusID:{corpus_id}", record.get("title"), _int_or_none(record.get("year"))))
+            for position, author in enumerate(record.get("authors") or []):
+                author_id = _int_or_none(author.get("authorId"))
+                if author_id is not None:
+                    author_batch.append((corpus_id, position, author_id, author.get("name")))
+            if len(paper_batch) >= INSERT_BATCH_SIZE:
+                flush()
+        flush()
+        return loaded
+
+    def citation_rows():
+        for record in _iter_records(citations):
+            cited = _int_or_none(record.get("citedcorpusid"))
+            citing = _int_or_none(record.get("citingcorpusid"))
+            if cited is not None and citing is not None:
+                yield cited, citing
+
+    def author_rows():
+        for record in _iter_records(authors):
+            author_id = _int_or_none(record.get("authorid"))
+            if author_id is not None:
+                affiliations = record.get("affiliations")
+                yield (
+                    author_id,
+                    record.get("name"),
+                    _int_or_none(record.get("papercount")),
+                    json.dumps(affiliations) if affiliations else None
+                )
+
+    def paper_id_rows():
+        for record in _iter_records(paper_ids):
+            corpus_id = _int_or_none(record.get("corpusid"))
+            if corpus_id is not None and record.get("sha") and record.get("primary", True):
+                yield record["sha"], corpus_id
+
+    with conn:
+        counts.update(load_papers())
+        counts["citations"] = _insert_batched(conn, "insert or ignore into citations values (?, ?)", citation_rows())
+        counts["authors"] = _insert_batched(conn, "insert or replace into authors values (?, ?, ?, ?)", author_rows())
+        counts["paper_ids"] = _insert_batched(conn, "update papers set paper_id = ? where corpus_id = ?", paper_id_rows())
+        # Papers with an API paper ID, over every build of this index
+        conn.execute(
+            "insert or replace into meta values ('paper_ids', "
+            "(select count(*) from papers where paper_id not like 'CorpusID:%'))"
+        )
+        mapped = conn.execute("select value from meta where key = 'paper_ids'").fetchone()[0]
+
+    conn.executescript(INDEXES)
+    conn.execute("analyze")
+    conn.close()
+
+    logger.info(f"Built S2 bulk index {index_path}: {counts}")
+    if not mapped:
+        logger.warning(f"{index_path} has no paper-ids mapping, so papers are CorpusID:<id> and the worker won't use it")
+    return counts
+
+
+class BulkDataset:
+    """
+    Read-only lookups against an index built by build_index, returning the same
+    shapes as the Semantic Scholar API helpers. Safe to share across threads.
+    """
+    def __init__(self, index_path):
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"S2 bulk index not found: {index_path}")
+        self.index_path = index_path
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        # sqlite3 connections can't be shared across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def has_paper_ids(self):
+        """
+        Whether the index maps corpus IDs to API paper IDs (built with paper-ids files)
+        """
+        try:
+            row = self.conn.execute("select value from meta where key = 'paper_ids'").fetchone()
+        except sqlite3.OperationalError:
+            # Built before the meta table existed
+            row = self.conn.execute(
+                "select count(*) from (select 1 from papers where paper_id not like 'CorpusID:%' limit 1)"
+            ).fetchone()
+        return bool(row and row[0])
+
+    def _corpus_id(self, paper_id):
+        """
+        Resolve an API paper ID, CorpusID:<n> or bare corpus ID to a corpus ID
+        """
+        paper_id = str(paper_id)
+        if paper_id.startswith("CorpusID:"):
+            return _int_or_none(paper_id[len("CorpusID:"):])
+        if paper_id.isdigit():
+            return int(paper_id)
+        row = self.conn.execute("select corpus_id from papers where paper_id = ?", (paper_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_author(self, author_id):
+        """
+        Get an author's name, paper count and affiliations, or None if unknown
+        """
+        author_id = _int_or_none(author_id)
+        row = self.conn.execute(
+            "select name, paper_count, affiliations from authors where author_id = ?", (author_id,)
+        ).fetchone()
+        if row:
+            return {
+                "authorId": str(author_id),
+                "name": row[0],
+                "paperCount": row[1],
+                "affiliations": json.loads(row[2]) if row[2] else []
+            }
+        # Fall back to the author lists on papers when the authors dataset wasn't loaded
+        row = self.conn.execute(
+            "select name, count(*) from paper_authors where author_id = ? group by author_id", (author_id,)
+        ).fetchone()
+        if row:
+            return {"authorId": str(author_id), "name": row[0], "paperCount": row[1], "affiliations": []}
+        return None
+
+    def get_author_citation_count(self, author_id):
+        """
+        Count the citations of an author's papers, or None if the author is unknown
+        """
+        row = self.conn.execute(
+            "select count(distinct pa.corpus_id), count(c.citing) "
+            "from paper_authors pa left join citations c on c.cited = pa.corpus_id "
+            "where pa.author_id = ?",
+            (_int_or_none(author_id),)
+        ).fetchone()
+        return row[1] if row and row[0] else None
+
+    def get_author_papers(self, author_id):
+        """
+        Get an author's papers as [{"title", "paperId", "year"}]
+        """
+        rows = self.conn.execute(
+            "select p.title, p.paper_id, p.year "
+            "from paper_authors pa join papers p on p.corpus_id = pa.corpus_id "
+            "where pa.author_id = ? order by p.year desc, p.corpus_id",
+            (_int_or_none(author_id),)
+        ).fetchall()
+        return [{"title": title, "paperId": paper_id, "year": year} for title, paper_id, year in rows]
+
+    def get_citations(self, paper_id):
+        """
+        Get the papers citing a paper as [{"title", "paperId", "year"}]
+        """
+        corpus_id = self._corpus_id(paper_id)
+        if corpus_id is None:
+            return []
+        rows = self.conn.execute(
+            "select p.title, p.paper_id, p.year "
+            "from citations c join papers p on p.corpus_id = c.citing "
+            "where c.cited = ?",
+            (corpus_id,)
+        ).fetchall()
+        return [{"title": title, "paperId": paper_id, "year": year} for title, paper_id, year in rows]
+
+    def get_paper_authors(self, paper_id):
+        """
+        Get a paper's authors in order as [{"name", "authorId"}]
+        """
+        corpus_id = self._corpus_id(paper_id)
+        if corpus_id is None:
+            return []
+        rows = self.conn.execute(
+            "select name, author_id from paper_authors where corpus_id = ? order by position",
+            (corpus_id,)
+        ).fetchall()
+        return [{"name": name, "authorId": str(author_id)} for name, author_id in rows]
+
+    def get_paper_details(self, paper_id):
+        """
+        Get a paper's citations and authors
+        """
+        return {"citations": self.get_citations(paper_id), "authors": self.get_paper_authors(paper_id)}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a local index from Semantic Scholar Datasets dumps")
+    parser.add_argument("--index", required=True, help="SQLite index file to write")
+    parser.add_argument("--papers", nargs="*", default=[], help="papers dataset files (*.jsonl.gz)")
+    parser.add_argument("--citations", nargs="*", default=[], help="citations dataset files (*.jsonl.gz)")
+    parser.add_argument("--authors", nargs="*", default=[], help="authors dataset files (*.jsonl.gz)")
+    parser.add_argument("--paper-ids", dest="paper_ids", nargs="*", default=[], help="paper-ids dataset files (*.jsonl.gz)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    build_index(args.index, args.papers, args.citations, args.authors, args.paper_ids)
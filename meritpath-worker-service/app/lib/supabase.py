@@ -1,10 +1,20 @@
 import os
+import asyncio
+import logging
+import time
+import random
+import httpx
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from app.lib import instrumentation
+from app.lib.instrumentation import current_profile, query_operation
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get Supabase configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -15,5 +25,220 @@ if not SUPABASE_URL:
 if not SUPABASE_KEY:
     raise ValueError("Missing SUPABASE_KEY environment variable")
 
-# Create Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+# Connection pool and retry configuration
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", 50))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", 20))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", 30))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", 10))  # seconds
+SUPABASE_MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", 3))
+SUPABASE_RETRY_BASE_DELAY = float(os.getenv("SUPABASE_RETRY_BASE_DELAY", 0.2))  # seconds
+SUPABASE_RETRY_MAX_DELAY = float(os.getenv("SUPABASE_RETRY_MAX_DELAY", 5))  # seconds
+
+# PostgREST / Postgres error codes that are safe to retry
+TRANSIENT_ERROR_CODES = {
+    "PGRST000",  # could not connect to the database
+    "PGRST001",  # internal connection error
+    "PGRST002",  # schema cache not ready
+    "PGRST003",  # timed out acquiring a pool connection
+    "08000", "08003", "08006",  # connection exceptions
+    "40001",  # serialization failure
+    "40P01",  # deadlock detected
+    "53300",  # too many connections
+    "57P01",  # admin shutdown
+}
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Of those, the gateway statuses after which the request may already have been applied
+AMBIGUOUS_STATUS_CODES = {408, 500, 502, 504}
+# Raised before the request was sent, so any request can be retried after them
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Functions that have the same effect when run twice (read-only, or replacing rather than appending rows)
+IDEMPOTENT_RPCS = {
+    "record_citation_counts",
+    "refresh_user_citer_counts",
+    "replace_citation_years",
+    "score_user_citers",
+}
+
+# One pooled client per event loop; the loop is kept so worker threads can submit queries to it
+_client = None
+_client_loop = None
+# Closes of clients left behind by a previous loop, referenced until they finish
+_closing = set()
+
+
+def _create_client():
+    """
+    Create a PostgREST client backed by a pooled HTTP/2 keep-alive connection
+    """
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+    )
+    return AsyncPostgrestClient(
+        f"{SUPABASE_URL}/rest/v1",
+        headers={
+            "apikey": SUPABASE_KEY,
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        },
+        http_client=http_client,
+    )
+
+
+def get_supabase():
+    """
+    Get the shared async Supabase (PostgREST) client.
+
+    The client is created lazily on the running event loop. Calls from a thread
+    without a running loop return the client owned by the main loop.
+    """
+    global _client, _client_loop
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None and (_client is None or _client_loop is not loop):
+        if _client is not None:
+            _discard_client(_client, _client_loop)
+        _client = _create_client()
+        _client_loop = loop
+    elif _client is None:
+        raise RuntimeError("Supabase client has not been initialised on an event loop")
+
+    return _client
+
+
+def _discard_client(client, loop):
+    """
+    Close the pooled connections of a client created on another event loop
+    """
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close_quietly(client), loop)
+    else:
+        # Its loop is gone, so release what can be released from the current one
+        task = asyncio.get_running_loop().create_task(_close_quietly(client))
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+
+async def _close_quietly(client):
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.debug(f"Error closing stale Supabase client: {e!r}")
+
+
+async def close_supabase():
+    """
+    Close the pooled connections of the shared client
+    """
+    global _client, _client_loop
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
+
+
+def is_idempotent(query):
+    """
+    Check whether running a query twice has the same effect as running it once:
+    reads, upserts with an on_conflict target and IDEMPOTENT_RPCS
+    """
+    method = getattr(query, "http_method", "")
+    path = str(getattr(query, "path", "")).strip("/")
+    if method in ("GET", "HEAD"):
+        return True
+    if path.startswith("rpc/"):
+        return path[len("rpc/"):] in IDEMPOTENT_RPCS
+    if method == "POST":
+        prefer = str(getattr(query, "headers", {}).get("prefer", ""))
+        return "resolution=" in prefer and "on_conflict" in getattr(query, "params", {})
+    return False
+
+
+def is_transient_error(error, idempotent=False):
+    """
+    Check whether a failed query is worth retrying. Timeouts and dropped
+    connections are only retried for idempotent queries, since the first
+    attempt may already have been applied.
+    """
+    if isinstance(error, CONNECT_ERRORS):
+        return True
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+        return idempotent
+    if isinstance(error, APIError):
+        # Non-JSON gateway errors carry the HTTP status as the code
+        code = str(error.code or "")
+        if code in TRANSIENT_ERROR_CODES:
+            return True
+        if not code.isdigit() or int(code) not in TRANSIENT_STATUS_CODES:
+            return False
+        return idempotent or int(code) not in AMBIGUOUS_STATUS_CODES
+    return False
+
+
+async def execute(query, timeout=None, max_retries=None, profile=None):
+    """
+    Execute a PostgREST query with a per-request timeout, retrying transient
+    errors with exponential backoff and full jitter (see is_transient_error).
+
+    Args:
+        query: A request builder, e.g. get_supabase().table("users").select("id")
+        timeout (float): Seconds before the attempt is abandoned (defaults to SUPABASE_TIMEOUT)
+        max_retries (int): Retries after the first attempt (defaults to SUPABASE_MAX_RETRIES)
+        profile (JobProfile): Records each attempt and retry (defaults to the current job's profile)
+    """
+    timeout = SUPABASE_TIMEOUT if timeout is None else timeout
+    max_retries = SUPABASE_MAX_RETRIES if max_retries is None else max_retries
+    profile = current_profile() if profile is None else profile
+    # A profile reports to the process metrics and trace itself; outside a job report directly
+    recorder = profile if profile is not None else instrumentation
+    operation = query_operation(query)
+    idempotent = is_idempotent(query)
+
+    for attempt in range(max_retries + 1):
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(query.execute(), timeout=timeout)
+            recorder.record_call("db", operation, time.perf_counter() - started)
+            return response
+        except Exception as e:
+            recorder.record_call("db", operation, time.perf_counter() - started, error=True)
+            if attempt == max_retries or not is_transient_error(e, idempotent):
+                raise
+            wait_time = random.uniform(0, min(SUPABASE_RETRY_MAX_DELAY, SUPABASE_RETRY_BASE_DELAY * (2 ** attempt)))
+            logger.warning(f"Transient Supabase error: {e!r}. Retrying in {wait_time:.2f} seconds...")
+            recorder.record_retry("db", wait_time)
+            await asyncio.sleep(wait_time)
+
+
+def execute_sync(query, timeout=None, max_retries=None, profile=None):
+    """
+    Execute a query from a worker thread on the loop that owns the shared client.
+    Blocks the calling thread, never the event loop.
+    """
+    if _client_loop is None:
+        raise RuntimeError("Supabase client has not been initialised on an event loop")
+
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+
+    if running_loop is _client_loop:
+        raise RuntimeError("execute_sync() cannot be called from the event loop thread; await execute() instead")
+
+    # The coroutine runs on the client's loop, so hand it this thread's profile explicitly
+    profile = current_profile() if profile is None else profile
+    future = asyncio.run_coroutine_threadsafe(execute(query, timeout, max_retries, profile), _client_loop)
+    return future.result()
@@ -0,0 +1,124 @@
+# Shared by both services. The canonical copy is meritpath-worker-service/app/lib/tracing.py;
+# meritpath-backend/app/lib/tracing.py must stay identical (each service's image is built from
+# its own directory, so they can't import one module). test/test_shared_modules.py checks this.
+import os
+import time
+import logging
+import threading
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+logger = logging.getLogger(__name__)
+
+# Export targets; tracing is a no-op when neither is set
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")  # e.g. http://localhost:4318 (Jaeger, collector)
+TRACE_FILE = os.getenv("TRACE_FILE")  # JSON lines, one span per line
+
+tracer = trace.get_tracer("meritpath")
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Append finished spans to a file as JSON lines, for inspecting traces without a collector
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as file:
+                for span in spans:
+                    file.write(span.to_json(indent=None) + "\n")
+            return SpanExportResult.SUCCESS
+        except OSError as e:
+            logger.error(f"Error writing spans to {self.path}: {str(e)}")
+            return SpanExportResult.FAILURE
+
+
+def setup_tracing(service_name):
+    """
+    Install a tracer provider exporting to OTEL_EXPORTER_OTLP_ENDPOINT and/or TRACE_FILE.
+    Returns the provider, or None when tracing is disabled.
+    """
+    if not OTEL_EXPORTER_OTLP_ENDPOINT and not TRACE_FILE:
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    if OTEL_EXPORTER_OTLP_ENDPOINT:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(
+            OTLPSpanExporter(endpoint=f"{OTEL_EXPORTER_OTLP_ENDPOINT.rstrip('/')}/v1/traces")
+        ))
+    if TRACE_FILE:
+        provider.add_span_processor(BatchSpanProcessor(JsonLinesSpanExporter(TRACE_FILE)))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled for {service_name} (otlp={OTEL_EXPORTER_OTLP_ENDPOINT}, file={TRACE_FILE})")
+    return provider
+
+
+def shutdown_tracing():
+    """
+    Flush buffered spans before the process exits
+    """
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def trace_requests(app):
+    """
+    Start a server span per request, continuing any incoming traceparent header
+    """
+    @app.middleware("http")
+    async def trace_request(request, call_next):
+        with tracer.start_as_current_span(
+            f"{request.method} {request.url.path}",
+            context=propagate.extract(dict(request.headers)),
+            kind=SpanKind.SERVER,
+        ) as span:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            if route is not None:
+                span.update_name(f"{request.method} {route.path}")
+            span.set_attribute("http.status_code", response.status_code)
+            return response
+
+
+def inject_message_attributes(message_attributes=None):
+    """
+    Add the current trace context to SQS message attributes
+    """
+    carrier = {}
+    propagate.inject(carrier)
+    attributes = dict(message_attributes or {})
+    for key, value in carrier.items():
+        attributes[key] = {"DataType": "String", "StringValue": value}
+    return attributes
+
+
+def extract_message_context(message):
+    """
+    Get the sender's trace context from a received SQS message
+    """
+    carrier = {
+        key: value.get("StringValue")
+        for key, value in (message.get("MessageAttributes") or {}).items()
+        if value.get("DataType") == "String"
+    }
+    return propagate.extract(carrier)
+
+
+def record_span(name, seconds, attributes=None, error=False, kind=SpanKind.CLIENT):
+    """
+    Record a span for an operation that just finished and took `seconds`,
+    as a child of the current span
+    """
+    end_time = time.time_ns()
+    span = tracer.start_span(name, kind=kind, attributes=attributes, start_time=end_time - int(seconds * 1e9))
+    if error:
+        span.set_status(Status(StatusCode.ERROR))
+    span.end(end_time=end_time)
@@ -0,0 +1,257 @@
+"""
+End-to-end benchmark of a find_citers job.
+
+Runs FindCiterService.process_citation_job (and so _process_citation_job_sync)
+against a SyntheticCitationSource and the in-memory PostgREST stand-in, once per
+graph size, each in a fresh process so peak RSS is per size. Emits JSON with wall
+time, API calls, DB round trips, peak RSS and throughput for regression tracking.
+
+Usage (from meritpath-worker-service/):
+    python -m benchmarks.bench_find_citers --sizes 10 100 1000 10000 --output find_citers.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import resource
+import multiprocessing
+from collections import Counter
+
+# Local defaults so the app package can be imported without a .env file
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "local-benchmark-key")
+os.environ.setdefault("SQS_TASK_QUEUE_URL", "http://localhost/tasks")
+os.environ.setdefault("SQS_RESULTS_QUEUE_URL", "http://localhost/results")
+
+BENCHMARK_USER_ID = "00000000-0000-0000-0000-00000000b0b0"
+
+
+def _rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def install_fake_postgrest(fake):
+    """
+    Point app.lib.supabase at the stand-in; everything above the HTTP transport is real
+    """
+    import httpx
+    from postgrest import AsyncPostgrestClient
+    from app.lib import supabase as supabase_lib
+
+    def create_client():
+        return AsyncPostgrestClient(
+            f"{supabase_lib.SUPABASE_URL}/rest/v1",
+            headers={"apikey": supabase_lib.SUPABASE_KEY, "Authorization": f"Bearer {supabase_lib.SUPABASE_KEY}"},
+            http_client=httpx.AsyncClient(transport=fake.transport()),
+        )
+
+    supabase_lib._create_client = create_client
+
+
+def refresh_user_citer_counts(fake, p_user_id):
+    """
+    Python stand-in for the refresh_user_citer_counts SQL function
+    """
+    edges = fake._index("user_citer_edges", "user_id").get(p_user_id, [])
+    updated = 0
+    for user_citer in fake._index("user_citers", "user_id").get(p_user_id, []):
+        citer_edges = [edge for edge in edges if edge["citer_id"] == user_citer["citer_id"]]
+        if not citer_edges:
+            continue
+        user_citer["total_citations"] = len(citer_edges)
+        user_citer["cited_papers_count"] = len({edge["cited_paper_id"] for edge in citer_edges})
+        user_citer["citing_papers_count"] = len({edge["citing_paper_id"] for edge in citer_edges})
+        updated += 1
+    return updated
+
+
+def replace_citation_years(fake, p_user_id, p_paper_years, p_citer_years):
+    """
+    Python stand-in for the replace_citation_years SQL function
+    """
+    user_years = Counter()
+    for row in p_paper_years:
+        user_years[row["year"]] += row["citations"]
+    for table, rows in (("paper_citation_years", p_paper_years), ("citer_citation_years", p_citer_years),
+                        ("user_citation_years", [{"year": year, "citations": count} for year, count in user_years.items()])):
+        fake.tables[table] = [row for row in fake.tables[table] if row["user_id"] != p_user_id]
+        fake._indexes.pop(table, None)
+        fake.seed(table, [{"user_id": p_user_id, **row} for row in rows])
+    return len(user_years)
+
+
+def score_user_citers(fake, p_user_id, p_weights):
+    """
+    Python stand-in for the score_user_citers SQL function
+    """
+    levels = {"independent": 1.0, "shared_affiliation": 0.66, "collaborator": 0.33}
+    citers = fake._index("citers", "id")
+    last_years = {}
+    for row in fake._index("citer_citation_years", "user_id").get(p_user_id, []):
+        last_years[row["citer_id"]] = max(row["year"], last_years.get(row["citer_id"], row["year"]))
+    user_citers = fake._index("user_citers", "user_id").get(p_user_id, [])
+    features = [{
+        "citations": math.log1p(row["total_citations"]),
+        "breadth": row["cited_papers_count"],
+        "seniority": math.log1p(citers[row["citer_id"]][0].get("paper_count") or 0),
+        "independence": levels.get(row.get("independence_level", "independent"), 0.0),
+        "recency": last_years.get(row["citer_id"]),
+    } for row in user_citers]
+    known_years = [f["recency"] for f in features if f["recency"] is not None]
+    first_year, year_span = (min(known_years), max(known_years) - min(known_years)) if known_years else (0, 0)
+    maxima = {key: max([f[key] for f in features] or [0]) for key in ("citations", "breadth", "seniority")}
+    for row, f in zip(user_citers, features):
+        f["recency"] = 0 if f["recency"] is None else ((f["recency"] - first_year) / year_span if year_span else 1)
+        for key, maximum in maxima.items():
+            f[key] = f[key] / maximum if maximum else 0
+        row["score"] = sum(p_weights[key] * f[key] for key in p_weights) / (sum(p_weights.values()) or 1)
+    return len(user_citers)
+
+
+async def run_job(config):
+    from app.lib import supabase as supabase_lib
+    from app.lib.citation_source import CachedCitationSource, SyntheticCitationSource
+    from app.api.services.find_citer_service import FindCiterService
+    from app.lib.job_profiler import SamplingProfiler
+    from benchmarks.fake_postgrest import FakePostgrest
+
+    fake = FakePostgrest(latency=config["db_latency_ms"] / 1000)
+    fake.register_rpc("refresh_user_citer_counts", refresh_user_citer_counts)
+    fake.register_rpc("replace_citation_years", replace_citation_years)
+    fake.register_rpc("score_user_citers", score_user_citers)
+    install_fake_postgrest(fake)
+    fake.seed("users", [{"id": BENCHMARK_USER_ID, "semantic_scholar_id": "A0"}])
+
+    synthetic = SyntheticCitationSource(
+        papers=config["papers"],
+        citations=config["citations"],
+        num_authors=max(20, int(config["citations"] * config["authors_per_citation"])),
+        latency=config["api_latency_ms"] / 1000,
+        error_rate=config["error_rate"],
+        seed=config["seed"],
+    )
+    sources = []
+
+    def citation_source_factory(refresh=False):
+        source = CachedCitationSource(synthetic)
+        sources.append(source)
+        return source
+
+    service = FindCiterService(citation_source_factory=citation_source_factory)
+    sampler = SamplingProfiler() if config.get("profile_output") else None
+    rss_before = _rss_mb()
+
+    start = time.perf_counter()
+    result = await service.process_citation_job(BENCHMARK_USER_ID, sampler=sampler)
+    wall_seconds = time.perf_counter() - start
+
+    if sampler is not None:
+        with open(f"{config['profile_output']}.{config['citations']}.folded", "w") as file:
+            file.write(sampler.folded() + "\n")
+
+    await supabase_lib.close_supabase()
+
+    stats = sources[0].stats() if sources else {"calls": {}, "errors": {}, "cache": {}}
+    db_calls = {f"{table}.{method}": count for (table, method), count in sorted(fake.requests.items())}
+    citations = synthetic.graph_size()["citations"]
+    return {
+        "citations": citations,
+        "status": result.get("status"),
+        "citers": len(fake.tables["citers"]),
+        "user_citer_edges": len(fake.tables["user_citer_edges"]),
+        "citation_years": len(fake.tables["user_citation_years"]),
+        "wall_seconds": round(wall_seconds, 3),
+        "citations_per_second": round(citations / wall_seconds, 2) if wall_seconds else None,
+        "api_calls": sum(stats["calls"].values()),
+        "api_calls_by_endpoint": stats["calls"],
+        "api_errors": sum(stats["errors"].values()),
+        "api_cache": stats.get("cache", {}),
+        "db_calls": sum(db_calls.values()),
+        "db_calls_by_table": db_calls,
+        "db_calls_per_citation": round(sum(db_calls.values()) / citations, 2) if citations else None,
+        "peak_rss_mb": _rss_mb(),
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+        "profile": result.get("profile"),
+        "sampling_profile": sampler.summary() if sampler is not None else None,
+    }
+
+
+def _run_in_child(config, queue):
+    logging.basicConfig(level=config["log_level"])
+    try:
+        queue.put(asyncio.run(run_job(config)))
+    except Exception as e:
+        queue.put({"citations": config["citations"], "status": "error", "error": repr(e)})
+
+
+def run_size(config):
+    """
+    Run one size in a fresh interpreter so peak RSS isn't inherited from earlier sizes
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_in_child, args=(config, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the find_citers job against a synthetic citation graph")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Citation counts to benchmark")
+    parser.add_argument("--papers", type=int, default=20, help="Papers owned by the benchmark user")
+    parser.add_argument("--authors-per-citation", type=float, default=1.0, help="Size of the citer pool relative to citations")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Simulated Semantic Scholar latency per call")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Simulated database round-trip latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of Semantic Scholar calls that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--profile-output", help="Sample each job and write folded stacks to <path>.<size>.folded")
+    args = parser.parse_args()
+
+    base_config = {
+        "papers": args.papers,
+        "authors_per_citation": args.authors_per_citation,
+        "api_latency_ms": args.api_latency_ms,
+        "db_latency_ms": args.db_latency_ms,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+        "log_level": args.log_level,
+        "profile_output": args.profile_output,
+    }
+    results = []
+    for size in args.sizes:
+        result = run_size({**base_config, "citations": size})
+        results.append(result)
+        print(
+            f"{size:>7} citations: {result.get('wall_seconds', '-')}s, "
+            f"{result.get('api_calls', '-')} API calls, {result.get('db_calls', '-')} DB calls, "
+            f"peak RSS {result.get('peak_rss_mb', '-')} MB",
+            file=sys.stderr,
+        )
+
+    report = {
+        "benchmark": "find_citers",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in base_config.items() if key not in ("log_level", "profile_output")},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
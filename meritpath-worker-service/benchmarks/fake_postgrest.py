@@ -0,0 +1,338 @@
+"""
+In-memory stand-in for Supabase's PostgREST API, served through httpx.MockTransport.
+
+Queries built with the real postgrest client go through app.lib.supabase.execute
+unchanged, so every HTTP request here is one database round trip. Supports the
+subset of PostgREST the services use: select (with one level of embedding),
+insert/upsert, update, delete, eq/neq/gt/gte/lt/lte/in/is/like/ilike/or filters,
+order, limit/offset, exact counts and registered RPC functions.
+"""
+import re
+import json
+import uuid
+import asyncio
+import itertools
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+import httpx
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _split_top_level(text, separator=","):
+    """
+    Split on separator, ignoring separators inside parentheses or double quotes
+    """
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == separator and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _singular(table):
+    return table[:-1] if table.endswith("s") else table
+
+
+def _unquote(value):
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _coerce(row_value, text):
+    """
+    Convert a filter value to the type of the stored value so they compare like Postgres would
+    """
+    if isinstance(row_value, bool):
+        return text.lower() == "true"
+    if isinstance(row_value, (int, float)):
+        try:
+            return type(row_value)(float(text)) if isinstance(row_value, int) and "." not in text else float(text)
+        except ValueError:
+            return text
+    return text
+
+
+def _like(pattern, value, flags=0):
+    regex = "^" + ".*".join(re.escape(part) for part in pattern.replace("*", "%").split("%")) + "$"
+    return value is not None and re.match(regex, str(value), flags | re.DOTALL) is not None
+
+
+def _in_options(value):
+    return [_unquote(option) for option in _split_top_level(value[1:-1] if value.startswith("(") else value)]
+
+
+def _matches(row, column, operator, value):
+    row_value = row.get(column)
+    if operator == "is":
+        target = {"null": None, "true": True, "false": False}.get(value.lower(), value)
+        return row_value is target if target is None or isinstance(target, bool) else row_value == target
+    if operator == "in":
+        # value is pre-split by _parse_condition
+        return row_value is not None and (row_value in value or _coerce(row_value, str(row_value)) in [_coerce(row_value, option) for option in value])
+    if operator in ("like", "ilike"):
+        return _like(value, row_value, re.IGNORECASE if operator == "ilike" else 0)
+    if row_value is None:
+        return False
+    value = _coerce(row_value, _unquote(value))
+    try:
+        return {
+            "eq": row_value == value,
+            "neq": row_value != value,
+            "gt": row_value > value,
+            "gte": row_value >= value,
+            "lt": row_value < value,
+            "lte": row_value <= value,
+        }[operator]
+    except (KeyError, TypeError):
+        return False
+
+
+def _parse_condition(condition):
+    """
+    Parse "column.op.value", "column.not.op.value", "or(...)" or "and(...)" into a predicate
+    """
+    for group in ("or", "and"):
+        if condition.startswith(f"{group}(") and condition.endswith(")"):
+            predicates = [_parse_condition(part) for part in _split_top_level(condition[len(group) + 1:-1])]
+            combine = any if group == "or" else all
+            return lambda row: combine(predicate(row) for predicate in predicates)
+    column, rest = condition.split(".", 1)
+    negate = rest.startswith("not.")
+    if negate:
+        rest = rest[4:]
+    operator, value = rest.split(".", 1)
+    if operator == "in":
+        value = set(_in_options(value))
+    if negate:
+        return lambda row: not _matches(row, column, operator, value)
+    return lambda row: _matches(row, column, operator, value)
+
+
+class FakePostgrest:
+    """
+    Tables are lists of dicts keyed by table name. Rows get a uuid id and created_at
+    when inserted without them. Equality lookups use lazily built hash indexes so
+    large benchmarks don't degrade into full scans.
+    """
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = defaultdict(list)
+        self.rpcs = {}
+        self.requests = Counter()  # (table or rpc name, method) -> count
+        self._indexes = defaultdict(dict)  # table -> column -> value -> [rows]
+        self._ids = itertools.count(1)
+
+    def register_rpc(self, name, func):
+        """
+        Serve POST /rpc/<name>; func(fake, **params) returns JSON-serializable data
+        """
+        self.rpcs[name] = func
+
+    def seed(self, table, rows):
+        for row in rows:
+            self._insert_row(table, dict(row))
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    def transport(self):
+        return httpx.MockTransport(self.handle)
+
+    # --- storage -------------------------------------------------------------
+
+    def _insert_row(self, table, row):
+        row.setdefault("id", str(uuid.UUID(int=next(self._ids))))
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        self.tables[table].append(row)
+        for column, index in self._indexes[table].items():
+            index.setdefault(row.get(column), []).append(row)
+        return row
+
+    def _index(self, table, column):
+        index = self._indexes[table].get(column)
+        if index is None:
+            index = {}
+            for row in self.tables[table]:
+                index.setdefault(row.get(column), []).append(row)
+            self._indexes[table][column] = index
+        return index
+
+    def _reindex(self, table, columns):
+        for column in columns:
+            self._indexes[table].pop(column, None)
+
+    def _lookup(self, table, column, targets):
+        """
+        Rows whose column equals any of the target strings, via the column's hash index
+        """
+        index = self._index(table, column)
+        rows = []
+        for target in targets:
+            # The stored type isn't known from the query string, so try each plausible one
+            lookups = [target]
+            if re.fullmatch(r"-?\d+", target):
+                lookups.append(int(target))
+            if target.lower() in ("true", "false"):
+                lookups.append(target.lower() == "true")
+            for lookup in lookups:
+                if lookup in index:
+                    rows.extend(index[lookup])
+                    break
+        return rows
+
+    def _candidates(self, table, filters):
+        """
+        Narrow the scan with the most selective eq/in filter
+        """
+        best = None
+        for key, value in filters:
+            if key in ("or", "and"):
+                continue
+            if value.startswith("eq."):
+                rows = self._lookup(table, key, [_unquote(value[3:])])
+            elif value.startswith("in."):
+                rows = self._lookup(table, key, set(_in_options(value[3:])))
+            else:
+                continue
+            if best is None or len(rows) < len(best):
+                best = rows
+        return best if best is not None else list(self.tables[table])
+
+    def _select_rows(self, table, params):
+        filters = [(key, value) for key, value in params if key not in RESERVED_PARAMS]
+        predicates = []
+        for key, value in filters:
+            if key in ("or", "and"):
+                predicates.append(_parse_condition(f"{key}{value}"))
+            else:
+                predicates.append(_parse_condition(f"{key}.{value}"))
+        return [row for row in self._candidates(table, filters) if all(predicate(row) for predicate in predicates)]
+
+    # --- projection ------------------------------------------------------------
+
+    def _embed(self, table, row, name, columns):
+        """
+        Embed a related table: many-to-one through row[<singular name>_id]
+        (user_citers.citer_id -> citers), otherwise one-to-many through
+        <name>.<singular table>_id (citers -> citer_citations.citer_id)
+        """
+        foreign_key = f"{_singular(name)}_id"
+        if foreign_key in row:
+            related = self._index(name, "id").get(row[foreign_key], [])
+            return self._project(name, related[0], columns) if related else None
+        back_reference = f"{_singular(table)}_id"
+        return [self._project(name, related, columns) for related in self._index(name, back_reference).get(row.get("id"), [])]
+
+    def _project(self, table, row, select):
+        if not select or select == "*":
+            return dict(row)
+        result = {}
+        for field in _split_top_level(select):
+            alias = None
+            if ":" in field.split("(")[0]:
+                alias, field = field.split(":", 1)
+            if field == "*":
+                result.update(row)
+            elif "(" in field:
+                name, columns = field.split("(", 1)
+                name = name.split("!")[0]
+                result[alias or name] = self._embed(table, row, name, columns[:-1])
+            else:
+                result[alias or field] = row.get(field)
+        return result
+
+    # --- HTTP ------------------------------------------------------------------
+
+    def _response(self, status, data=None, total=None, head=False):
+        headers = {"Content-Type": "application/json"}
+        if total is not None:
+            headers["Content-Range"] = f"0-{max(total - 1, 0)}/{total}"
+        content = b"" if head else json.dumps(data if data is not None else []).encode()
+        return httpx.Response(status, headers=headers, content=content)
+
+    async def handle(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        path = request.url.path.split("/rest/v1/", 1)[-1]
+        params = list(request.url.params.multi_items())
+        prefer = request.headers.get("prefer", "")
+        body = json.loads(request.content) if request.content else None
+
+        if path.startswith("rpc/"):
+            name = path[len("rpc/"):]
+            self.requests[(name, "RPC")] += 1
+            if name not in self.rpcs:
+                return self._response(404, {"code": "PGRST202", "message": f"Could not find the function {name}"})
+            return self._response(200, self.rpcs[name](self, **(body or {})))
+
+        table = path
+        method = request.method
+        self.requests[(table, method)] += 1
+        select = dict(params).get("select", "*")
+
+        if method in ("GET", "HEAD"):
+            rows = self._select_rows(table, params)
+            total = len(rows) if "count=exact" in prefer else None
+            for order in reversed(_split_top_level(dict(params).get("order", ""))):
+                column, *modifiers = order.split(".")
+                descending = "desc" in modifiers
+                # Postgres puts nulls last ascending and first descending unless told otherwise
+                nulls_first = "nullsfirst" in modifiers or (descending and "nullslast" not in modifiers)
+                present = [row for row in rows if row.get(column) is not None]
+                missing = [row for row in rows if row.get(column) is None]
+                present.sort(key=lambda row: row[column], reverse=descending)
+                rows = missing + present if nulls_first else present + missing
+            offset = int(dict(params).get("offset", 0))
+            limit = dict(params).get("limit")
+            rows = rows[offset:offset + int(limit) if limit else None]
+            return self._response(200, [self._project(table, row, select) for row in rows], total, head=method == "HEAD")
+
+        if method == "POST":
+            records = body if isinstance(body, list) else [body]
+            conflict = dict(params).get("on_conflict")
+            inserted = []
+            for record in records:
+                existing = None
+                if "resolution=" in prefer and conflict:
+                    keys = [key.strip() for key in conflict.split(",")]
+                    candidates = self._index(table, keys[0]).get(record.get(keys[0]), [])
+                    existing = next((row for row in candidates if all(row.get(key) == record.get(key) for key in keys)), None)
+                if existing is not None and "resolution=ignore-duplicates" in prefer:
+                    continue
+                if existing is not None:
+                    existing.update(record)
+                    self._reindex(table, record.keys())
+                    inserted.append(existing)
+                else:
+                    inserted.append(self._insert_row(table, dict(record)))
+            return self._response(201, [self._project(table, row, select) for row in inserted])
+
+        if method == "PATCH":
+            rows = self._select_rows(table, params)
+            for row in rows:
+                row.update(body)
+            self._reindex(table, body.keys())
+            return self._response(200, [self._project(table, row, select) for row in rows])
+
+        if method == "DELETE":
+            rows = self._select_rows(table, params)
+            doomed = {id(row) for row in rows}
+            self.tables[table] = [row for row in self.tables[table] if id(row) not in doomed]
+            self._indexes.pop(table, None)
+            return self._response(200, [self._project(table, row, select) for row in rows])
+
+        return self._response(405, {"code": "PGRST000", "message": f"Unsupported method {method}"})
@@ -0,0 +1,50 @@
+from app.lib.citation_source import CachedCitationSource, SyntheticCitationSource
+
+
+def test_synthetic_source_is_deterministic():
+    a = SyntheticCitationSource(papers=3, citations=50, num_authors=40, seed=7)
+    b = SyntheticCitationSource(papers=3, citations=50, num_authors=40, seed=7)
+    assert a.graph_size()["citations"] == 50
+    assert [a.get_paper_details(paper["paperId"]) for paper in a.get_author_papers("A0")] == \
+        [b.get_paper_details(paper["paperId"]) for paper in b.get_author_papers("A0")]
+
+
+def test_synthetic_errors_are_retried():
+    source = SyntheticCitationSource(papers=2, citations=10, error_rate=0.5, seed=1)
+    source.max_retries = 10
+    assert len(source.get_author_papers("A0")) == 2
+    assert source.calls["author"] == source.errors["author"] + 1
+
+
+def test_cached_source_hits_memory_then_disk(tmp_path):
+    inner = SyntheticCitationSource(papers=2, citations=10, seed=3)
+    cached = CachedCitationSource(inner, cache_dir=str(tmp_path))
+    first = cached.get_paper_authors("C0")
+    assert cached.get_paper_authors("C0") == first
+    assert inner.calls["paper"] == 1
+    assert cached.stats()["cache"] == {"hits": 1, "misses": 1, "entries": 1}
+
+    restarted = CachedCitationSource(SyntheticCitationSource(papers=2, citations=10, seed=3), cache_dir=str(tmp_path))
+    assert restarted.get_paper_authors("C0") == first
+    assert restarted.source.calls["paper"] == 0
+    assert cached.get_paper("missing") is None
+
+
+def test_author_citation_counts_are_batched():
+    source = SyntheticCitationSource(papers=3, citations=40, num_authors=10, seed=5)
+    cached = CachedCitationSource(source)
+    assert cached.get_author_citation_counts(["A0", "unknown"]) == {"A0": 40, "unknown": None}
+    assert source.calls["author_batch"] == 1
+
+
+def test_refresh_skips_disk_reads_but_writes(tmp_path):
+    CachedCitationSource(SyntheticCitationSource(papers=2, citations=10, seed=3), cache_dir=str(tmp_path)).get_paper("C0")
+
+    inner = SyntheticCitationSource(papers=2, citations=10, seed=3)
+    refreshing = CachedCitationSource(inner, cache_dir=str(tmp_path), refresh=True)
+    assert refreshing.get_paper("C0") is not None
+    assert inner.calls["paper"] == 1
+
+    reader = CachedCitationSource(SyntheticCitationSource(papers=2, citations=10, seed=3), cache_dir=str(tmp_path))
+    assert reader.get_paper("C0") == refreshing.get_paper("C0")
+    assert reader.source.calls["paper"] == 0
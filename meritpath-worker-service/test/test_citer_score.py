@@ -0,0 +1,19 @@
+from app.lib.citer_score import DEFAULT_WEIGHTS, score_weights
+
+
+def test_overrides_known_features_only(monkeypatch):
+    monkeypatch.setenv("RECOMMENDER_SCORE_WEIGHTS", '{"citations": 1, "recency": 0.5}')
+
+    weights = score_weights({"recency": "0", "breadth": -1, "h_index": 2})
+
+    assert weights["citations"] == 1.0
+    assert weights["recency"] == 0.0
+    assert weights["breadth"] == DEFAULT_WEIGHTS["breadth"]
+    assert "h_index" not in weights
+
+
+def test_invalid_environment_falls_back_to_defaults(monkeypatch):
+    for value in ("not json", "[1, 2]", "3"):
+        monkeypatch.setenv("RECOMMENDER_SCORE_WEIGHTS", value)
+
+        assert score_weights() == DEFAULT_WEIGHTS
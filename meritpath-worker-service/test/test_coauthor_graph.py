@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from app.lib.coauthor_graph import (
+    CoauthorGraph, normalize_affiliations,
+    COAUTHOR, COLLABORATOR, SHARED_AFFILIATION, INDEPENDENT, MAX_CLIQUE_AUTHORS
+)
+from app.lib.citation_source import CitationSource
+from app.lib.instrumentation import JobProfile
+from app.api.services import find_citer_service
+from app.api.services.find_citer_service import FindCiterService
+
+
+def build_graph():
+    graph = CoauthorGraph()
+    graph.add_paper(["user", "coauthor"], anchor="user")  # one of the user's papers
+    graph.add_paper(["coauthor", "collaborator"])  # a citing paper
+    graph.add_paper(["stranger"])
+    graph.add_affiliations("coauthor", "['Carnegie Mellon University']")
+    graph.add_affiliations("colleague", "carnegie mellon  university; Google")
+    graph.add_affiliations("stranger", ["MIT"])
+    return graph
+
+
+def test_independence_levels():
+    graph = build_graph()
+    assert graph.independence_level("user", "coauthor") == COAUTHOR
+    assert graph.independence_level("user", "collaborator") == COLLABORATOR
+    assert graph.independence_level("user", "colleague") == SHARED_AFFILIATION
+    assert graph.independence_level("user", "stranger") == INDEPENDENT
+
+
+def test_large_papers_only_link_the_anchor():
+    graph = CoauthorGraph()
+    authors = [f"a{i}" for i in range(MAX_CLIQUE_AUTHORS + 1)]
+    assert graph.add_paper(authors + ["user"], anchor="user")
+    assert graph.is_coauthor("user", "a0")
+    assert not graph.is_coauthor("a0", "a1")
+    assert not graph.add_paper(authors)
+
+
+def test_normalize_affiliations():
+    assert normalize_affiliations(None) == set()
+    assert normalize_affiliations("['CMU', ' Google ']") == {"cmu", "google"}
+    assert normalize_affiliations("CMU | Google") == {"cmu", "google"}
+
+
+class AffiliationSource(CitationSource):
+    def __init__(self, affiliations):
+        super().__init__()
+        self.affiliations = affiliations
+
+    def _fetch_author_affiliations(self, author_ids):
+        return {author_id: self.affiliations[author_id] for author_id in author_ids if author_id in self.affiliations}
+
+
+def test_finish_member_grades_shared_affiliations_from_the_source(monkeypatch):
+    service = FindCiterService()
+    # Nothing stored in the database, so every affiliation comes from the source
+    monkeypatch.setattr(find_citer_service, "get_supabase", MagicMock)
+    monkeypatch.setattr(service, "_execute", lambda query: SimpleNamespace(data=[]))
+    monkeypatch.setattr(service, "update_citation_counts", lambda user_id: True)
+    monkeypatch.setattr(service, "_save_citation_years", lambda *args: True)
+    monkeypatch.setattr(service, "_score_user_citers", lambda user_id: True)
+    levels = {}
+    monkeypatch.setattr(service, "_apply_independence_levels", lambda user_id, graded: levels.update(graded) or {})
+
+    graph = CoauthorGraph()
+    graph.add_paper(["user", "coauthor"], anchor="user")
+    graph.add_paper(["colleague"])
+    graph.add_paper(["peer"])
+    graph.add_paper(["stranger"])
+    source = AffiliationSource({
+        "user": ["Carnegie Mellon University"],
+        "coauthor": ["Google"],
+        "colleague": ["carnegie mellon university"],
+        "peer": ["Google", "MIT"],
+        "stranger": ["MIT"],
+    })
+    state = {
+        "semantic_scholar_id": "user",
+        "total_papers": 1,
+        "citer_ids_by_author": {"coauthor": 1, "colleague": 2, "peer": 3, "stranger": 4},
+        "paper_years": {},
+        "citer_years": {},
+    }
+    service._finish_member("user-id", state, graph, JobProfile(), source)
+
+    assert levels == {1: COAUTHOR, 2: SHARED_AFFILIATION, 3: SHARED_AFFILIATION, 4: INDEPENDENT}
+    assert source.calls["author_batch"] == 1
@@ -0,0 +1,29 @@
+from postgrest import AsyncPostgrestClient
+from app.lib.instrumentation import JobProfile, query_operation
+from app.lib.citation_source import CachedCitationSource, SyntheticCitationSource
+
+
+def test_query_operation_names_table_and_operation():
+    client = AsyncPostgrestClient("http://localhost/rest/v1")
+    assert query_operation(client.table("citers").select("id").eq("id", 1)) == "citers.select"
+    assert query_operation(client.table("citers").insert({"citer_name": "A"})) == "citers.insert"
+    assert query_operation(client.table("citers").upsert({"citer_name": "A"})) == "citers.upsert"
+    assert query_operation(client.table("citers").update({"paper_count": 1}).eq("id", 1)) == "citers.update"
+    assert query_operation(client.rpc("search_user_citers", {})) == "rpc.search_user_citers"
+
+
+def test_profile_records_s2_calls_and_retries():
+    profile = JobProfile()
+    source = CachedCitationSource(SyntheticCitationSource(papers=2, citations=10, error_rate=0.5, seed=1))
+    source.source.max_retries = 10
+    source.bind_profile(profile)
+    source.get_author_papers("A0")
+    source.get_author_papers("A0")
+
+    summary = profile.summary()
+    assert summary["s2"]["calls"] == summary["s2"]["errors"] + 1
+    assert summary["s2"]["retries"] == summary["s2"]["errors"]
+    assert summary["s2"]["by_name"]["author"]["calls"] == summary["s2"]["calls"]
+    with profile.phase("independence"):
+        pass
+    assert "independence" in profile.summary()["phases"]
@@ -0,0 +1,27 @@
+import time
+from app.lib.job_profiler import SamplingProfiler, profiling_enabled
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_folds_the_profiled_threads_stacks():
+    sampler = SamplingProfiler(interval_ms=1)
+    sampler.start()
+    busy_loop(0.2)
+    sampler.stop()
+
+    assert sampler.samples > 10
+    lines = sampler.folded().splitlines()
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == sampler.samples
+    assert any("busy_loop (test_job_profiler.py" in line for line in lines)
+    assert sampler.summary()["top_total"][0]["share"] == 1.0
+
+
+def test_profiling_is_opt_in_per_job():
+    assert profiling_enabled({"profile": True})
+    assert profiling_enabled({"profile": "true"})
+    assert not profiling_enabled({"user_id": "u"})
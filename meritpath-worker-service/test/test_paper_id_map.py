@@ -0,0 +1,25 @@
+from app.lib.paper_id_map import PaperIdMap
+
+
+def test_maps_both_ways_and_counts_lookups():
+    ids = PaperIdMap()
+    ids.add("S1", "uuid-1")
+
+    assert ids.get("S1") == "uuid-1"
+    assert ids.get("S2") is None
+    assert ids.s2_id("uuid-1") == "S1"
+    assert ids.unknown(["uuid-1", "uuid-2"]) == ["uuid-2"]
+    assert ids.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_evicts_least_recently_used():
+    ids = PaperIdMap(max_size=2)
+    ids.add("S1", "uuid-1")
+    ids.add("S2", "uuid-2")
+    ids.get("S1")
+    ids.add("S3", "uuid-3")
+
+    assert ids.get("S2") is None
+    assert ids.s2_id("uuid-2") is None
+    assert ids.get("S1") == "uuid-1"
+    assert len(ids) == 2
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+from app.lib.refresh_window import RefreshWindow
+
+
+def at(hour, minute=0):
+    return datetime(2026, 10, 19, hour, minute, tzinfo=timezone.utc)
+
+
+def test_budget_is_spread_over_the_window():
+    window = RefreshWindow("02:00-06:00")
+    assert window.opened_at(at(1, 59)) is None
+    assert window.allowance(at(6, 0), 40) == 0
+    assert window.opened_at(at(3, 15)) == at(2, 0)
+    assert window.allowance(at(2, 1), 40) == 1
+    assert window.allowance(at(3, 0), 40) == 10
+    assert window.allowance(at(5, 59), 40) == 40
+
+
+def test_window_wraps_past_midnight():
+    window = RefreshWindow("22:00-02:00")
+    assert window.opened_at(at(1, 30)) == datetime(2026, 10, 18, 22, 0, tzinfo=timezone.utc)
+    assert window.opened_at(at(12, 0)) is None
+    assert RefreshWindow("00:00-00:00").opened_at(at(12, 0)) == at(0, 0)
@@ -0,0 +1,31 @@
+import gzip
+import json
+from app.lib.result_store import decompress_result, plan_result_storage, summarize_result, write_result_file
+
+
+def test_small_results_stay_inline():
+    result = {"status": "success", "count": 3}
+    storage = plan_result_storage(result, inline_max_bytes=1024)
+    assert storage["storage"] == "inline"
+    assert storage["result"] == result
+    assert storage["summary"] is None
+    assert "payload" not in storage
+
+
+def test_large_results_are_compressed_with_a_summary(tmp_path):
+    result = {"status": "success", "numbers": list(range(1, 1001)), "count": 1000}
+    storage = plan_result_storage(result, inline_max_bytes=1024, store_dir=None)
+    assert storage["storage"] == "blob"
+    assert storage["result"] is None
+    assert storage["summary"] == {"status": "success", "numbers": {"count": 1000, "head": list(range(1, 11))}, "count": 1000}
+    assert decompress_result(storage["payload"]) == result
+
+    location = write_result_file("result", storage["payload"], store_dir=str(tmp_path))
+    with gzip.open(tmp_path / location, "rt", encoding="utf-8") as file:
+        assert json.load(file) == result
+
+    assert plan_result_storage(result, inline_max_bytes=1024, max_bytes=2048)["storage"] == "summary"
+
+
+def test_summary_limits_nesting():
+    assert summarize_result({"a": {"b": {"c": [1, 2]}}}, depth=2) == {"a": {"b": {"count": 1}}}
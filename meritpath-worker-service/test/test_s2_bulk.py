@@ -0,0 +1,79 @@
+import gzip
+import json
+import pytest
+from app.lib import s2_bulk
+from app.lib.s2_bulk import build_index, BulkDataset
+from app.lib.citation_source import BulkCitationSource
+
+
+def write_jsonl_gz(path, records):
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+def build_synthetic_index(tmp_path):
+    papers = write_jsonl_gz(tmp_path / "papers.jsonl.gz", [
+        {"corpusid": 1, "title": "Cited paper", "year": 2020,
+         "authors": [{"authorId": "100", "name": "Me"}, {"authorId": "101", "name": "Coauthor"}]},
+        {"corpusid": 2, "title": "Citing paper", "year": 2022,
+         "authors": [{"authorId": "200", "name": "Citer"}]},
+        {"corpusid": 3, "title": "Another citing paper", "year": 2023,
+         "authors": [{"authorId": "200", "name": "Citer"}, {"authorId": "101", "name": "Coauthor"}]},
+    ])
+    citations = write_jsonl_gz(tmp_path / "citations.jsonl.gz", [
+        {"citingcorpusid": 2, "citedcorpusid": 1},
+        {"citingcorpusid": 3, "citedcorpusid": 1},
+        {"citingcorpusid": 3, "citedcorpusid": 1},  # duplicates are ignored
+        {"citingcorpusid": 3, "citedcorpusid": None},
+    ])
+    authors = write_jsonl_gz(tmp_path / "authors.jsonl.gz", [
+        {"authorid": "200", "name": "Citer", "papercount": 42, "affiliations": ["CMU"]},
+    ])
+    paper_ids = write_jsonl_gz(tmp_path / "paper-ids.jsonl.gz", [
+        {"sha": "abc123", "corpusid": 1, "primary": True},
+    ])
+    index_path = str(tmp_path / "s2.sqlite")
+    counts = build_index(index_path, [papers], [citations], [authors], [paper_ids])
+    return index_path, counts
+
+
+def test_bulk_dataset_lookups(tmp_path):
+    index_path, counts = build_synthetic_index(tmp_path)
+    assert counts["papers"] == 3
+    dataset = BulkDataset(index_path)
+
+    assert dataset.get_author_papers("100") == [{"title": "Cited paper", "paperId": "abc123", "year": 2020}]
+    citations = dataset.get_citations("abc123")
+    assert sorted(citation["paperId"] for citation in citations) == ["CorpusID:2", "CorpusID:3"]
+    assert dataset.get_paper_authors("CorpusID:3") == [
+        {"name": "Citer", "authorId": "200"},
+        {"name": "Coauthor", "authorId": "101"},
+    ]
+    assert dataset.get_citations("unknown") == []
+    assert dataset.get_author("200")["paperCount"] == 42
+    assert dataset.get_author("101")["paperCount"] == 2  # falls back to paper author lists
+    assert dataset.get_author_citation_count("100") == 2
+    assert dataset.get_author_citation_count("200") == 0
+    assert dataset.get_author_citation_count("999") is None
+
+
+def test_papers_dump_is_read_once(tmp_path, monkeypatch):
+    read = []
+    iter_records = s2_bulk._iter_records
+    monkeypatch.setattr(s2_bulk, "_iter_records", lambda paths: read.extend(paths) or iter_records(paths))
+    index_path, counts = build_synthetic_index(tmp_path)
+    assert counts["papers"] == 3 and counts["paper_authors"] == 5
+    assert sum(path.startswith(str(tmp_path / "papers")) for path in read) == 1
+    assert BulkDataset(index_path).has_paper_ids()
+
+
+def test_index_without_paper_ids_is_refused_by_the_worker(tmp_path):
+    papers = write_jsonl_gz(tmp_path / "papers.jsonl.gz", [{"corpusid": 1, "title": "Paper", "year": 2020, "authors": []}])
+    index_path = str(tmp_path / "s2.sqlite")
+    build_index(index_path, [papers])
+    assert not BulkDataset(index_path).has_paper_ids()
+    with pytest.raises(ValueError):
+        BulkCitationSource(index_path, require_paper_ids=True)
+    assert BulkCitationSource(index_path).get_author_papers("1") == []
@@ -0,0 +1,16 @@
+import os
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+# Modules both services ship, canonical copy first
+SHARED_MODULES = [
+    ("meritpath-worker-service/app/lib/tracing.py", "meritpath-backend/app/lib/tracing.py"),
+]
+
+
+def test_shared_modules_are_identical():
+    for canonical, copy in SHARED_MODULES:
+        with open(os.path.join(REPO_ROOT, canonical), encoding="utf-8") as file:
+            expected = file.read()
+        with open(os.path.join(REPO_ROOT, copy), encoding="utf-8") as file:
+            assert file.read() == expected, f"{copy} has drifted from {canonical}"
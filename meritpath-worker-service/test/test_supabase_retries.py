@@ -0,0 +1,28 @@
+import asyncio
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from app.lib.supabase import is_idempotent, is_transient_error
+
+client = AsyncPostgrestClient("http://localhost/rest/v1")
+
+
+def test_only_idempotent_queries_are_idempotent():
+    assert is_idempotent(client.table("papers").select("id"))
+    assert is_idempotent(client.table("papers").upsert({"semantic_scholar_id": "p"}, on_conflict="semantic_scholar_id"))
+    assert is_idempotent(client.rpc("score_user_citers", {}))
+    assert not is_idempotent(client.table("citations").insert({"cited_paper_id": "a"}))
+    assert not is_idempotent(client.table("papers").upsert({"id": "p"}))
+    assert not is_idempotent(client.table("jobs").update({"status": "processing"}).eq("status", "pending"))
+    assert not is_idempotent(client.rpc("migrate_legacy_user_citer_papers", {}))
+
+
+def test_timeouts_are_only_retried_when_idempotent():
+    for error in (asyncio.TimeoutError(), httpx.ReadTimeout("read")):
+        assert is_transient_error(error, idempotent=True)
+        assert not is_transient_error(error, idempotent=False)
+    assert is_transient_error(httpx.ConnectError("refused"), idempotent=False)
+    assert is_transient_error(APIError({"code": "40001", "message": "serialization"}), idempotent=False)
+    assert is_transient_error(APIError({"code": "503", "message": "unavailable"}), idempotent=False)
+    assert not is_transient_error(APIError({"code": "504", "message": "gateway timeout"}), idempotent=False)
+    assert is_transient_error(APIError({"code": "504", "message": "gateway timeout"}), idempotent=True)
@@ -0,0 +1,156 @@
+-- Full-text and trigram search over a user's citers.
+-- Used by GET /api/users/{user_id}/citers/advanced?search=...
+
+create extension if not exists pg_trgm;
+
+-- Searchable text for the combined ("all") search field
+alter table public.citers
+    add column if not exists search_text text
+        generated always as (
+            lower(coalesce(citer_name, '') || ' ' || coalesce(location, '') || ' ' || coalesce(affiliations, ''))
+        ) stored;
+
+-- Weighted document: names rank above affiliations, affiliations above location
+alter table public.citers
+    add column if not exists search_vector tsvector
+        generated always as (
+            setweight(to_tsvector('simple'::regconfig, coalesce(citer_name, '')), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, coalesce(affiliations, '')), 'B') ||
+            setweight(to_tsvector('simple'::regconfig, coalesce(location, '')), 'C')
+        ) stored;
+
+create index if not exists citers_search_vector_idx on public.citers using gin (search_vector);
+create index if not exists citers_search_text_trgm_idx on public.citers using gin (search_text gin_trgm_ops);
+
+create index if not exists user_citers_user_id_idx on public.user_citers (user_id);
+
+-- Rank every citer of a user against p_query in one pass.
+-- A row matches when all query terms prefix-match its lexemes ("neub" -> "neubig")
+-- or when the query is word-similar to the field (typos, e.g. "nuebig").
+-- Relevance = ts_rank_cd of the prefix query + trigram word similarity.
+create or replace function public.search_user_citers(
+    p_user_id uuid,
+    p_query text,
+    p_field text default 'all',
+    p_independent boolean default null,
+    p_min_citations integer default null,
+    p_max_citations integer default null,
+    p_min_papers integer default null,
+    p_max_papers integer default null,
+    p_location text default null,
+    p_sort_by text default 'relevance',
+    p_sort_order text default 'desc',
+    p_limit integer default 10,
+    p_offset integer default 0,
+    p_min_similarity real default 0.3
+)
+returns table (
+    citer_id uuid,
+    semantic_scholar_id text,
+    citer_name text,
+    paper_count integer,
+    location text,
+    affiliations text,
+    total_citations integer,
+    selected boolean,
+    cited_papers_count integer,
+    citing_papers_count integer,
+    independent boolean,
+    relevance real,
+    total_count bigint
+)
+language plpgsql
+stable
+as $$
+#variable_conflict use_column
+declare
+    v_query text := lower(trim(coalesce(p_query, '')));
+    v_tsquery tsquery;
+begin
+    select to_tsquery('simple', string_agg(term || ':*', ' & '))
+      into v_tsquery
+      from (
+          select regexp_replace(word, '[^[:alnum:]]+', '', 'g') as term
+            from regexp_split_to_table(v_query, '\s+') as word
+      ) terms
+     where term <> '';
+
+    perform set_config('pg_trgm.word_similarity_threshold', p_min_similarity::text, true);
+
+    return query
+    with matched as (
+        select
+            c.id as citer_id,
+            c.semantic_scholar_id,
+            c.citer_name,
+            c.paper_count,
+            c.location,
+            c.affiliations,
+            uc.total_citations,
+            uc.selected,
+            uc.cited_papers_count,
+            uc.citing_papers_count,
+            uc.independent,
+            (coalesce(ts_rank_cd(f.document, v_tsquery), 0) + word_similarity(v_query, f.body))::real as relevance
+        from public.user_citers uc
+        join public.citers c on c.id = uc.citer_id
+        cross join lateral (
+            select
+                case p_field
+                    when 'citer_name' then lower(coalesce(c.citer_name, ''))
+                    when 'location' then lower(coalesce(c.location, ''))
+                    when 'affiliations' then lower(coalesce(c.affiliations, ''))
+                    else c.search_text
+                end as body,
+                case p_field
+                    when 'citer_name' then to_tsvector('simple', coalesce(c.citer_name, ''))
+                    when 'location' then to_tsvector('simple', coalesce(c.location, ''))
+                    when 'affiliations' then to_tsvector('simple', coalesce(c.affiliations, ''))
+                    else c.search_vector
+                end as document
+        ) f
+        where uc.user_id = p_user_id
+          and (p_independent is null or uc.independent = p_independent)
+          and (p_min_citations is null or uc.total_citations >= p_min_citations)
+          and (p_max_citations is null or uc.total_citations <= p_max_citations)
+          and (p_min_papers is null or c.paper_count >= p_min_papers)
+          and (p_max_papers is null or c.paper_count <= p_max_papers)
+          and (p_location is null or c.location ilike '%' || p_location || '%')
+          and (
+              v_query = ''
+              or f.document @@ v_tsquery
+              or v_query <% f.body
+          )
+    )
+    select m.*, count(*) over () as total_count
+      from matched m
+     order by
+        case when p_sort_order = 'desc' then
+            case p_sort_by
+                when 'relevance' then m.relevance::double precision
+                when 'total_citations' then m.total_citations
+                when 'paper_count' then m.paper_count
+                when 'cited_papers_count' then m.cited_papers_count
+                when 'citing_papers_count' then m.citing_papers_count
+                when 'independent' then m.independent::integer
+            end
+        end desc nulls last,
+        case when p_sort_order = 'asc' then
+            case p_sort_by
+                when 'relevance' then m.relevance::double precision
+                when 'total_citations' then m.total_citations
+                when 'paper_count' then m.paper_count
+                when 'cited_papers_count' then m.cited_papers_count
+                when 'citing_papers_count' then m.citing_papers_count
+                when 'independent' then m.independent::integer
+            end
+        end asc nulls last,
+        case when p_sort_by = 'citer_name' and p_sort_order = 'desc' then m.citer_name end desc,
+        case when p_sort_by = 'citer_name' and p_sort_order = 'asc' then m.citer_name end asc,
+        m.relevance desc,
+        m.total_citations desc,
+        m.citer_id
+     limit p_limit
+    offset p_offset;
+end;
+$$;
@@ -0,0 +1,144 @@
+-- Citation-graph lookups, each answered by a single SQL function.
+-- Used by the /api/citations routes through CitationGraphService.
+
+create index if not exists citations_cited_paper_id_idx on public.citations (cited_paper_id);
+create index if not exists citations_citing_paper_id_idx on public.citations (citing_paper_id);
+create index if not exists citer_citations_citation_id_idx on public.citer_citations (citation_id);
+create index if not exists citer_citations_citer_id_idx on public.citer_citations (citer_id);
+create index if not exists user_citers_user_id_citer_id_idx on public.user_citers (user_id, citer_id);
+
+-- Distinct citers of a paper, with how many of their papers cite it
+create or replace function public.citers_of_paper(p_paper_id uuid)
+returns table (
+    id uuid,
+    semantic_scholar_id text,
+    citer_name text,
+    paper_count integer,
+    location text,
+    affiliations text,
+    citation_count bigint
+)
+language sql
+stable
+as $$
+    select
+        c.id,
+        c.semantic_scholar_id,
+        c.citer_name,
+        c.paper_count,
+        c.location,
+        c.affiliations,
+        count(distinct ci.id) as citation_count
+    from public.citations ci
+    join public.citer_citations cc on cc.citation_id = ci.id
+    join public.citers c on c.id = cc.citer_id
+    where ci.cited_paper_id = p_paper_id
+    group by c.id
+    order by citation_count desc, c.citer_name;
+$$;
+
+-- Distinct papers citing any paper in p_paper_ids, with the subset each one cites
+create or replace function public.papers_citing(p_paper_ids uuid[])
+returns table (
+    id uuid,
+    semantic_scholar_id text,
+    title text,
+    year integer,
+    cited_paper_ids uuid[],
+    cited_papers_count bigint
+)
+language sql
+stable
+as $$
+    select
+        p.id,
+        p.semantic_scholar_id,
+        p.title,
+        p.year,
+        array_agg(distinct ci.cited_paper_id) as cited_paper_ids,
+        count(distinct ci.cited_paper_id) as cited_papers_count
+    from public.citations ci
+    join public.papers p on p.id = ci.citing_paper_id
+    where ci.cited_paper_id = any (p_paper_ids)
+    group by p.id
+    order by cited_papers_count desc, p.year desc nulls last;
+$$;
+
+-- Citers reached through chains of citations (papers citing the papers that cite
+-- p_paper_id, and so on up to p_max_depth). Each citer is reported once at its
+-- nearest degree; direct (degree 1) citers are excluded.
+create or replace function public.second_degree_citers(p_paper_id uuid, p_max_depth integer default 2)
+returns table (
+    id uuid,
+    semantic_scholar_id text,
+    citer_name text,
+    paper_count integer,
+    location text,
+    affiliations text,
+    degree integer,
+    citation_count bigint
+)
+language sql
+stable
+as $$
+    with recursive chain (citation_id, citing_paper_id, depth) as (
+        select ci.id, ci.citing_paper_id, 1
+        from public.citations ci
+        where ci.cited_paper_id = p_paper_id
+        union
+        select ci.id, ci.citing_paper_id, chain.depth + 1
+        from chain
+        join public.citations ci on ci.cited_paper_id = chain.citing_paper_id
+        where chain.depth < p_max_depth
+    ),
+    reached as (
+        select cc.citer_id, min(chain.depth) as degree, count(distinct chain.citation_id) as citation_count
+        from chain
+        join public.citer_citations cc on cc.citation_id = chain.citation_id
+        group by cc.citer_id
+    )
+    select
+        c.id,
+        c.semantic_scholar_id,
+        c.citer_name,
+        c.paper_count,
+        c.location,
+        c.affiliations,
+        r.degree,
+        r.citation_count
+    from reached r
+    join public.citers c on c.id = r.citer_id
+    where r.degree > 1
+    order by r.degree, r.citation_count desc, c.citer_name;
+$$;
+
+-- Citers who cite both users, with each user's citation totals
+create or replace function public.shared_citers(p_user_a uuid, p_user_b uuid)
+returns table (
+    id uuid,
+    semantic_scholar_id text,
+    citer_name text,
+    paper_count integer,
+    location text,
+    affiliations text,
+    user_a_citations integer,
+    user_b_citations integer
+)
+language sql
+stable
+as $$
+    select
+        c.id,
+        c.semantic_scholar_id,
+        c.citer_name,
+        c.paper_count,
+        c.location,
+        c.affiliations,
+        a.total_citations as user_a_citations,
+        b.total_citations as user_b_citations
+    from public.user_citers a
+    join public.user_citers b on b.citer_id = a.citer_id and b.user_id = p_user_b
+    join public.citers c on c.id = a.citer_id
+    where a.user_id = p_user_a
+    order by a.total_citations + b.total_citations desc, c.citer_name;
+$$;
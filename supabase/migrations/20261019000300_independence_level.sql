@@ -0,0 +1,22 @@
+-- Graded citer independence, written by the worker's coauthor graph
+-- (meritpath-worker-service/app/lib/coauthor_graph.py).
+-- user_citers.independent stays false only for direct coauthors.
+
+alter table public.user_citers
+    add column if not exists independence_level text not null default 'independent';
+
+alter table public.user_citers
+    drop constraint if exists user_citers_independence_level_check;
+
+alter table public.user_citers
+    add constraint user_citers_independence_level_check
+        check (independence_level in ('coauthor', 'collaborator', 'shared_affiliation', 'independent'));
+
+-- Existing coauthor flags carry over as the closest level
+update public.user_citers
+   set independence_level = 'coauthor'
+ where independent = false
+   and independence_level = 'independent';
+
+create index if not exists user_citers_user_id_independence_level_idx
+    on public.user_citers (user_id, independence_level);
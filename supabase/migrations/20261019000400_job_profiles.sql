@@ -0,0 +1,16 @@
+-- Opt-in sampling profiles of worker jobs
+-- (meritpath-worker-service/app/lib/job_profiler.py), saved next to job_results.
+-- profile holds folded stacks ("root;...;leaf count" per line) for
+-- flamegraph.pl, speedscope or inferno.
+
+create table if not exists public.job_profiles (
+    id uuid primary key default gen_random_uuid(),
+    job_id uuid not null references public.jobs (id) on delete cascade,
+    format text not null default 'folded',
+    samples integer not null default 0,
+    interval_ms real,
+    profile text not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists job_profiles_job_id_idx on public.job_profiles (job_id);
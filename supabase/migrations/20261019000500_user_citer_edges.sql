@@ -0,0 +1,138 @@
+-- Normalized citer -> user edges, replacing the nested user_citers.papers blob.
+-- One row per (user, citer, cited paper, citing paper); titles come from papers
+-- by join. The worker only ever appends edges and refreshes the user_citers
+-- counts in bulk (refresh_user_citer_counts), and the nested
+-- {cited title: {paper_id, citations: [{citing_paper_id, title}]}} shape is
+-- built on demand (user_citer_papers) for the detail endpoint and exports.
+
+create table if not exists public.user_citer_edges (
+    user_id uuid not null references public.users (id) on delete cascade,
+    citer_id uuid not null references public.citers (id) on delete cascade,
+    cited_paper_id uuid not null references public.papers (id) on delete cascade,
+    citing_paper_id uuid not null references public.papers (id) on delete cascade,
+    created_at timestamptz not null default now(),
+    primary key (user_id, citer_id, cited_paper_id, citing_paper_id)
+);
+
+-- Converted rows drop their blob
+alter table public.user_citers alter column papers drop not null;
+
+-- Backfill every blob whose cited and citing papers all resolve to stored papers.
+-- Anything else (legacy {title: [titles]} lists, missing ids) keeps its blob
+-- until the worker converts it.
+with entries as (
+    select
+        uc.id as user_citer_id,
+        uc.user_id,
+        uc.citer_id,
+        cited.value ->> 'paper_id' as cited_paper_id,
+        citation ->> 'citing_paper_id' as citing_paper_id
+    from public.user_citers uc
+    cross join lateral jsonb_each(uc.papers) as cited
+    left join lateral jsonb_array_elements(
+        case when jsonb_typeof(cited.value -> 'citations') = 'array' then cited.value -> 'citations' else '[]'::jsonb end
+    ) as citation on true
+    where jsonb_typeof(uc.papers) = 'object'
+),
+resolved as (
+    select e.*, cited_paper.id as cited_id, citing_paper.id as citing_id
+    from entries e
+    left join public.papers cited_paper on cited_paper.id::text = e.cited_paper_id
+    left join public.papers citing_paper on citing_paper.id::text = e.citing_paper_id
+),
+convertible as (
+    select user_citer_id
+    from resolved
+    group by user_citer_id
+    having bool_and(cited_id is not null and citing_id is not null)
+),
+inserted as (
+    insert into public.user_citer_edges (user_id, citer_id, cited_paper_id, citing_paper_id)
+    select r.user_id, r.citer_id, r.cited_id, r.citing_id
+    from resolved r
+    join convertible c on c.user_citer_id = r.user_citer_id
+    on conflict do nothing
+)
+update public.user_citers uc
+   set papers = null
+  from convertible c
+ where uc.id = c.user_citer_id;
+
+-- Nested papers detail for some of a user's citers, built from the edges.
+-- Rows not converted yet fall back to their stored blob.
+create or replace function public.user_citer_papers(p_user_id uuid, p_citer_ids uuid[])
+returns table (citer_id uuid, papers jsonb)
+language sql
+stable
+as $$
+    with edges as (
+        select
+            e.citer_id,
+            e.cited_paper_id,
+            cited.title as cited_title,
+            e.citing_paper_id,
+            citing.title as citing_title
+        from public.user_citer_edges e
+        join public.papers cited on cited.id = e.cited_paper_id
+        join public.papers citing on citing.id = e.citing_paper_id
+        where e.user_id = p_user_id
+          and e.citer_id = any (p_citer_ids)
+    ),
+    by_cited as (
+        select
+            edges.citer_id,
+            edges.cited_title,
+            edges.cited_paper_id,
+            jsonb_agg(
+                jsonb_build_object('citing_paper_id', edges.citing_paper_id, 'title', edges.citing_title)
+                order by edges.citing_title
+            ) as citations
+        from edges
+        group by edges.citer_id, edges.cited_title, edges.cited_paper_id
+    ),
+    built as (
+        select
+            by_cited.citer_id,
+            jsonb_object_agg(
+                coalesce(by_cited.cited_title, 'Unknown'),
+                jsonb_build_object('paper_id', by_cited.cited_paper_id, 'citations', by_cited.citations)
+            ) as papers
+        from by_cited
+        group by by_cited.citer_id
+    )
+    select uc.citer_id, coalesce(built.papers, uc.papers, '{}'::jsonb)
+    from public.user_citers uc
+    left join built on built.citer_id = uc.citer_id
+    where uc.user_id = p_user_id
+      and uc.citer_id = any (p_citer_ids)
+$$;
+
+-- Recompute total/cited/citing counts of a user's citers from their edges in one statement.
+-- Returns the number of user_citers rows updated.
+create or replace function public.refresh_user_citer_counts(p_user_id uuid)
+returns integer
+language sql
+as $$
+    with counts as (
+        select
+            e.citer_id,
+            count(*) as total_citations,
+            count(distinct e.cited_paper_id) as cited_papers_count,
+            count(distinct e.citing_paper_id) as citing_papers_count
+        from public.user_citer_edges e
+        where e.user_id = p_user_id
+        group by e.citer_id
+    ),
+    updated as (
+        update public.user_citers uc
+           set total_citations = counts.total_citations,
+               cited_papers_count = counts.cited_papers_count,
+               citing_papers_count = counts.citing_papers_count,
+               updated_at = now()
+          from counts
+         where uc.user_id = p_user_id
+           and uc.citer_id = counts.citer_id
+        returning 1
+    )
+    select count(*)::integer from updated
+$$;
@@ -0,0 +1,98 @@
+-- Bulk conversion of the user_citers.papers blobs the 000500 backfill left
+-- behind (legacy {cited title: [citing titles]} lists and entries without
+-- paper ids) into user_citer_edges, run batch by batch by the worker's
+-- migrate_user_citer_papers job. Titles are resolved to papers in one join
+-- per batch instead of one lookup per title.
+
+-- Lets the batches find unconverted rows without scanning every user_citers row
+create index if not exists user_citers_legacy_papers_idx
+    on public.user_citers (id)
+    where papers is not null;
+
+-- Progress of long-running jobs, updated while the job is processing
+alter table public.jobs add column if not exists progress jsonb;
+
+-- Convert up to p_batch_size rows (optionally only p_user_id's) and clear their blobs.
+-- Entries whose papers don't resolve by id or title are dropped and counted as unresolved.
+create or replace function public.migrate_legacy_user_citer_papers(
+    p_batch_size integer default 500,
+    p_user_id uuid default null
+)
+returns table (converted integer, edges integer, unresolved integer, remaining integer)
+language sql
+as $$
+    with batch as (
+        select uc.id, uc.user_id, uc.citer_id, uc.papers
+        from public.user_citers uc
+        where uc.papers is not null
+          and (p_user_id is null or uc.user_id = p_user_id)
+        order by uc.id
+        limit p_batch_size
+        for update skip locked
+    ),
+    -- One row per (cited, citing) entry, from either blob format
+    entries as (
+        select
+            b.user_id,
+            b.citer_id,
+            cited.key as cited_title,
+            case when jsonb_typeof(cited.value) = 'object' then cited.value ->> 'paper_id' end as cited_paper_id,
+            case when jsonb_typeof(citation) = 'object' then citation ->> 'title' else citation #>> '{}' end as citing_title,
+            case when jsonb_typeof(citation) = 'object' then citation ->> 'citing_paper_id' end as citing_paper_id
+        from batch b
+        cross join lateral jsonb_each(case when jsonb_typeof(b.papers) = 'object' then b.papers else '{}'::jsonb end) as cited
+        cross join lateral jsonb_array_elements(
+            case
+                when jsonb_typeof(cited.value) = 'array' then cited.value
+                when jsonb_typeof(cited.value -> 'citations') = 'array' then cited.value -> 'citations'
+                else '[]'::jsonb
+            end
+        ) as citation
+    ),
+    -- Every title in the batch resolved in one pass; the oldest paper wins for duplicate titles
+    titles as (
+        select distinct on (p.title) p.title, p.id
+        from public.papers p
+        where p.title in (select cited_title from entries union select citing_title from entries)
+        order by p.title, p.created_at
+    ),
+    resolved as (
+        select
+            e.user_id,
+            e.citer_id,
+            coalesce(cited_by_id.id, cited_by_title.id) as cited_id,
+            coalesce(citing_by_id.id, citing_by_title.id) as citing_id
+        from entries e
+        left join public.papers cited_by_id on cited_by_id.id::text = e.cited_paper_id
+        left join titles cited_by_title on cited_by_title.title = e.cited_title
+        left join public.papers citing_by_id on citing_by_id.id::text = e.citing_paper_id
+        left join titles citing_by_title on citing_by_title.title = e.citing_title
+    ),
+    inserted as (
+        insert into public.user_citer_edges (user_id, citer_id, cited_paper_id, citing_paper_id)
+        select distinct r.user_id, r.citer_id, r.cited_id, r.citing_id
+        from resolved r
+        where r.cited_id is not null and r.citing_id is not null
+        on conflict do nothing
+        returning 1
+    ),
+    cleared as (
+        update public.user_citers uc
+           set papers = null,
+               updated_at = now()
+          from batch b
+         where uc.id = b.id
+        returning 1
+    )
+    select
+        (select count(*)::integer from cleared),
+        (select count(*)::integer from inserted),
+        (select count(*)::integer from resolved r where r.cited_id is null or r.citing_id is null),
+        -- Counted before this batch was cleared
+        (
+            select count(*)::integer
+            from public.user_citers uc
+            where uc.papers is not null
+              and (p_user_id is null or uc.user_id = p_user_id)
+        ) - (select count(*)::integer from cleared)
+$$;
@@ -0,0 +1,68 @@
+-- One papers row per Semantic Scholar paper, so the worker can resolve
+-- S2 IDs from its in-process PaperIdMap and create papers with a single
+-- upsert on semantic_scholar_id instead of select-then-insert.
+
+-- Merge duplicates created by concurrent jobs into the oldest row first
+create temporary table paper_duplicates as
+select p.id as duplicate_id, keeper.id as keeper_id
+from public.papers p
+join (
+    select distinct on (semantic_scholar_id) semantic_scholar_id, id
+    from public.papers
+    where semantic_scholar_id is not null
+    order by semantic_scholar_id, created_at, id
+) keeper on keeper.semantic_scholar_id = p.semantic_scholar_id and keeper.id <> p.id;
+
+update public.citations c set cited_paper_id = d.keeper_id
+  from paper_duplicates d where c.cited_paper_id = d.duplicate_id;
+update public.citations c set citing_paper_id = d.keeper_id
+  from paper_duplicates d where c.citing_paper_id = d.duplicate_id;
+update public.user_papers up set paper_id = d.keeper_id
+  from paper_duplicates d where up.paper_id = d.duplicate_id;
+
+-- Edges are keyed on the paper ids, so repoint by copying; the originals cascade away below
+insert into public.user_citer_edges (user_id, citer_id, cited_paper_id, citing_paper_id, created_at)
+select e.user_id, e.citer_id, coalesce(cited.keeper_id, e.cited_paper_id), coalesce(citing.keeper_id, e.citing_paper_id), e.created_at
+from public.user_citer_edges e
+left join paper_duplicates cited on cited.duplicate_id = e.cited_paper_id
+left join paper_duplicates citing on citing.duplicate_id = e.citing_paper_id
+where cited.duplicate_id is not null or citing.duplicate_id is not null
+on conflict do nothing;
+
+-- A citation stored under two duplicate papers is now two identical rows:
+-- keep the oldest, move the other's citers onto it, then delete the rest
+create temporary table citation_duplicates as
+select c.id as duplicate_id, keeper.id as keeper_id
+from public.citations c
+join (
+    select distinct on (cited_paper_id, citing_paper_id) cited_paper_id, citing_paper_id, id
+    from public.citations
+    order by cited_paper_id, citing_paper_id, created_at, id
+) keeper on keeper.cited_paper_id = c.cited_paper_id
+        and keeper.citing_paper_id = c.citing_paper_id
+        and keeper.id <> c.id;
+
+update public.citer_citations cc set citation_id = d.keeper_id
+  from citation_duplicates d where cc.citation_id = d.duplicate_id;
+delete from public.citations c using citation_duplicates d where c.id = d.duplicate_id;
+drop table citation_duplicates;
+
+-- Likewise a citer linked twice to one citation, and a user linked twice to one paper
+delete from public.citer_citations cc
+ using public.citer_citations other
+ where other.citer_id = cc.citer_id and other.citation_id = cc.citation_id and other.id < cc.id;
+delete from public.user_papers up
+ using public.user_papers other
+ where other.user_id = up.user_id and other.paper_id = up.paper_id and other.id < up.id;
+
+delete from public.papers p using paper_duplicates d where p.id = d.duplicate_id;
+drop table paper_duplicates;
+
+create unique index if not exists papers_semantic_scholar_id_key on public.papers (semantic_scholar_id);
+-- So the worker can link papers, citations and citers with upserts
+create unique index if not exists citations_cited_paper_id_citing_paper_id_key
+    on public.citations (cited_paper_id, citing_paper_id);
+create unique index if not exists user_papers_user_id_paper_id_key
+    on public.user_papers (user_id, paper_id);
+create unique index if not exists citer_citations_citer_id_citation_id_key
+    on public.citer_citations (citer_id, citation_id);
@@ -0,0 +1,115 @@
+-- Citations per year, precomputed by the find_citers job so citation trends
+-- are served without scanning citations joined to papers. A citation's year
+-- is the citing paper's year, as in the eb1 script's plot_citation_trends.
+
+create table if not exists public.user_citation_years (
+    user_id uuid not null references public.users (id) on delete cascade,
+    year integer not null,
+    citations integer not null,
+    primary key (user_id, year)
+);
+
+create table if not exists public.paper_citation_years (
+    user_id uuid not null references public.users (id) on delete cascade,
+    paper_id uuid not null references public.papers (id) on delete cascade,
+    year integer not null,
+    citations integer not null,
+    primary key (user_id, paper_id, year)
+);
+
+create table if not exists public.citer_citation_years (
+    user_id uuid not null references public.users (id) on delete cascade,
+    citer_id uuid not null references public.citers (id) on delete cascade,
+    year integer not null,
+    citations integer not null,
+    primary key (user_id, citer_id, year)
+);
+
+create index if not exists citer_citation_years_top_idx
+    on public.citer_citation_years (user_id, year, citations desc);
+
+-- Replace a user's yearly counts with those of a finished crawl, in one transaction.
+-- p_paper_years: [{paper_id, year, citations}], p_citer_years: [{citer_id, year, citations}].
+-- The per-user series is the sum of the per-paper one.
+create or replace function public.replace_citation_years(
+    p_user_id uuid,
+    p_paper_years jsonb,
+    p_citer_years jsonb
+)
+returns integer
+language plpgsql
+as $$
+begin
+    delete from public.paper_citation_years where user_id = p_user_id;
+    delete from public.citer_citation_years where user_id = p_user_id;
+    delete from public.user_citation_years where user_id = p_user_id;
+
+    insert into public.paper_citation_years (user_id, paper_id, year, citations)
+    select p_user_id, r.paper_id, r.year, r.citations
+    from jsonb_to_recordset(coalesce(p_paper_years, '[]'::jsonb)) as r (paper_id uuid, year integer, citations integer);
+
+    insert into public.citer_citation_years (user_id, citer_id, year, citations)
+    select p_user_id, r.citer_id, r.year, r.citations
+    from jsonb_to_recordset(coalesce(p_citer_years, '[]'::jsonb)) as r (citer_id uuid, year integer, citations integer);
+
+    insert into public.user_citation_years (user_id, year, citations)
+    select p_user_id, year, sum(citations)
+    from public.paper_citation_years
+    where user_id = p_user_id
+    group by year;
+
+    return (select count(*)::integer from public.user_citation_years where user_id = p_user_id);
+end;
+$$;
+
+-- Yearly series for the trends endpoint: citations, running total and, for the
+-- whole user (p_paper_id null), the p_top_citers citers citing most that year.
+create or replace function public.user_citation_trends(
+    p_user_id uuid,
+    p_paper_id uuid default null,
+    p_top_citers integer default 3
+)
+returns table (year integer, citations integer, cumulative integer, top_citers jsonb)
+language sql
+stable
+as $$
+    with series as (
+        select y.year, y.citations
+        from public.user_citation_years y
+        where p_paper_id is null and y.user_id = p_user_id
+        union all
+        select y.year, y.citations
+        from public.paper_citation_years y
+        where p_paper_id is not null and y.user_id = p_user_id and y.paper_id = p_paper_id
+    ),
+    ranked as (
+        select
+            cy.year,
+            cy.citer_id,
+            c.citer_name,
+            cy.citations,
+            row_number() over (partition by cy.year order by cy.citations desc, c.citer_name) as rank
+        from public.citer_citation_years cy
+        join public.citers c on c.id = cy.citer_id
+        where p_paper_id is null and cy.user_id = p_user_id
+    ),
+    top as (
+        select
+            ranked.year,
+            jsonb_agg(
+                jsonb_build_object('citer_id', ranked.citer_id, 'citer_name', ranked.citer_name, 'citations', ranked.citations)
+                order by ranked.rank
+            ) as top_citers
+        from ranked
+        where ranked.rank <= p_top_citers
+        group by ranked.year
+    )
+    select
+        s.year,
+        s.citations,
+        (sum(s.citations) over (order by s.year))::integer as cumulative,
+        coalesce(top.top_citers, '[]'::jsonb)
+    from series s
+    left join top on top.year = s.year
+    order by s.year
+$$;
@@ -0,0 +1,89 @@
+-- Composite recommender score per user_citers row, computed in bulk by the
+-- find_citers job (score_user_citers) so the top-K recommenders of any user
+-- are an index scan.
+
+alter table public.user_citers
+    add column if not exists score real not null default 0;
+
+create index if not exists user_citers_user_id_score_idx
+    on public.user_citers (user_id, score desc);
+
+-- Score every citer of a user in one statement. Each feature is scaled to
+-- [0, 1] within the user's citers, and the score is their weighted mean:
+--   citations    log-scaled total_citations
+--   breadth      cited_papers_count (distinct papers of the user cited)
+--   seniority    log-scaled citers.paper_count
+--   independence independence_level, coauthor 0 .. independent 1
+--   recency      latest year the citer cited the user (citer_citation_years)
+-- p_weights maps feature names to weights; missing features use the defaults.
+create or replace function public.score_user_citers(p_user_id uuid, p_weights jsonb default '{}'::jsonb)
+returns integer
+language sql
+as $$
+    with weights as (
+        select
+            coalesce((p_weights ->> 'citations')::real, 0.35) as citations,
+            coalesce((p_weights ->> 'breadth')::real, 0.2) as breadth,
+            coalesce((p_weights ->> 'seniority')::real, 0.15) as seniority,
+            coalesce((p_weights ->> 'independence')::real, 0.2) as independence,
+            coalesce((p_weights ->> 'recency')::real, 0.1) as recency
+    ),
+    last_years as (
+        select citer_id, max(year) as last_year
+        from public.citer_citation_years
+        where user_id = p_user_id
+        group by citer_id
+    ),
+    features as (
+        select
+            uc.id,
+            ln(1 + uc.total_citations) as citations,
+            uc.cited_papers_count::real as breadth,
+            ln(1 + coalesce(c.paper_count, 0)) as seniority,
+            case uc.independence_level
+                when 'independent' then 1.0
+                when 'shared_affiliation' then 0.66
+                when 'collaborator' then 0.33
+                else 0.0
+            end as independence,
+            ly.last_year
+        from public.user_citers uc
+        join public.citers c on c.id = uc.citer_id
+        left join last_years ly on ly.citer_id = uc.citer_id
+        where uc.user_id = p_user_id
+    ),
+    bounds as (
+        select
+            nullif(max(citations), 0) as max_citations,
+            nullif(max(breadth), 0) as max_breadth,
+            nullif(max(seniority), 0) as max_seniority,
+            min(last_year) as first_year,
+            nullif(max(last_year) - min(last_year), 0) as year_span
+        from features
+    ),
+    scored as (
+        select
+            f.id,
+            (
+                w.citations * coalesce(f.citations / b.max_citations, 0)
+                + w.breadth * coalesce(f.breadth / b.max_breadth, 0)
+                + w.seniority * coalesce(f.seniority / b.max_seniority, 0)
+                + w.independence * f.independence
+                + w.recency * case
+                    when f.last_year is null then 0
+                    else coalesce((f.last_year - b.first_year)::real / b.year_span, 1)
+                  end
+            ) / nullif(w.citations + w.breadth + w.seniority + w.independence + w.recency, 0) as score
+        from features f
+        cross join bounds b
+        cross join weights w
+    ),
+    updated as (
+        update public.user_citers uc
+           set score = coalesce(scored.score, 0)
+          from scored
+         where uc.id = scored.id
+        returning 1
+    )
+    select count(*)::integer from updated
+$$;
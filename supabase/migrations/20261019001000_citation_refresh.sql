@@ -0,0 +1,29 @@
+-- State for the worker's scheduled citation refresh (CitationRefreshService):
+-- the S2 author-level citation count seen at the last check, so a user is only
+-- re-crawled when the count changed, and when the user was last checked.
+
+alter table public.users
+    add column if not exists s2_citation_count integer,
+    add column if not exists citations_checked_at timestamptz;
+
+-- Lets each refresh tick pick the least recently checked users without a full scan
+create index if not exists users_citations_checked_at_idx
+    on public.users (citations_checked_at nulls first)
+    where semantic_scholar_id is not null;
+
+-- Record one refresh tick's checks in one statement. p_counts: [{user_id, citations}];
+-- a null count (author unknown to S2 or lookup failed) keeps the stored one.
+create or replace function public.record_citation_counts(p_counts jsonb, p_checked_at timestamptz default now())
+returns integer
+language sql
+as $$
+    with updated as (
+        update public.users u
+           set s2_citation_count = coalesce(r.citations, u.s2_citation_count),
+               citations_checked_at = p_checked_at
+          from jsonb_to_recordset(coalesce(p_counts, '[]'::jsonb)) as r (user_id uuid, citations integer)
+         where u.id = r.user_id
+        returning 1
+    )
+    select count(*)::integer from updated
+$$;
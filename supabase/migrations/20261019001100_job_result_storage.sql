@@ -0,0 +1,47 @@
+-- Keep job_results small: the worker (app/lib/result_store.py) stores small
+-- results inline and, for large ones, only a summary in job_results with the
+-- gzipped result in job_result_blobs or a file under RESULT_STORE_DIR.
+-- storage is one of:
+--   inline   result holds the full result
+--   blob     the result is in job_result_blobs
+--   file     the result is the gzipped JSON file location, under RESULT_STORE_DIR
+--   summary  the result was over RESULT_MAX_BYTES and only summary was kept
+
+alter table public.job_results
+    add column if not exists summary jsonb,
+    add column if not exists size_bytes integer,
+    add column if not exists storage text not null default 'inline',
+    add column if not exists location text;
+
+create table if not exists public.job_result_blobs (
+    job_result_id uuid primary key references public.job_results (id) on delete cascade,
+    -- gzip+base64 from the worker, json for rows moved here by this migration
+    encoding text not null default 'gzip+base64',
+    payload text not null,
+    size_bytes integer not null,
+    created_at timestamptz not null default now()
+);
+
+-- Looked up by job_id on every job poll
+create index if not exists job_results_job_id_idx on public.job_results (job_id, created_at desc);
+
+-- Move existing large results out of the hot table, keeping their scalar fields as the summary
+insert into public.job_result_blobs (job_result_id, encoding, payload, size_bytes)
+select id, 'json', result::text, octet_length(result::text)
+from public.job_results
+where storage = 'inline' and octet_length(result::text) > 8192
+on conflict do nothing;
+
+update public.job_results r
+   set summary = case
+           when jsonb_typeof(r.result) = 'object' then (
+               select coalesce(jsonb_object_agg(key, value), '{}'::jsonb)
+               from jsonb_each(r.result)
+               where jsonb_typeof(value) not in ('array', 'object')
+           )
+       end,
+       size_bytes = b.size_bytes,
+       storage = 'blob',
+       result = null
+  from public.job_result_blobs b
+ where b.job_result_id = r.id and r.storage = 'inline';
@@ -0,0 +1,63 @@
+-- Refresh jobs of the worker's CitationRefreshService are find_citers jobs
+-- with params.trigger = 'refresh', created here before they are sent to SQS.
+-- Keeping them in jobs makes the per-window budget and the "already queued"
+-- check hold across every worker running the scheduler.
+
+create index if not exists jobs_refresh_created_at_idx
+    on public.jobs (created_at)
+    where job_type = 'find_citers' and params ->> 'trigger' = 'refresh';
+
+create index if not exists jobs_user_id_job_type_idx
+    on public.jobs (user_id, job_type);
+
+-- Create pending refresh jobs for up to p_allowed minus the refresh jobs already
+-- created since p_window_start, for the first of p_user_ids (most stale first)
+-- that have no find_citers job queued or processing. Pending jobs older than a
+-- day are treated as lost messages and don't block a new one.
+create or replace function public.claim_refresh_jobs(
+    p_user_ids uuid[],
+    p_window_start timestamptz,
+    p_allowed integer
+)
+returns table (job_id uuid, user_id uuid)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    v_remaining integer;
+begin
+    -- Claims from concurrent schedulers take turns, so the budget can't be overspent
+    perform pg_advisory_xact_lock(hashtext('claim_refresh_jobs'));
+
+    select p_allowed - count(*)::integer
+      into v_remaining
+      from public.jobs
+     where job_type = 'find_citers'
+       and params ->> 'trigger' = 'refresh'
+       and created_at >= p_window_start;
+
+    if v_remaining <= 0 then
+        return;
+    end if;
+
+    return query
+    insert into public.jobs (id, user_id, job_type, status, params)
+    select
+        gen_random_uuid(),
+        candidate.user_id,
+        'find_citers',
+        'pending',
+        jsonb_build_object('user_id', candidate.user_id, 'trigger', 'refresh')
+    from unnest(p_user_ids) with ordinality as candidate (user_id, position)
+    where not exists (
+        select 1
+        from public.jobs j
+        where j.user_id = candidate.user_id
+          and j.job_type = 'find_citers'
+          and (j.status = 'processing' or (j.status = 'pending' and j.created_at > now() - interval '1 day'))
+    )
+    order by candidate.position
+    limit v_remaining
+    returning id, user_id;
+end;
+$$;
@@ -0,0 +1,25 @@
+-- Save a compressed job result and its job_results row in one transaction,
+-- so a storage = 'blob' row never points at a blob that wasn't written.
+create or replace function public.save_job_result_blob(
+    p_job_id uuid,
+    p_summary jsonb,
+    p_size_bytes integer,
+    p_encoding text,
+    p_payload text
+)
+returns uuid
+language plpgsql
+as $$
+declare
+    v_job_result_id uuid;
+begin
+    insert into public.job_results (job_id, summary, size_bytes, storage)
+    values (p_job_id, p_summary, p_size_bytes, 'blob')
+    returning id into v_job_result_id;
+
+    insert into public.job_result_blobs (job_result_id, encoding, payload, size_bytes)
+    values (v_job_result_id, p_encoding, p_payload, p_size_bytes);
+
+    return v_job_result_id;
+end;
+$$;
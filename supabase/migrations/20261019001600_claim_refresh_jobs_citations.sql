@@ -0,0 +1,58 @@
+-- Refresh jobs carry the S2 citation count that triggered them in
+-- params.citations; the worker records it on users.s2_citation_count only once
+-- the refresh crawl succeeds, so a failed crawl is retried on the next check.
+
+drop function if exists public.claim_refresh_jobs(uuid[], timestamptz, integer);
+
+-- Create pending refresh jobs for up to p_allowed minus the refresh jobs already
+-- created since p_window_start, for the first of p_candidates (most stale first,
+-- [{user_id, citations}]) that have no find_citers job queued or processing.
+-- Pending jobs older than a day are treated as lost messages and don't block a new one.
+create or replace function public.claim_refresh_jobs(
+    p_candidates jsonb,
+    p_window_start timestamptz,
+    p_allowed integer
+)
+returns table (job_id uuid, user_id uuid)
+language plpgsql
+as $$
+#variable_conflict use_column
+declare
+    v_remaining integer;
+begin
+    -- Claims from concurrent schedulers take turns, so the budget can't be overspent
+    perform pg_advisory_xact_lock(hashtext('claim_refresh_jobs'));
+
+    select p_allowed - count(*)::integer
+      into v_remaining
+      from public.jobs
+     where job_type = 'find_citers'
+       and params ->> 'trigger' = 'refresh'
+       and created_at >= p_window_start;
+
+    if v_remaining <= 0 then
+        return;
+    end if;
+
+    return query
+    insert into public.jobs (id, user_id, job_type, status, params)
+    select
+        gen_random_uuid(),
+        candidate.user_id,
+        'find_citers',
+        'pending',
+        jsonb_build_object('user_id', candidate.user_id, 'trigger', 'refresh', 'citations', candidate.citations)
+    from rows from (jsonb_to_recordset(coalesce(p_candidates, '[]'::jsonb)) as (user_id uuid, citations integer))
+         with ordinality as candidate (user_id, citations, position)
+    where not exists (
+        select 1
+        from public.jobs j
+        where j.user_id = candidate.user_id
+          and j.job_type = 'find_citers'
+          and (j.status = 'processing' or (j.status = 'pending' and j.created_at > now() - interval '1 day'))
+    )
+    order by candidate.position
+    limit v_remaining
+    returning id, user_id;
+end;
+$$;